@@ -0,0 +1,32 @@
+"""Add research checkpoints
+
+Revision ID: add_research_checkpoints
+Create Date: 2026-10-19 09:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = 'add_research_checkpoints'
+down_revision = 'add_metrics_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stage outputs of in-progress jobs, used to resume after failures
+    op.create_table(
+        'research_checkpoints',
+        sa.Column('job_id', sa.String(), nullable=False),
+        sa.Column('stage', sa.String(), nullable=False),
+        sa.Column('input_hash', sa.String(), nullable=False),
+        sa.Column('output', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('job_id', 'stage')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('research_checkpoints')
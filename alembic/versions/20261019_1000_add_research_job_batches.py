@@ -0,0 +1,25 @@
+"""Add research job batches
+
+Revision ID: add_research_job_batches
+Create Date: 2026-10-19 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_research_job_batches'
+down_revision = 'add_research_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('research_jobs',
+                  sa.Column('batch_id', sa.String(), nullable=True))
+    op.create_index(op.f('ix_research_jobs_batch_id'),
+                    'research_jobs', ['batch_id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_research_jobs_batch_id'), table_name='research_jobs')
+    op.drop_column('research_jobs', 'batch_id')
@@ -0,0 +1,22 @@
+"""Add research job result metadata
+
+Revision ID: add_job_result_metadata
+Create Date: 2026-10-19 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_job_result_metadata'
+down_revision = 'add_research_job_batches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('research_jobs',
+                  sa.Column('result_metadata', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('research_jobs', 'result_metadata')
@@ -0,0 +1,27 @@
+"""Add research cache versions and stale window
+
+Revision ID: add_research_cache_versions
+Create Date: 2026-10-19 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_research_cache_versions'
+down_revision = 'add_job_result_metadata'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('research_cache',
+                  sa.Column('stale_until', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('research_cache',
+                  sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    # Existing entries get no stale window
+    op.execute('UPDATE research_cache SET stale_until = cache_valid_until')
+
+
+def downgrade() -> None:
+    op.drop_column('research_cache', 'version')
+    op.drop_column('research_cache', 'stale_until')
@@ -0,0 +1,31 @@
+"""Add per-stage validity to the research cache
+
+Revision ID: add_cache_stage_validity
+Create Date: 2026-10-19 13:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_cache_stage_validity'
+down_revision = 'add_research_cache_versions'
+branch_labels = None
+depends_on = None
+
+STAGE_COLUMNS = ('crawl_valid_until', 'analyzed_valid_until', 'enriched_valid_until')
+
+
+def upgrade() -> None:
+    for column in STAGE_COLUMNS:
+        op.add_column('research_cache',
+                      sa.Column(column, sa.DateTime(timezone=True), nullable=True))
+    # Existing entries were cached as a whole
+    op.execute(
+        'UPDATE research_cache SET '
+        + ', '.join(f'{column} = cache_valid_until' for column in STAGE_COLUMNS)
+    )
+
+
+def downgrade() -> None:
+    for column in reversed(STAGE_COLUMNS):
+        op.drop_column('research_cache', column)
@@ -0,0 +1,47 @@
+"""Add crawl blob store
+
+Revision ID: add_crawl_blobs
+Create Date: 2026-10-19 14:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_crawl_blobs'
+down_revision = 'add_cache_stage_validity'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # zstd dictionaries trained on crawled pages
+    op.create_table(
+        'crawl_dictionaries',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Compressed crawled pages keyed by content hash; research_cache.crawl_data
+    # holds a manifest of these hashes
+    op.create_table(
+        'crawl_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('dictionary_id', sa.Integer(), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('hash')
+    )
+    op.create_index(op.f('ix_crawl_blobs_created_at'), 'crawl_blobs', ['created_at'])
+    # Blobs are already compressed; skip TOAST's own compression
+    op.execute('ALTER TABLE crawl_blobs ALTER COLUMN data SET STORAGE EXTERNAL')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_crawl_blobs_created_at'), table_name='crawl_blobs')
+    op.drop_table('crawl_blobs')
+    op.drop_table('crawl_dictionaries')
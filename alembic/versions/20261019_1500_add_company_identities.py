@@ -0,0 +1,37 @@
+"""Add company identities
+
+Revision ID: add_company_identities
+Create Date: 2026-10-19 15:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_company_identities'
+down_revision = 'add_crawl_blobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Alias and redirect domains of companies, keyed by the alias domain
+    op.create_table(
+        'company_identities',
+        sa.Column('domain', sa.String(), nullable=False),
+        sa.Column('company_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('domain')
+    )
+    op.create_index(op.f('ix_company_identities_company_id'),
+                    'company_identities', ['company_id'])
+
+    op.add_column('research_jobs', sa.Column('company_id', sa.String(), nullable=True))
+    op.create_index(op.f('ix_research_jobs_company_id'), 'research_jobs', ['company_id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_research_jobs_company_id'), table_name='research_jobs')
+    op.drop_column('research_jobs', 'company_id')
+    op.drop_index(op.f('ix_company_identities_company_id'), table_name='company_identities')
+    op.drop_table('company_identities')
@@ -0,0 +1,85 @@
+"""Partition research jobs and API key usage by month
+
+Revision ID: partition_jobs_and_usage
+Create Date: 2026-10-19 16:00:00.000000
+"""
+from datetime import datetime
+
+from alembic import op
+
+# revision identifiers
+revision = 'partition_jobs_and_usage'
+down_revision = 'add_company_identities'
+branch_labels = None
+depends_on = None
+
+# table -> (partition key, indexed columns)
+PARTITIONED_TABLES = {
+    'research_jobs': ('created_at', ['company_url', 'status', 'created_at',
+                                     'batch_id', 'company_id']),
+    'api_key_usage': ('timestamp', ['api_key', 'timestamp'])
+}
+
+# Monthly partitions created up front; the retention task keeps creating
+# them ahead of time after that
+MONTHS_AHEAD = 3
+
+
+def _months():
+    """(name suffix, start, end) of this month and the next MONTHS_AHEAD"""
+    today = datetime.utcnow()
+    months = []
+    for offset in range(MONTHS_AHEAD + 1):
+        year, month = divmod(today.month - 1 + offset, 12)
+        start = datetime(today.year + year, month + 1, 1)
+        year, month = divmod(start.month, 12)
+        end = datetime(start.year + year, month + 1, 1)
+        months.append((f'{start:%Y_%m}', start, end))
+    return months
+
+
+def _recreate(table, key, indexed, partitioned):
+    """Copy a table into a new (partitioned or plain) table of the same name"""
+    legacy = f'{table}_legacy'
+    op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    if table == 'api_key_usage':
+        # Keep the id sequence when the old table is dropped
+        op.execute('ALTER SEQUENCE api_key_usage_id_seq OWNED BY NONE')
+
+    if partitioned:
+        op.execute(f'UPDATE {legacy} SET {key} = now() WHERE {key} IS NULL')
+        op.execute(
+            f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ({key})'
+        )
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL')
+        for suffix, start, end in _months():
+            op.execute(
+                f"CREATE TABLE {table}_{suffix} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}+00') TO ('{end:%Y-%m-%d}+00')"
+            )
+        # Older rows, and any that arrive before their month's partition exists
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    else:
+        op.execute(f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS)')
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+    op.execute(f'DROP TABLE {legacy}')
+
+    # Partitioned tables need the partition key in the primary key
+    primary_key = f'id, {key}' if partitioned else 'id'
+    op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})')
+    for column in indexed:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column])
+    if table == 'api_key_usage':
+        op.execute('ALTER SEQUENCE api_key_usage_id_seq OWNED BY api_key_usage.id')
+
+
+def upgrade() -> None:
+    for table, (key, indexed) in PARTITIONED_TABLES.items():
+        _recreate(table, key, indexed, partitioned=True)
+
+
+def downgrade() -> None:
+    for table, (key, indexed) in PARTITIONED_TABLES.items():
+        _recreate(table, key, indexed, partitioned=False)
@@ -0,0 +1,23 @@
+"""Add research job callback URL
+
+Revision ID: add_job_callback_url
+Create Date: 2026-10-19 17:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_job_callback_url'
+down_revision = 'partition_jobs_and_usage'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Added on the partitioned parent, so every partition gets the column
+    op.add_column('research_jobs',
+                  sa.Column('callback_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('research_jobs', 'callback_url')
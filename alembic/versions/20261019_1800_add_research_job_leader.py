@@ -0,0 +1,25 @@
+"""Record the leader of coalesced research jobs
+
+Revision ID: add_job_leader
+Create Date: 2026-10-19 18:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_job_leader'
+down_revision = 'add_job_callback_url'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('research_jobs',
+                  sa.Column('leader_job_id', sa.String(), nullable=True))
+    op.create_index(op.f('ix_research_jobs_leader_job_id'),
+                    'research_jobs', ['leader_job_id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_research_jobs_leader_job_id'), table_name='research_jobs')
+    op.drop_column('research_jobs', 'leader_job_id')
@@ -1,39 +1,38 @@
-from fastapi import Header, HTTPException, Depends
+from fastapi import Header, HTTPException, Depends, Request, Response
 from fastapi.security.api_key import APIKeyHeader
-from sqlalchemy.orm import Session
-import time
 from typing import Optional
 
 from app.core.config import settings
-from app.models.database import get_db
 from app.core.exceptions import RateLimitException
-from app.models.domain.database_models import APIKeyUsage
+from app.core.rate_limit import get_rate_limiter
+from app.services.scheduler import tenant_for
+from app.services.usage import usage_recorder
 
 api_key_header = APIKeyHeader(name=settings.API_KEY_NAME)
 
 async def verify_api_key(
-    api_key: str = Depends(api_key_header),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    api_key: str = Depends(api_key_header)
 ):
-    """Verify API key and check rate limits"""
+    """
+    Verify API key and check rate limits. One Redis call per request; usage
+    is recorded in the background.
+    """
     if api_key != settings.API_KEY:
         raise HTTPException(
             status_code=403,
             detail="Invalid API key"
         )
     
-    # Check rate limits
-    usage = db.query(APIKeyUsage).filter(
-        APIKeyUsage.api_key == api_key,
-        APIKeyUsage.timestamp > time.time() - settings.RATE_LIMIT_PERIOD
-    ).count()
-    
-    if usage >= settings.RATE_LIMIT_REQUESTS:
-        raise RateLimitException()
+    # Check rate limits, keyed by a hash so raw keys never reach Redis
+    limit = await get_rate_limiter().check(tenant_for(api_key))
+    if not limit.allowed:
+        raise RateLimitException(headers=limit.headers())
+    response.headers.update(limit.headers())
     
     # Record API usage
-    db.add(APIKeyUsage(api_key=api_key, timestamp=time.time()))
-    db.commit()
+    usage_recorder.record(api_key, request.url.path)
     
     return api_key
 
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict
 
 from app.models.database import get_db
@@ -8,13 +9,13 @@ from app.core.config import settings
 router = APIRouter()
 
 @router.get("/", response_model=Dict[str, str])
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     """
     Health check endpoint to verify API and dependencies are working
     """
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         
         return {
             "status": "healthy",
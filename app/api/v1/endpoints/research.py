@@ -1,58 +1,225 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import uuid4
 from datetime import datetime
+import time
+from typing import Any, Dict, List, Optional
 
-from app.models.schemas.requests import ResearchRequest
-from app.models.schemas.responses import ResearchJobStatus, CompanyResearchResponse
+from app.api.dependencies import verify_api_key
+from app.core.config import settings
+from app.core.deadline import deadline_seconds
+from app.core.validation import UnsafeURLError, resolve_public_url
+from app.models.schemas.requests import BatchResearchRequest, ResearchRequest
+from app.models.schemas.responses import (
+    BatchResearchResponse,
+    BatchResearchStatus,
+    CompanyResearchResponse,
+    ResearchJobStatus
+)
 from app.models.database import get_db
 from app.models.domain.database_models import ResearchJob
-from app.worker import process_research
+from app.services.coalescer import AsyncJobCoalescer, coalescing_key
+from app.services.identity import CompanyIdentity, CompanyIdentityResolver
+from app.services.scheduler import AsyncFairScheduler, FairScheduler
+from app.services.progress import FINISHED_STATUSES, AsyncProgressTracker, completion_listener
+from app.services.snapshots import AsyncSnapshotStore
 
 router = APIRouter()
+# Redis is only reached through the async client here, never blocking the loop
+coalescer = AsyncJobCoalescer()
+scheduler = AsyncFairScheduler()
+tracker = AsyncProgressTracker()
+snapshots = AsyncSnapshotStore()
 
 @router.post("/research", response_model=dict)
 async def initiate_research(
     request: ResearchRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    api_key: str = Depends(verify_api_key)
 ):
     """
     Initiate a new company research job
     """
+    await _check_callback_urls([request])
+
     # Create job ID
     job_id = str(uuid4())
+    identity, = await _resolve_identities(db, [str(request.company_url)])
     
     # Create job record
     job = ResearchJob(
         id=job_id,
         company_url=str(request.company_url),
+        company_id=identity.company_id,
+        callback_url=_callback_url(request),
         status="pending",
         progress=0.0,
         created_at=datetime.utcnow()
     )
     db.add(job)
-    db.commit()
+    await db.commit()
+    await tracker.update([job_id], status="pending", progress=0.0, created_at=job.created_at)
     
-    # Start background task
-    process_research.delay(
-        job_id,
-        str(request.company_url),
-        request.depth.value,
-        [area.value for area in request.focus_areas],
-        request.output_format.value
-    )
+    # Attach to an identical job that is already running, if any. The row
+    # must be committed first so the leader can complete it on finish.
+    key = _coalescing_key(request, identity)
+    leader = await coalescer.join(key, job_id)
+    if leader is None:
+        # Queue background task in its lane, fairly shared between API keys
+        await scheduler.submit(
+            FairScheduler.lane_for(request.depth.value),
+            api_key,
+            job_id,
+            _task_args(job_id, request, identity),
+            lease=key
+        )
+    else:
+        job.leader_job_id = leader
+        await db.commit()
     
     return {"job_id": job_id}
 
+@router.post("/research/batch", response_model=BatchResearchResponse)
+async def initiate_batch_research(
+    batch: BatchResearchRequest,
+    db: AsyncSession = Depends(get_db),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Initiate research for many companies at once
+    """
+    await _check_callback_urls(batch.requests)
+
+    batch_id = str(uuid4())
+    created_at = datetime.utcnow()
+    jobs = [(str(uuid4()), request) for request in batch.requests]
+    identities = await _resolve_identities(
+        db, [str(request.company_url) for request in batch.requests]
+    )
+
+    # Create every job record in a single transaction
+    await db.execute(insert(ResearchJob), [
+        {
+            "id": job_id,
+            "company_url": str(request.company_url),
+            "company_id": identity.company_id,
+            "callback_url": _callback_url(request),
+            "batch_id": batch_id,
+            "status": "pending",
+            "progress": 0.0,
+            "created_at": created_at
+        }
+        for (job_id, request), identity in zip(jobs, identities)
+    ])
+    await db.commit()
+    await tracker.update(
+        [job_id for job_id, _ in jobs],
+        status="pending", progress=0.0, created_at=created_at
+    )
+
+    # Coalesce duplicates (within the batch and with running jobs), then hand
+    # the leaders to the batch lane in chunks
+    task_args = [
+        _task_args(job_id, request, identity)
+        for (job_id, request), identity in zip(jobs, identities)
+    ]
+    keys = [
+        _coalescing_key(request, identity)
+        for (_, request), identity in zip(jobs, identities)
+    ]
+    leaders = await coalescer.join_many([
+        (key, job_id) for key, (job_id, _) in zip(keys, jobs)
+    ])
+    followers = [
+        {"id": job_id, "created_at": created_at, "leader_job_id": leader}
+        for (job_id, _), leader in zip(jobs, leaders) if leader is not None
+    ]
+    if followers:
+        await db.execute(update(ResearchJob), followers)
+        await db.commit()
+
+    pending = [
+        (args, key) for args, key, leader in zip(task_args, keys, leaders)
+        if leader is None
+    ]
+    for start in range(0, len(pending), settings.BATCH_ENQUEUE_SIZE):
+        chunk = pending[start:start + settings.BATCH_ENQUEUE_SIZE]
+        await scheduler.submit_many(
+            "batch", api_key,
+            {args[0]: args for args, _ in chunk},
+            leases={args[0]: key for args, key in chunk}
+        )
+
+    return BatchResearchResponse(
+        batch_id=batch_id,
+        job_ids=[job_id for job_id, _ in jobs]
+    )
+
+@router.get("/research/batch/{batch_id}", response_model=BatchResearchStatus)
+async def get_batch_status(
+    batch_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get aggregated progress of a research batch
+    """
+    rows = (await db.execute(
+        select(
+            ResearchJob.status,
+            func.count(ResearchJob.id),
+            func.sum(ResearchJob.progress)
+        ).where(
+            ResearchJob.batch_id == batch_id
+        ).group_by(ResearchJob.status)
+    )).all()
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    status_counts = {status: count for status, count, _ in rows}
+    total = sum(status_counts.values())
+    # Failed jobs are finished too, so they count as fully progressed
+    progress = sum(
+        count if status == "failed" else (progress_sum or 0.0)
+        for status, count, progress_sum in rows
+    )
+
+    return BatchResearchStatus(
+        batch_id=batch_id,
+        total=total,
+        completed=status_counts.get("completed", 0),
+        failed=status_counts.get("failed", 0),
+        progress=progress / total,
+        status_counts=status_counts
+    )
+
 @router.get("/research/{job_id}", response_model=ResearchJobStatus)
 async def get_research_status(
     job_id: str,
-    db: Session = Depends(get_db)
+    wait: int = Query(
+        default=0,
+        ge=0,
+        le=settings.LONG_POLL_MAX_WAIT,
+        description="Seconds to hold the request until the job finishes"
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Get status of a research job
+    Get status of a research job. With wait, the response is held until the
+    job completes or fails, or until wait seconds have passed.
     """
-    job = db.query(ResearchJob).filter(ResearchJob.id == job_id).first()
+    if wait:
+        # Jobs missing from the hot store are not waited on
+        await completion_listener.wait(job_id, wait, lambda: _finished_in_tracker(job_id))
+
+    # Workers keep live progress in Redis; Postgres only lags behind it
+    state = await tracker.get(job_id)
+    if state and "created_at" in state:
+        return ResearchJobStatus(job_id=job_id, **state)
+
+    job = await _get_job(db, job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -62,19 +229,21 @@ async def get_research_status(
         status=job.status,
         progress=job.progress,
         created_at=job.created_at,
-        updated_at=job.updated_at,
+        updated_at=job.updated_at or job.created_at,
         error=job.error
     )
 
 @router.get("/research/{job_id}/result", response_model=CompanyResearchResponse)
 async def get_research_result(
     job_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Get the result of a completed research job
+    Get the result of a completed research job. Progressive jobs return
+    their latest provisional result while still running; poll and compare
+    metadata.version to pick up upgrades.
     """
-    job = db.query(ResearchJob).filter(ResearchJob.id == job_id).first()
+    job = await _get_job(db, job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -86,17 +255,100 @@ async def get_research_result(
         )
         
     if job.status != "completed":
-        raise HTTPException(
-            status_code=202,
-            detail="Job still processing"
+        snapshot = await snapshots.get(job_id)
+        if snapshot is None:
+            raise HTTPException(
+                status_code=202,
+                detail="Job still processing"
+            )
+        return CompanyResearchResponse(
+            company_intel=snapshot["result"],
+            metadata={
+                "source": "sales_research_api",
+                "generated_at": snapshot["updated_at"],
+                "confidence_score": snapshot["confidence_score"],
+                "data_freshness": "provisional",
+                "provisional": True,
+                "stage": snapshot["stage"],
+                "version": snapshot["version"]
+            }
         )
-        
+
+    result_metadata = job.result_metadata or {}
     return CompanyResearchResponse(
         company_intel=job.result,
         metadata={
             "source": "sales_research_api",
             "generated_at": job.updated_at,
             "confidence_score": job.result.get("confidence_score", 0.0),
-            "data_freshness": "cached" if job.cache_used else "real-time"
+            "data_freshness": "cached" if result_metadata.get("cache_used") else "real-time",
+            "provisional": False,
+            "version": job.version,
+            # Work dropped to meet the job's deadline, if any
+            "degradations": result_metadata.get("degradations", [])
         }
+    )
+
+def _task_args(
+    job_id: str,
+    request: ResearchRequest,
+    identity: CompanyIdentity
+) -> List[Any]:
+    """
+    Positional arguments of process_research for a request. Jobs research
+    the company's canonical URL, which also keys its cache entry.
+    """
+    return [
+        job_id,
+        identity.canonical_url,
+        request.depth.value,
+        [area.value for area in request.focus_areas or []],
+        request.output_format.value,
+        request.force_refresh,
+        # The deadline runs from submission, so queueing time counts against it
+        time.time() + deadline_seconds(request.depth.value, request.deadline_seconds),
+        request.progressive
+    ]
+
+def _coalescing_key(request: ResearchRequest, identity: CompanyIdentity) -> str:
+    """Single-flight key of a request; the deadline does not change the result"""
+    return coalescing_key(
+        identity.canonical_url,
+        request.depth.value,
+        [area.value for area in request.focus_areas or []],
+        request.output_format.value,
+        request.force_refresh,
+        request.progressive
+    )
+
+def _callback_url(request: ResearchRequest) -> Optional[str]:
+    return str(request.callback_url) if request.callback_url else None
+
+async def _check_callback_urls(requests: List[ResearchRequest]):
+    """Refuse callback URLs whose host resolves to a non-public address"""
+    callback_urls = {str(request.callback_url) for request in requests if request.callback_url}
+    for callback_url in callback_urls:
+        try:
+            await run_in_threadpool(resolve_public_url, callback_url)
+        except UnsafeURLError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid callback_url: {str(e)}")
+
+async def _finished_in_tracker(job_id: str) -> bool:
+    state = await tracker.get(job_id)
+    return state is None or state.get("status") in FINISHED_STATUSES
+
+async def _get_job(db: AsyncSession, job_id: str) -> Optional[ResearchJob]:
+    result = await db.execute(select(ResearchJob).where(ResearchJob.id == job_id))
+    return result.scalars().first()
+
+async def _resolve_identities(
+    db: AsyncSession,
+    company_urls: List[str]
+) -> List[CompanyIdentity]:
+    """
+    Identities of company URLs. The resolver is shared with the workers, so
+    its lookups run through the async session's connection.
+    """
+    return await db.run_sync(
+        lambda session: CompanyIdentityResolver(session).resolve_many(company_urls)
     )
\ No newline at end of file
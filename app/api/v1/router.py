@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from app.api.dependencies import verify_api_key
 from app.api.v1.endpoints import research, health
 
 # Create API router
@@ -8,7 +9,9 @@ api_router = APIRouter()
 api_router.include_router(
     research.router,
     prefix="/research",
-    tags=["research"]
+    tags=["research"],
+    # Every research route needs a valid key and counts against its limit
+    dependencies=[Depends(verify_api_key)]
 )
 
 api_router.include_router(
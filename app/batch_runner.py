@@ -0,0 +1,226 @@
+"""
+Run research over a JSONL file of ResearchRequest objects without the HTTP
+API or Celery.
+
+    python -m app.batch_runner requests.jsonl results.jsonl --concurrency 8
+
+Results are appended to the output file as each request finishes, tagged
+with the input line number. A sidecar ``<output>.progress`` file records which
+lines are done, so an interrupted run picks up where it stopped when started
+again with the same arguments. Lines whose result was written just before a
+crash are found in the output file and not researched again.
+
+depth sets each request's deadline as it does for API jobs. focus_areas are
+not supported by the pipeline, so requests that set them are rejected.
+
+Gemini calls made by concurrent requests within LLM_BATCH_WINDOW_MS of each
+other are sent as one call when LLM_BATCH_ENABLED is set.
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.deadline import Deadline, deadline_seconds
+from app.core.logging import logger, setup_logging
+from app.models.schemas.requests import ResearchRequest
+from app.services.analyzer import AnalyzerService
+from app.services.pipeline import ResearchPipeline
+from app.services.synthesizer import SynthesizerService
+
+class UnsupportedRequestError(ValueError):
+    """A valid ResearchRequest that the batch runner cannot honour"""
+
+class BatchRunner:
+    """
+    Streams requests through the research pipeline with bounded concurrency.
+
+    At most ``window`` lines past the completion watermark are ever held in
+    memory, so memory use does not grow with the size of the input file.
+    """
+
+    def __init__(
+        self,
+        input_path: str,
+        output_path: str,
+        concurrency: int = 4,
+        window: Optional[int] = None,
+        pipeline: Optional[ResearchPipeline] = None
+    ):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.progress_path = f"{output_path}.progress"
+        self.concurrency = concurrency
+        self.window = window or concurrency * 4
+        self.pipeline = pipeline or ResearchPipeline(
+            analyzer=AnalyzerService(batch=settings.LLM_BATCH_ENABLED),
+            synthesizer=SynthesizerService(batch=settings.LLM_BATCH_ENABLED)
+        )
+
+        # Every line below the watermark has a result in the output file
+        self.watermark = 0
+        self.done_above_watermark: Set[int] = set()
+
+    async def run(self) -> Dict[str, int]:
+        """Process every pending line and return success/failure counts"""
+        self._load_progress()
+        counts = {"succeeded": 0, "failed": 0}
+        slots = asyncio.Semaphore(self.concurrency)
+        window_freed = asyncio.Condition()
+        tasks: Set[asyncio.Task] = set()
+
+        with open(self.output_path, "a", encoding="utf-8") as output:
+            for line_no, raw in self._pending_lines():
+                async with window_freed:
+                    await window_freed.wait_for(
+                        lambda: line_no < self.watermark + self.window
+                    )
+                await slots.acquire()
+
+                task = asyncio.create_task(
+                    self._process(line_no, raw, output, counts, window_freed)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: slots.release())
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        return counts
+
+    async def _process(
+        self,
+        line_no: int,
+        raw: str,
+        output,
+        counts: Dict[str, int],
+        window_freed: asyncio.Condition
+    ):
+        record = {"line": line_no}
+        try:
+            request = ResearchRequest.model_validate_json(raw)
+            record["company_url"] = str(request.company_url)
+            record["depth"] = request.depth.value
+            if request.focus_areas:
+                raise UnsupportedRequestError("focus_areas are not supported by the batch runner")
+            deadline = Deadline.after(
+                deadline_seconds(request.depth.value, request.deadline_seconds)
+            )
+            outputs = await self.pipeline.run(
+                str(request.company_url),
+                request.output_format.value,
+                deadline=deadline
+            )
+            record["status"] = "completed"
+            record["result"] = outputs["final_brief"]
+            record["degradations"] = deadline.cuts
+            counts["succeeded"] += 1
+        except (ValidationError, UnsupportedRequestError) as e:
+            record["status"] = "failed"
+            record["error"] = f"Invalid request: {e}"
+            counts["failed"] += 1
+        except Exception as e:
+            logger.error(f"Research failed for line {line_no}: {str(e)}")
+            record["status"] = "failed"
+            record["error"] = str(e)
+            counts["failed"] += 1
+
+        record["finished_at"] = datetime.utcnow().isoformat()
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+
+        async with window_freed:
+            self._mark_done(line_no)
+            window_freed.notify_all()
+
+    def _pending_lines(self) -> Iterator[Tuple[int, str]]:
+        """Yield (line number, text) for input lines that still need a result"""
+        with open(self.input_path, encoding="utf-8") as source:
+            for line_no, raw in enumerate(source):
+                if line_no < self.watermark or line_no in self.done_above_watermark:
+                    continue
+                raw = raw.strip()
+                if not raw:
+                    self._mark_done(line_no)
+                    continue
+                yield line_no, raw
+
+    def _mark_done(self, line_no: int):
+        """Record a finished line and advance the watermark past finished lines"""
+        self.done_above_watermark.add(line_no)
+        self._advance_watermark()
+        self._save_progress()
+
+    def _advance_watermark(self):
+        while self.watermark in self.done_above_watermark:
+            self.done_above_watermark.discard(self.watermark)
+            self.watermark += 1
+
+    def _load_progress(self):
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding="utf-8") as progress:
+                state = json.load(progress)
+            self.watermark = state["watermark"]
+            self.done_above_watermark = set(state["done"])
+
+        # Results are written before progress is saved, so a crash between
+        # the two leaves results the progress file does not know about
+        self.done_above_watermark.update(
+            line_no for line_no in self._written_lines() if line_no >= self.watermark
+        )
+        self._advance_watermark()
+
+    def _written_lines(self) -> Iterator[int]:
+        """
+        Input line numbers with a result in the output file. A record torn
+        by a crash mid-write is cut off, so the next one starts on its own
+        line.
+        """
+        if not os.path.exists(self.output_path):
+            return
+        complete = 0
+        with open(self.output_path, "rb+") as output:
+            for raw in output:
+                if not raw.endswith(b"\n"):
+                    break
+                complete += len(raw)
+                yield json.loads(raw)["line"]
+            output.truncate(complete)
+
+    def _save_progress(self):
+        # Written atomically so a crash never leaves a truncated file behind
+        tmp_path = f"{self.progress_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as progress:
+            json.dump({
+                "watermark": self.watermark,
+                "done": sorted(self.done_above_watermark)
+            }, progress)
+        os.replace(tmp_path, self.progress_path)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run company research over a JSONL file of requests"
+    )
+    parser.add_argument("input", help="JSONL file with one ResearchRequest per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument(
+        "--concurrency", type=int, default=4,
+        help="Maximum number of companies researched at the same time"
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    runner = BatchRunner(args.input, args.output, concurrency=args.concurrency)
+    counts = asyncio.run(runner.run())
+    logger.info(
+        f"Batch finished: {counts['succeeded']} succeeded, {counts['failed']} failed"
+    )
+
+if __name__ == "__main__":
+    main()
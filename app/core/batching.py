@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.monitoring import LLM_BATCH_SIZE
+
+def combine_prompts(prompts: List[str]) -> str:
+    """Merge independent prompts into one that asks for a JSON array of answers"""
+    tasks = "\n\n".join(
+        f"### Task {index + 1}\n{prompt}" for index, prompt in enumerate(prompts)
+    )
+    return f"""
+        Complete each of the following {len(prompts)} independent tasks.
+        Return a JSON array with exactly {len(prompts)} elements, where element
+        N is the answer to task N in the format that task asks for.
+
+        {tasks}
+        """
+
+class MicroBatcher:
+    """
+    Groups calls made within a short window of each other into one batched
+    call and routes each result back to its caller.
+
+    run_batch receives the items in submission order and must return one
+    result per item; if it raises, every caller in the batch gets the error.
+    A batch is sent once the window since its first item has passed or it
+    reaches max_size, whichever comes first. With max_chars, items are
+    prompts and a batch is also capped at that combined length; a prompt
+    that would take it past the cap starts the next batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        window_ms: int = settings.LLM_BATCH_WINDOW_MS,
+        max_size: int = settings.LLM_BATCH_MAX_SIZE,
+        max_chars: Optional[int] = None
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self.max_chars = max_chars
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._pending_chars = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only holds weak references to tasks
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        chars = len(item) if self.max_chars else 0
+        if self._pending and self.max_chars and self._pending_chars + chars > self.max_chars:
+            self._flush()
+        self._pending.append((item, future))
+        self._pending_chars += chars
+        if len(self._pending) >= self.max_size or (
+            self.max_chars and self._pending_chars >= self.max_chars
+        ):
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        self._pending_chars = 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        LLM_BATCH_SIZE.labels(batcher=self.name).observe(len(batch))
+        try:
+            results = await self.run_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"{self.name} batch returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # Callers may have been cancelled while the batch ran
+            if not future.done():
+                future.set_result(result)
+
+class BatcherPool:
+    """
+    One MicroBatcher per kind of call, for a service that batches.
+
+    Pools belong to a service instance rather than the process: batching
+    only pays off where many pipelines share one event loop (the batch
+    runner), and a batcher must not outlive the loop its futures live on.
+    """
+
+    def __init__(self):
+        self._batchers: Dict[str, MicroBatcher] = {}
+
+    def get(
+        self,
+        name: str,
+        run_batch: Callable[[List[Any]], Awaitable[List[Any]]]
+    ) -> MicroBatcher:
+        """
+        Batcher for a kind of prompt; run_batch is used on first use.
+        Batches are capped at LLM_BATCH_MAX_CHARS of combined prompts.
+        """
+        if name not in self._batchers:
+            self._batchers[name] = MicroBatcher(
+                name, run_batch, max_chars=settings.LLM_BATCH_MAX_CHARS
+            )
+        return self._batchers[name]
\ No newline at end of file
@@ -0,0 +1,292 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, NamedTuple, Optional, Tuple
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.monitoring import PROVIDER_CONCURRENCY_LIMIT, PROVIDER_IN_FLIGHT
+from app.core.redis import get_redis
+
+# Latency samples needed before spikes are judged against the baseline
+BASELINE_MIN_SAMPLES = 10
+BASELINE_ALPHA = 0.05
+
+# Take a slot if fewer than floor(limit) leases are live. Leases expire, so
+# slots held by a worker that died are reclaimed.
+ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local limit = tonumber(redis.call('HGET', KEYS[1], 'limit') or ARGV[3])
+local in_flight = redis.call('ZCARD', KEYS[2])
+if in_flight >= math.floor(limit) then
+    return {0, tostring(limit), in_flight}
+end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return {1, tostring(limit), in_flight + 1}
+"""
+
+# Return a slot and apply AIMD to the shared limit. A negative latency means
+# the call was cancelled and says nothing about provider health.
+RELEASE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREM', KEYS[2], ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'limit', 'baseline', 'samples', 'last_decrease')
+local limit = tonumber(state[1]) or tonumber(ARGV[4])
+local baseline = tonumber(state[2])
+local samples = tonumber(state[3]) or 0
+local last_decrease = tonumber(state[4]) or 0
+local latency = tonumber(ARGV[2])
+local spike = latency >= 0 and baseline ~= nil and samples >= tonumber(ARGV[10])
+    and latency > baseline * tonumber(ARGV[7])
+if ARGV[3] == '1' or spike then
+    if now - last_decrease >= (baseline or 0) then
+        last_decrease = now
+        limit = math.max(tonumber(ARGV[5]), limit * tonumber(ARGV[8]))
+    end
+elseif latency >= 0 then
+    samples = samples + 1
+    if baseline then
+        baseline = baseline + tonumber(ARGV[9]) * (latency - baseline)
+    else
+        baseline = latency
+    end
+    limit = math.min(tonumber(ARGV[6]), limit + 1 / limit)
+end
+redis.call('HSET', KEYS[1], 'limit', tostring(limit), 'samples', samples,
+    'last_decrease', tostring(last_decrease))
+if baseline then
+    redis.call('HSET', KEYS[1], 'baseline', tostring(baseline))
+end
+redis.call('EXPIRE', KEYS[1], 86400)
+return {tostring(limit), redis.call('ZCARD', KEYS[2])}
+"""
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Whether an error means the provider is saturated (throttling or timeouts)
+    rather than that our request was bad. Duck-typed across the Firecrawl,
+    Gemini and OpenAI-compatible clients.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    for attr in ("status_code", "code", "status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    name = type(error).__name__
+    if any(marker in name for marker in ("Timeout", "RateLimit", "ResourceExhausted")):
+        return True
+    return "429" in str(error)
+
+class LimitPolicy(NamedTuple):
+    initial_limit: int
+    min_limit: int
+    max_limit: int
+    # Latency above baseline * latency_tolerance counts as a spike
+    latency_tolerance: float
+    decrease_factor: float
+
+class RedisConcurrencyBackend:
+    """Concurrency limits shared by every worker process through Redis"""
+
+    def __init__(self, redis=None, lease_ttl: int = settings.PROVIDER_SLOT_TTL):
+        self.redis = redis or get_redis()
+        self.lease_ttl = lease_ttl
+        self._acquire = self.redis.register_script(ACQUIRE_SCRIPT)
+        self._release = self.redis.register_script(RELEASE_SCRIPT)
+
+    def try_acquire(
+        self,
+        provider: str,
+        lease_id: str,
+        policy: LimitPolicy
+    ) -> Tuple[bool, float, int]:
+        """Take a slot if one is free; returns (granted, limit, in flight)"""
+        granted, limit, in_flight = self._acquire(
+            keys=self._keys(provider),
+            args=[lease_id, self.lease_ttl, policy.initial_limit]
+        )
+        return bool(granted), float(limit), int(in_flight)
+
+    def release(
+        self,
+        provider: str,
+        lease_id: str,
+        latency: Optional[float],
+        overloaded: bool,
+        policy: LimitPolicy
+    ) -> Tuple[float, int]:
+        """Return a slot and adjust the limit; returns (limit, in flight)"""
+        limit, in_flight = self._release(
+            keys=self._keys(provider),
+            args=[
+                lease_id,
+                -1 if latency is None else latency,
+                1 if overloaded else 0,
+                policy.initial_limit,
+                policy.min_limit,
+                policy.max_limit,
+                policy.latency_tolerance,
+                policy.decrease_factor,
+                BASELINE_ALPHA,
+                BASELINE_MIN_SAMPLES
+            ]
+        )
+        return float(limit), int(in_flight)
+
+    def _keys(self, provider: str):
+        return [f"research:concurrency:{provider}", f"research:concurrency:{provider}:leases"]
+
+class _LimitState:
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self.samples = 0
+        self.last_decrease = 0.0
+
+class InMemoryConcurrencyBackend:
+    """Process-local concurrency limits, for tests and single-process runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, _LimitState] = {}
+
+    def try_acquire(
+        self,
+        provider: str,
+        lease_id: str,
+        policy: LimitPolicy
+    ) -> Tuple[bool, float, int]:
+        with self._lock:
+            state = self._state(provider, policy)
+            if state.in_flight >= int(state.limit):
+                return False, state.limit, state.in_flight
+            state.in_flight += 1
+            return True, state.limit, state.in_flight
+
+    def release(
+        self,
+        provider: str,
+        lease_id: str,
+        latency: Optional[float],
+        overloaded: bool,
+        policy: LimitPolicy
+    ) -> Tuple[float, int]:
+        with self._lock:
+            state = self._state(provider, policy)
+            state.in_flight -= 1
+            spike = (
+                latency is not None
+                and state.samples >= BASELINE_MIN_SAMPLES
+                and latency > state.baseline_latency * policy.latency_tolerance
+            )
+            if overloaded or spike:
+                now = time.monotonic()
+                if now - state.last_decrease >= (state.baseline_latency or 0.0):
+                    state.last_decrease = now
+                    state.limit = max(policy.min_limit, state.limit * policy.decrease_factor)
+            elif latency is not None:
+                state.samples += 1
+                if state.baseline_latency is None:
+                    state.baseline_latency = latency
+                else:
+                    state.baseline_latency += BASELINE_ALPHA * (latency - state.baseline_latency)
+                state.limit = min(policy.max_limit, state.limit + 1 / state.limit)
+            return state.limit, state.in_flight
+
+    def _state(self, provider: str, policy: LimitPolicy) -> _LimitState:
+        if provider not in self._states:
+            self._states[provider] = _LimitState(float(policy.initial_limit))
+        return self._states[provider]
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for one external provider, shared by every
+    worker process through the backend.
+
+    Each healthy response grows the limit by 1/limit (about +1 per round of
+    calls); a throttling error, timeout or latency spike cuts it by
+    ``decrease_factor``, at most once per observed round trip so a burst of
+    failures from the same window only counts once. Calls over the limit
+    poll for a free slot every PROVIDER_SLOT_POLL_INTERVAL seconds.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        backend=None,
+        initial_limit: int = settings.PROVIDER_INITIAL_CONCURRENCY,
+        min_limit: int = settings.PROVIDER_MIN_CONCURRENCY,
+        max_limit: int = 32,
+        latency_tolerance: float = settings.PROVIDER_LATENCY_TOLERANCE,
+        decrease_factor: float = settings.PROVIDER_DECREASE_FACTOR
+    ):
+        self.provider = provider
+        self.backend = backend or RedisConcurrencyBackend()
+        self.policy = LimitPolicy(
+            initial_limit, min_limit, max_limit, latency_tolerance, decrease_factor
+        )
+        # Last values seen in the backend
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one unit of concurrency for the duration of a provider call"""
+        lease_id = await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.release(lease_id, time.monotonic() - start, overloaded=is_overload_error(e))
+            raise
+        except BaseException:
+            # Cancellation says nothing about provider health
+            self.release(lease_id, None)
+            raise
+        else:
+            self.release(lease_id, time.monotonic() - start)
+
+    async def acquire(self) -> str:
+        """Wait for a slot and return the id of its lease"""
+        lease_id = uuid4().hex
+        while True:
+            granted, self.limit, self.in_flight = self.backend.try_acquire(
+                self.provider, lease_id, self.policy
+            )
+            self._publish()
+            if granted:
+                return lease_id
+            await asyncio.sleep(settings.PROVIDER_SLOT_POLL_INTERVAL)
+
+    def release(self, lease_id: str, latency: Optional[float], overloaded: bool = False):
+        """Return a slot and adjust the limit from the call's outcome"""
+        self.limit, self.in_flight = self.backend.release(
+            self.provider, lease_id, latency, overloaded, self.policy
+        )
+        self._publish()
+
+    def _publish(self):
+        PROVIDER_CONCURRENCY_LIMIT.labels(provider=self.provider).set(int(self.limit))
+        PROVIDER_IN_FLIGHT.labels(provider=self.provider).set(self.in_flight)
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+def get_limiter(provider: str) -> AdaptiveConcurrencyLimiter:
+    """Limiter for provider, using the configured backend"""
+    if provider not in _limiters:
+        backend = (
+            InMemoryConcurrencyBackend()
+            if settings.PROVIDER_CONCURRENCY_BACKEND == "memory" else None
+        )
+        _limiters[provider] = AdaptiveConcurrencyLimiter(
+            provider,
+            backend,
+            max_limit=settings.PROVIDER_MAX_CONCURRENCY.get(provider, 32)
+        )
+    return _limiters[provider]
\ No newline at end of file
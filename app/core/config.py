@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from functools import lru_cache
 
 class Settings(BaseSettings):
@@ -23,12 +23,38 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "postgres"
     POSTGRES_PORT: str = "5432"
     DATABASE_URL: Optional[str] = None
+    # URL of the API's async engine; defaults to DATABASE_URL on asyncpg
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Connection pool arguments per process role. The API's
+    # async engine uses "api"; the sync engine of Celery workers (and of the
+    # API's usage flushes) uses "worker". Every process holds up to
+    # pool_size + max_overflow connections, so size these against
+    # Postgres max_connections for the number of processes deployed.
+    DB_POOL_PROFILES: Dict[str, Dict[str, Any]] = {
+        # Requests wait briefly for a connection, then fail
+        "api": {
+            "pool_size": 10,
+            "max_overflow": 10,
+            "pool_timeout": 10,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True
+        },
+        # Worker processes run one task at a time
+        "worker": {
+            "pool_size": 2,
+            "max_overflow": 3,
+            "pool_timeout": 30,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True
+        }
+    }
 
     # Redis and Celery
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
     CELERY_BROKER_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
     CELERY_RESULT_BACKEND: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+    REDIS_URL: str = f"redis://{REDIS_HOST}:{REDIS_PORT}/1"
     
     # External APIs
     FIRECRAWL_API_KEY: str
@@ -39,10 +65,161 @@ class Settings(BaseSettings):
     CRAWLER_TIMEOUT: int = 300  # seconds
     MAX_PAGES_PER_DOMAIN: int = 100
     CACHE_EXPIRATION: int = 86400  # 24 hours
+    # Stages whose output stays fresh longer than CACHE_EXPIRATION (seconds)
+    CACHE_STAGE_TTLS: Dict[str, int] = {
+        "crawl_data": 604800,
+        "analyzed_data": 604800
+    }
+    CACHE_STALE_TTL: int = 518400  # seconds an expired entry is still served (6 days)
+    CACHE_REFRESH_LOCK_TTL: int = 1800  # seconds one background refresh may take
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024  # per-process research cache
+    CACHE_INVALIDATION_CHANNEL: str = "research:cache:invalidate"
+    # Company URL -> company id mappings kept per process
+    COMPANY_IDENTITY_CACHE_TTL: int = 300  # seconds
+    COMPANY_IDENTITY_CACHE_SIZE: int = 100000
+    # Homepage redirects that register a domain as another company's alias
+    COMPANY_REDIRECT_TIMEOUT: float = 5.0  # seconds per hop
+    COMPANY_REDIRECT_MAX_HOPS: int = 5
+    # Popular entries are refreshed shortly before they expire, while the
+    # batch lane is idle and within a daily budget of refreshes
+    CACHE_POPULARITY_HALF_LIFE: int = 86400  # seconds for a lookup's weight to halve
+    CACHE_POPULARITY_MIN_SCORE: float = 0.05  # companies below are forgotten
+    CACHE_WARM_INTERVAL: float = 300.0  # seconds between warming passes
+    CACHE_WARM_LEAD: int = 3600  # seconds before expiry an entry is refreshed
+    CACHE_WARM_TOP_N: int = 500  # hottest companies considered per pass
+    CACHE_WARM_DAILY_BUDGET: int = 200  # background refreshes per day
+    # Crawled pages are stored as zstd blobs, compressed with a dictionary
+    # retrained daily from a sample of stored pages
+    CRAWL_BLOB_LEVEL: int = 10
+    CRAWL_DICTIONARY_SIZE: int = 112640  # bytes
+    CRAWL_DICTIONARY_SAMPLES: int = 2000
+    CRAWL_DICTIONARY_MIN_SAMPLES: int = 100
+
+    # Retention. research_jobs and api_key_usage are partitioned by month;
+    # expired partitions are dropped, or moved to the archive schema if set.
+    RETENTION_DAYS: Dict[str, int] = {"research_jobs": 90, "api_key_usage": 30}
+    RETENTION_PARTITIONS_AHEAD: int = 3  # monthly partitions created in advance
+    RETENTION_ARCHIVE_SCHEMA: Optional[str] = None
+    RETENTION_BATCH_SIZE: int = 1000  # rows per delete
+    RETENTION_MAX_BATCHES: int = 100  # deletes per table per run
+    RETENTION_INTERVAL: float = 3600.0  # seconds between runs
+    RETENTION_BLOB_GRACE: int = 86400  # seconds before an unreferenced crawl blob is deleted
     MAX_RETRIES: int = 3
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_PERIOD: int = 3600  # 1 hour
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" or "memory"
+    USAGE_FLUSH_INTERVAL: float = 5.0  # seconds between batched usage writes
+    USAGE_MAX_BUFFER: int = 10000  # usage records held before dropping
+
+    # Per-domain scrape timeouts from each domain's latency profile.
+    # CRAWLER_TIMEOUT above is the ceiling.
+    CRAWL_TIMEOUT_FLOOR: int = 10  # seconds
+    CRAWL_TIMEOUT_MULTIPLIER: float = 1.5  # x estimated p95 latency
+    CRAWL_TIMEOUT_MIN_SAMPLES: int = 5  # scrapes before the profile is trusted
+    DOMAIN_LATENCY_ALPHA: float = 0.2  # EWMA weight of the newest scrape
+    DOMAIN_DEAD_AFTER_FAILURES: int = 5  # consecutive timeouts/connection errors
+    DOMAIN_DEAD_TTL: int = 3600  # seconds a dead domain is skipped
+    DOMAIN_PROFILE_TTL: int = 604800  # 7 days
+
+    # Adaptive concurrency for external providers, shared by all workers
+    PROVIDER_CONCURRENCY_BACKEND: str = "redis"  # "redis" or "memory"
+    PROVIDER_SLOT_TTL: int = 600  # seconds before a slot held by a dead worker is reclaimed
+    PROVIDER_SLOT_POLL_INTERVAL: float = 0.05  # seconds between attempts when at the limit
+    PROVIDER_INITIAL_CONCURRENCY: int = 4
+    PROVIDER_MIN_CONCURRENCY: int = 1
+    PROVIDER_MAX_CONCURRENCY: Dict[str, int] = {
+        "firecrawl": 20,
+        "gemini": 32,
+        "perplexity": 16
+    }
+    PROVIDER_LATENCY_TOLERANCE: float = 2.0  # x baseline latency counted as a spike
+    PROVIDER_DECREASE_FACTOR: float = 0.5
+
+    # Provider quotas shared by all workers. Buckets are "<provider>" or
+    # "<provider>:<model>"; capacity is the burst size, refill is per second.
+    PROVIDER_QUOTAS: Dict[str, Dict[str, float]] = {
+        "firecrawl": {"capacity": 500, "refill": 500 / 60},
+        "gemini": {"capacity": 60, "refill": 1.0},
+        "gemini:gemini-1.5-pro-latest": {"capacity": 30, "refill": 0.5},
+        "perplexity": {"capacity": 50, "refill": 50 / 60}
+    }
+    QUOTA_BACKEND: str = "redis"  # "redis" or "memory"
+    QUOTA_MAX_WAIT: float = 30.0  # seconds a call may queue for quota
+
+    # Provider call resilience (MAX_RETRIES above bounds the retries)
+    RETRY_BASE_DELAY: float = 0.5  # seconds, doubled per attempt with full jitter
+    RETRY_MAX_DELAY: float = 10.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures that open a circuit
+    CIRCUIT_RECOVERY_TIMEOUT: float = 30.0  # seconds before a probe call is allowed
+    HEDGE_ENABLED: bool = True
+    HEDGE_MIN_SAMPLES: int = 20  # latencies needed before hedging at p95
+
+    # Micro-batching of Gemini calls made concurrently by the batch runner's
+    # pipelines. Celery tasks run one pipeline per event loop, so they never
+    # batch. Adds up to the window in latency.
+    LLM_BATCH_ENABLED: bool = False
+    LLM_BATCH_WINDOW_MS: int = 50
+    LLM_BATCH_MAX_SIZE: int = 8
+    LLM_BATCH_MAX_CHARS: int = 400000  # combined prompt size, well inside the context window
+
+    # Research jobs
+    JOB_MAX_RETRIES: int = 2  # whole-job retries, resumed from checkpoints
+    JOB_RETRY_BACKOFF: int = 10  # seconds, doubled on each retry
+    CHECKPOINT_TTL: int = 86400  # seconds a saved stage output can be resumed from
+    SINGLE_FLIGHT_LEASE_TTL: int = 900  # seconds a leader job holds its lease
+    PROGRESS_TTL: int = 86400  # seconds job progress stays in Redis
+    PROGRESS_DB_FLUSH_INTERVAL: int = 30  # seconds between progress writes to Postgres
+
+    # Job completion notifications. Status requests may long-poll for up to
+    # LONG_POLL_MAX_WAIT seconds; jobs with a callback_url get a webhook.
+    LONG_POLL_MAX_WAIT: int = 60
+    WEBHOOK_SECRET: Optional[str] = None  # HMAC key of webhook signatures, else SECRET_KEY
+    WEBHOOK_BATCH_WINDOW: int = 2  # seconds events for one URL are collected into one POST
+    WEBHOOK_BATCH_SIZE: int = 50  # events per POST
+    WEBHOOK_TIMEOUT: float = 10.0
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_BACKOFF: int = 30  # seconds, doubled per attempt with full jitter
+    WEBHOOK_RETRY_MAX_DELAY: int = 3600
+
+    # Job deadlines. Each stage gets its share of the time left when it
+    # starts and degrades (fewer pages, fewer queries, faster model) to fit.
+    JOB_DEADLINES: Dict[str, int] = {"basic": 120, "deep": 600}  # depth -> seconds
+    JOB_MAX_DEADLINE: int = 3600
+    DEADLINE_STAGE_SHARES: Dict[str, float] = {
+        "crawling": 0.4,
+        "analyzing": 0.25,
+        "enriching": 0.2,
+        "synthesizing": 0.15
+    }
+    DEADLINE_SECONDS_PER_PAGE: float = 1.0  # crawl budget needed per page
+    DEADLINE_MIN_PAGES: int = 5
+    DEADLINE_SECONDS_PER_QUERY: float = 10.0  # enrichment budget needed per query
+    DEADLINE_FAST_MODEL_BELOW: float = 30.0  # seconds left before switching models
+    FAST_MODEL_NAME: str = "gemini-1.5-flash-latest"
+
+    # Progressive results: provisional snapshots served while a job runs
+    PROGRESSIVE_PREVIEW_TIMEOUT: int = 2  # seconds for the homepage-only preview
+    PROGRESSIVE_CONFIDENCE: Dict[str, float] = {
+        "preview": 0.1,  # homepage metadata only
+        "cached": 0.3,  # facts from an expired cache entry
+        "analyzing": 0.6,
+        "enriching": 0.8
+    }
+
+    # Scheduling
+    SCHEDULER_LANES: Dict[str, int] = {"interactive": 8, "batch": 4}  # lane -> worker slots
+    SCHEDULER_KEY_WEIGHTS: Dict[str, float] = {}  # API key -> fair share weight
+    SCHEDULER_DEFAULT_WEIGHT: float = 1.0
+    SCHEDULER_KEY_MAX_RUNNING: Dict[str, int] = {}  # API key -> concurrent jobs
+    SCHEDULER_DEFAULT_MAX_RUNNING: int = 4
+    SCHEDULER_SLOT_TTL: int = 1800  # seconds before an unreleased slot is reclaimed
+    SCHEDULER_SCAN_LIMIT: int = 200  # queued jobs inspected per dispatch
+    BATCH_MAX_REQUESTS: int = 10000
+    BATCH_ENQUEUE_SIZE: int = 500  # jobs handed to the scheduler per round trip
     
+    # Monitoring
+    WORKER_METRICS_PORT: Optional[int] = None
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -59,6 +236,11 @@ class Settings(BaseSettings):
                 f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
                 f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
             )
+        if not self.ASYNC_DATABASE_URL:
+            scheme, rest = self.DATABASE_URL.split("://", 1)
+            if scheme.split("+")[0] == "postgresql":
+                scheme = "postgresql+asyncpg"
+            self.ASYNC_DATABASE_URL = f"{scheme}://{rest}"
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,48 @@
+import time
+from typing import Type
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.monitoring import (
+    DB_POOL_CHECKOUT_LATENCY,
+    DB_POOL_CONNECTIONS_OPENED,
+    DB_POOL_IN_USE,
+    DB_POOL_OVERFLOW,
+    DB_POOL_TIMEOUTS
+)
+
+def instrumented_pool(pool_class: Type[QueuePool], name: str) -> Type[QueuePool]:
+    """
+    Subclass of pool_class that exports checkout waits, connections in use,
+    overflow, newly opened connections and checkout timeouts, labelled with
+    `name`. Being a class, it survives the pool being recreated on dispose.
+    """
+
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                record = super()._do_get()
+            except PoolTimeoutError:
+                DB_POOL_TIMEOUTS.labels(pool=name).inc()
+                raise
+            DB_POOL_CHECKOUT_LATENCY.labels(pool=name).observe(time.perf_counter() - start)
+            self._export_usage()
+            return record
+
+        def _do_return_conn(self, record):
+            super()._do_return_conn(record)
+            self._export_usage()
+
+        def _create_connection(self):
+            DB_POOL_CONNECTIONS_OPENED.labels(pool=name).inc()
+            return super()._create_connection()
+
+        def _export_usage(self):
+            DB_POOL_IN_USE.labels(pool=name).set(self.checkedout())
+            # overflow() counts up from -pool_size while the pool fills
+            DB_POOL_OVERFLOW.labels(pool=name).set(max(0, self.overflow()))
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
\ No newline at end of file
@@ -0,0 +1,55 @@
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+
+def deadline_seconds(depth: str, requested: Optional[int] = None) -> int:
+    """Deadline of a job: the client's value, else the default for its depth"""
+    seconds = requested or settings.JOB_DEADLINES.get(depth, settings.JOB_MAX_DEADLINE)
+    return min(seconds, settings.JOB_MAX_DEADLINE)
+
+class Deadline:
+    """
+    Wall-clock time budget of one research job.
+
+    The pipeline hands each stage a budget of its own via for_stage(), and
+    services call cut() whenever they drop work to stay within it. Cuts are
+    shared by the job and all of its stage budgets.
+    """
+
+    def __init__(
+        self,
+        expires_at: float,
+        stage: Optional[str] = None,
+        cuts: Optional[List[Dict[str, str]]] = None
+    ):
+        self.expires_at = expires_at
+        self.stage = stage
+        self.cuts = [] if cuts is None else cuts
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def for_stage(self, stage: str) -> "Deadline":
+        """
+        Budget for a stage: its share of the time left, weighed against the
+        shares of the stages still to run
+        """
+        shares = settings.DEADLINE_STAGE_SHARES
+        stages = list(shares)
+        upcoming = stages[stages.index(stage):]
+        share = shares[stage] / sum(shares[name] for name in upcoming)
+        return Deadline(time.time() + self.remaining() * share, stage, self.cuts)
+
+    def cut(self, detail: str):
+        """Record work dropped to meet the deadline"""
+        logger.info(f"Deadline cut in {self.stage}: {detail}")
+        self.cuts.append({"stage": self.stage, "detail": detail})
\ No newline at end of file
@@ -45,8 +45,25 @@ class CacheException(BaseAPIException):
 
 class RateLimitException(BaseAPIException):
     """Raised when rate limit is exceeded"""
-    def __init__(self):
+    def __init__(self, headers: Optional[Dict[str, Any]] = None):
         super().__init__(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded. Please try again later."
+            detail="Rate limit exceeded. Please try again later.",
+            headers=headers
+        )
+
+class QuotaExceededException(BaseAPIException):
+    """Raised when a provider quota stays exhausted for too long"""
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Quota error: {detail}"
+        )
+
+class ProviderUnavailableException(BaseAPIException):
+    """Raised when a provider's circuit breaker is open"""
+    def __init__(self, provider: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Provider unavailable: {provider} is failing, try again later"
         )
\ No newline at end of file
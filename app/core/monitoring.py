@@ -1,4 +1,7 @@
-from prometheus_client import Counter, Histogram, Gauge
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, Gauge, REGISTRY, multiprocess
+)
+import os
 import time
 from functools import wraps
 from typing import Callable, Optional
@@ -53,6 +56,155 @@ ANALYSIS_LATENCY = Histogram(
     'Analysis latency in seconds'
 )
 
+# Scheduling metrics
+QUEUE_WAIT = Histogram(
+    'research_queue_wait_seconds',
+    'Time research jobs wait between submission and start',
+    ['lane'],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800, 3600)
+)
+
+QUEUE_DEPTH = Gauge(
+    'research_queue_depth',
+    'Number of research jobs waiting in the scheduler',
+    ['lane'],
+    multiprocess_mode='mostrecent'
+)
+
+# External provider metrics
+PROVIDER_CONCURRENCY_LIMIT = Gauge(
+    'provider_concurrency_limit',
+    'Current adaptive concurrency limit for an external provider',
+    ['provider'],
+    multiprocess_mode='mostrecent'
+)
+
+# Shared by all workers, so the latest value seen by any process is the total
+PROVIDER_IN_FLIGHT = Gauge(
+    'provider_in_flight_requests',
+    'External provider calls currently in flight',
+    ['provider'],
+    multiprocess_mode='mostrecent'
+)
+
+PROVIDER_RETRIES = Counter(
+    'provider_retries_total',
+    'External provider calls retried after a transient failure',
+    ['provider']
+)
+
+PROVIDER_HEDGED_REQUESTS = Counter(
+    'provider_hedged_requests_total',
+    'Duplicate requests sent because a provider call exceeded its p95 latency',
+    ['provider']
+)
+
+PROVIDER_CIRCUIT_STATE = Gauge(
+    'provider_circuit_state',
+    'Circuit breaker state per provider (0 closed, 1 half-open, 2 open)',
+    ['provider'],
+    multiprocess_mode='max'
+)
+
+RESEARCH_CACHE_LOOKUPS = Counter(
+    'research_cache_lookups_total',
+    'Research cache reads by the tier that answered them',
+    ['tier']
+)
+
+CACHE_WARM_REFRESHES = Counter(
+    'research_cache_warm_refreshes_total',
+    'Popular cache entries refreshed ahead of expiry'
+)
+
+RETENTION_ROWS_PURGED = Counter(
+    'retention_rows_purged_total',
+    'Rows deleted by the retention task',
+    ['table']
+)
+
+RETENTION_PARTITIONS_DROPPED = Counter(
+    'retention_partitions_dropped_total',
+    'Expired monthly partitions dropped or archived by the retention task',
+    ['table']
+)
+
+RETENTION_LAST_RUN = Gauge(
+    'retention_last_run_timestamp_seconds',
+    'When the retention task last finished'
+)
+
+TABLE_SIZE_BYTES = Gauge(
+    'table_size_bytes',
+    'Total size of a table including partitions and indexes',
+    ['table']
+)
+
+CRAWL_BLOB_BYTES = Counter(
+    'crawl_blob_bytes_total',
+    'Bytes of crawled pages written to the blob store: raw, and stored after deduplication and compression',
+    ['kind']
+)
+
+LLM_BATCH_SIZE = Histogram(
+    'llm_batch_size',
+    'Number of prompts sent together in one micro-batched LLM call',
+    ['batcher'],
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+WEBHOOK_DELIVERIES = Counter(
+    'webhook_deliveries_total',
+    'Webhook POSTs of batched job completion events, by outcome',
+    ['outcome']
+)
+
+# Database connection pool metrics, labelled by pool profile
+DB_POOL_CHECKOUT_LATENCY = Histogram(
+    'db_pool_checkout_seconds',
+    'Time spent waiting for a database connection from the pool',
+    ['pool'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+DB_POOL_IN_USE = Gauge(
+    'db_pool_connections_in_use',
+    'Database connections currently checked out of the pool',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow_connections',
+    'Database connections open beyond the pool size',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+DB_POOL_CONNECTIONS_OPENED = Counter(
+    'db_pool_connections_opened_total',
+    'New database connections opened, including replacements of recycled ones',
+    ['pool']
+)
+
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total',
+    'Connection checkouts that gave up after waiting pool_timeout',
+    ['pool']
+)
+
+
+def get_metrics_registry() -> CollectorRegistry:
+    """
+    Registry to expose. In multiprocess mode (uvicorn/Celery with several
+    processes) it aggregates the metrics written by every process.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
 
 class MetricsLogger:
     """Handler for logging and tracking metrics"""
@@ -0,0 +1,81 @@
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+from app.core.concurrency import get_limiter
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.quota import get_quota_manager
+from app.core.resilience import (
+    get_breaker,
+    get_latency_tracker,
+    hedge,
+    retry_with_backoff
+)
+
+T = TypeVar("T")
+
+FIRECRAWL = "firecrawl"
+GEMINI = "gemini"
+PERPLEXITY = "perplexity"
+
+def gemini_model_for(
+    deadline: Optional[Deadline],
+    model_name: str,
+    model: Any,
+    fast_model: Any
+) -> Tuple[str, Any]:
+    """
+    Name and model to call Gemini with: the fast model when the stage budget
+    is short, recording the downgrade on the deadline
+    """
+    if deadline and deadline.remaining() < settings.DEADLINE_FAST_MODEL_BELOW:
+        deadline.cut(f"Used {settings.FAST_MODEL_NAME} instead of {model_name}")
+        return settings.FAST_MODEL_NAME, fast_model
+    return model_name, model
+
+async def call_provider(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    model: Optional[str] = None,
+    cost: float = 1.0,
+    cost_of: Optional[Callable[[T], float]] = None,
+    idempotent: bool = False
+) -> T:
+    """
+    Run one external API call. Every Firecrawl, Gemini and Perplexity request
+    goes through here. Each attempt fails fast while the provider's circuit
+    is open, reserves `cost` from the shared provider (and model) quota, and
+    runs under the provider's adaptive concurrency limit. Transient failures
+    are retried with jittered backoff up to MAX_RETRIES, and idempotent calls
+    are hedged with a duplicate once they run past the provider's p95.
+    When cost_of is given, quota the call did not use is refunded.
+
+    call must return an awaitable: use the SDK's async client, or wrap a
+    blocking SDK method in asyncio.to_thread.
+    """
+    breaker = get_breaker(provider)
+    latencies = get_latency_tracker(provider)
+
+    async def attempt() -> T:
+        breaker.before_call()
+        start = time.monotonic()
+        try:
+            async with get_quota_manager().reserve(provider, model, cost) as reservation:
+                async with get_limiter(provider).slot():
+                    result = await call()
+                if cost_of:
+                    reservation.settle(cost_of(result))
+        except BaseException as e:
+            # Cancelled attempts (lost hedges) only release the half-open probe
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        latencies.record(time.monotonic() - start)
+        return result
+
+    async def hedged_attempt() -> T:
+        if idempotent and settings.HEDGE_ENABLED:
+            return await hedge(provider, attempt, latencies.p95())
+        return await attempt()
+
+    return await retry_with_backoff(provider, hedged_attempt)
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import QuotaExceededException
+from app.core.redis import get_redis
+
+# (bucket name, capacity, refill per second)
+Bucket = Tuple[str, float, float]
+
+# Take `cost` tokens from every bucket or from none of them. Returns the
+# seconds to wait until all buckets could cover the cost, or 0 when granted.
+# A negative cost refunds tokens, capped at capacity.
+ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local refill = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / refill)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local refill = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key,
+        'tokens', tostring(math.min(capacity, levels[i] - cost)),
+        'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / refill) + 60)
+end
+return '0'
+"""
+
+class RedisQuotaBackend:
+    """Token buckets shared by every worker through Redis"""
+
+    def __init__(self, redis=None):
+        self.redis = redis or get_redis()
+        self._acquire = self.redis.register_script(ACQUIRE_SCRIPT)
+
+    def try_acquire(self, buckets: List[Bucket], cost: float) -> float:
+        args = [cost]
+        for _, capacity, refill in buckets:
+            args.extend([capacity, refill])
+        wait = self._acquire(
+            keys=[f"research:quota:{name}" for name, _, _ in buckets],
+            args=args
+        )
+        return float(wait)
+
+class InMemoryQuotaBackend:
+    """Process-local token buckets, for tests and single-process runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Dict[str, Tuple[float, float]] = {}
+
+    def try_acquire(self, buckets: List[Bucket], cost: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            levels = []
+            wait = 0.0
+            for name, capacity, refill in buckets:
+                tokens, ts = self._state.get(name, (capacity, now))
+                tokens = min(capacity, tokens + max(0.0, now - ts) * refill)
+                levels.append(tokens)
+                if tokens < cost:
+                    wait = max(wait, (cost - tokens) / refill)
+            if wait > 0:
+                return wait
+            for (name, capacity, _), tokens in zip(buckets, levels):
+                self._state[name] = (min(capacity, tokens - cost), now)
+            return 0.0
+
+class Reservation:
+    """Quota taken ahead of a provider call; surplus can be handed back"""
+
+    def __init__(self, backend, buckets: List[Bucket], cost: float):
+        self.backend = backend
+        self.buckets = buckets
+        self.cost = cost
+
+    def refund(self, amount: Optional[float] = None):
+        """Return unused quota (all of it by default)"""
+        amount = self.cost if amount is None else min(amount, self.cost)
+        if amount > 0 and self.buckets:
+            self.backend.try_acquire(self.buckets, -amount)
+            self.cost -= amount
+
+    def settle(self, actual_cost: float):
+        """Refund the difference once the real cost of the call is known"""
+        self.refund(self.cost - actual_cost)
+
+class QuotaManager:
+    """
+    Distributed provider quotas. Calls reserve their expected cost from the
+    provider bucket and, if configured, the provider:model bucket before
+    running, and queue briefly instead of failing when quota is exhausted.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        quotas: Optional[Dict[str, Dict[str, float]]] = None,
+        max_wait: float = settings.QUOTA_MAX_WAIT
+    ):
+        self.backend = backend or RedisQuotaBackend()
+        self.quotas = settings.PROVIDER_QUOTAS if quotas is None else quotas
+        self.max_wait = max_wait
+
+    def buckets_for(self, provider: str, model: Optional[str] = None) -> List[Bucket]:
+        names = [provider] + ([f"{provider}:{model}"] if model else [])
+        return [
+            (name, self.quotas[name]["capacity"], self.quotas[name]["refill"])
+            for name in names
+            if name in self.quotas
+        ]
+
+    async def acquire(
+        self,
+        provider: str,
+        model: Optional[str] = None,
+        cost: float = 1.0
+    ) -> Reservation:
+        buckets = self.buckets_for(provider, model)
+        if not buckets:
+            return Reservation(self.backend, buckets, cost)
+
+        if any(cost > capacity for _, capacity, _ in buckets):
+            raise QuotaExceededException(
+                f"{provider} call costing {cost} exceeds bucket capacity"
+            )
+
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = self.backend.try_acquire(buckets, cost)
+            if wait <= 0:
+                return Reservation(self.backend, buckets, cost)
+            if time.monotonic() + wait > deadline:
+                raise QuotaExceededException(f"{provider} quota exhausted")
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def reserve(
+        self,
+        provider: str,
+        model: Optional[str] = None,
+        cost: float = 1.0
+    ):
+        """Hold a reservation for a call; it is refunded if the call is cancelled"""
+        reservation = await self.acquire(provider, model, cost)
+        try:
+            yield reservation
+        except asyncio.CancelledError:
+            reservation.refund()
+            raise
+
+@lru_cache
+def get_quota_manager() -> QuotaManager:
+    """Process-wide quota manager using the configured backend"""
+    if settings.QUOTA_BACKEND == "memory":
+        return QuotaManager(backend=InMemoryQuotaBackend())
+    return QuotaManager()
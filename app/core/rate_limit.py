@@ -0,0 +1,126 @@
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, NamedTuple, Tuple
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import get_async_redis
+
+# Generic cell rate algorithm: each key stores its theoretical arrival time
+# (TAT). A request is allowed unless it would push the TAT more than one
+# period past now. Returns {allowed, retry after, backlog}, where backlog is
+# how far the TAT runs ahead of now once the request is counted.
+GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local period = tonumber(ARGV[1])
+local interval = period / tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or '0'), now)
+local new_tat = tat + interval
+if new_tat - period > now then
+    return {0, tostring(new_tat - period - now), tostring(tat - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0', tostring(new_tat - now)}
+"""
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the full limit is available again
+    reset_after: float
+    # Seconds until a rejected request would be allowed
+    retry_after: float
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after))
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(math.ceil(self.retry_after))
+        return headers
+
+class RedisRateLimitBackend:
+    """GCRA state shared by every API process through Redis"""
+
+    def __init__(self, redis=None):
+        # Checked on every request, so never block the event loop on it
+        self.redis = redis or get_async_redis()
+        self._check = self.redis.register_script(GCRA_SCRIPT)
+
+    async def check(self, key: str, limit: int, period: float) -> Tuple[bool, float, float]:
+        allowed, retry_after, backlog = await self._check(
+            keys=[f"research:ratelimit:{key}"], args=[period, limit]
+        )
+        return bool(int(allowed)), float(retry_after), float(backlog)
+
+class InMemoryRateLimitBackend:
+    """Process-local GCRA state, for tests and as a fallback when Redis is down"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tats: Dict[str, float] = {}
+
+    async def check(self, key: str, limit: int, period: float) -> Tuple[bool, float, float]:
+        interval = period / limit
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tats.get(key, 0.0), now)
+            new_tat = tat + interval
+            if new_tat - period > now:
+                return False, new_tat - period - now, tat - now
+            self._tats[key] = new_tat
+            return True, 0.0, new_tat - now
+
+class RateLimiter:
+    """
+    Per-key request limits: `limit` requests per `period` seconds, with
+    bursts of up to `limit`. Each check is one atomic Redis call; while
+    Redis is unreachable each process enforces the limit on its own.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        fallback=None,
+        limit: int = settings.RATE_LIMIT_REQUESTS,
+        period: float = settings.RATE_LIMIT_PERIOD
+    ):
+        self.backend = backend or RedisRateLimitBackend()
+        self.fallback = fallback or InMemoryRateLimitBackend()
+        self.limit = limit
+        self.period = period
+
+    async def check(self, key: str) -> RateLimitResult:
+        try:
+            allowed, retry_after, backlog = await self.backend.check(
+                key, self.limit, self.period
+            )
+        except RedisError as e:
+            logger.warning(f"Rate limiter falling back to local state: {str(e)}")
+            allowed, retry_after, backlog = await self.fallback.check(
+                key, self.limit, self.period
+            )
+
+        interval = self.period / self.limit
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.limit,
+            remaining=max(0, int((self.period - backlog) / interval)),
+            reset_after=backlog,
+            retry_after=retry_after
+        )
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter using the configured backend"""
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return RateLimiter(backend=InMemoryRateLimitBackend())
+    return RateLimiter()
\ No newline at end of file
@@ -0,0 +1,16 @@
+from functools import lru_cache
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from app.core.config import settings
+
+@lru_cache
+def get_redis() -> Redis:
+    """Shared Redis client for application state (not the Celery broker)"""
+    return Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+@lru_cache
+def get_async_redis() -> AsyncRedis:
+    """Async client for waiting on Redis from the API's event loop"""
+    return AsyncRedis.from_url(settings.REDIS_URL, decode_responses=True)
\ No newline at end of file
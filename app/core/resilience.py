@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from app.core.concurrency import is_overload_error
+from app.core.config import settings
+from app.core.exceptions import BaseAPIException, ProviderUnavailableException
+from app.core.logging import logger
+from app.core.monitoring import (
+    PROVIDER_CIRCUIT_STATE,
+    PROVIDER_HEDGED_REQUESTS,
+    PROVIDER_RETRIES
+)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Latency samples kept per provider for the hedging delay
+LATENCY_WINDOW = 200
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a provider error is worth retrying (throttling, timeouts, 5xx)"""
+    if isinstance(error, BaseAPIException):
+        # Our own fail-fast errors (open circuit, exhausted quota)
+        return False
+    if is_overload_error(error) or isinstance(error, ConnectionError):
+        return True
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and 500 <= value < 600:
+            return True
+    name = type(error).__name__
+    return any(
+        marker in name
+        for marker in ("Connection", "ServiceUnavailable", "InternalServerError",
+                       "DeadlineExceeded")
+    )
+
+class CircuitBreaker:
+    """
+    Fails calls fast while a provider is down. After `failure_threshold`
+    consecutive transient failures the circuit opens; once
+    `recovery_timeout` has passed a single probe call is let through and
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout: float = settings.CIRCUIT_RECOVERY_TIMEOUT
+    ):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        """Raise ProviderUnavailableException if the call must not be attempted"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                raise ProviderUnavailableException(self.provider)
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                raise ProviderUnavailableException(self.provider)
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.failures = 0
+        self._set_state(CLOSED)
+
+    def record_failure(self, error: BaseException):
+        self._probe_in_flight = False
+        if not is_transient_error(error):
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"Circuit opened for {self.provider}: {str(error)}")
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        PROVIDER_CIRCUIT_STATE.labels(provider=self.provider).set(
+            CIRCUIT_STATE_VALUES[state]
+        )
+
+class LatencyTracker:
+    """Recent successful call latencies of one provider"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float):
+        self.samples.append(latency)
+
+    def p95(self) -> Optional[float]:
+        if len(self.samples) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+async def retry_with_backoff(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    max_retries: int = settings.MAX_RETRIES
+) -> T:
+    """Retry transient failures with full-jitter exponential backoff"""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= max_retries or not is_transient_error(e):
+                raise
+            delay = random.uniform(
+                0, min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * 2 ** attempt)
+            )
+            logger.warning(
+                f"{provider} call failed ({str(e)}), retrying in {delay:.2f}s"
+            )
+            PROVIDER_RETRIES.labels(provider=provider).inc()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+async def hedge(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    delay: Optional[float]
+) -> T:
+    """
+    Run call; if it has not finished after `delay` seconds, start a duplicate
+    and return whichever succeeds first. Only safe for idempotent calls.
+    """
+    if delay is None:
+        return await call()
+
+    pending = {asyncio.ensure_future(call())}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return done.pop().result()
+
+        PROVIDER_HEDGED_REQUESTS.labels(provider=provider).inc()
+        pending.add(asyncio.ensure_future(call()))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(provider)
+    return _breakers[provider]
+
+def get_latency_tracker(provider: str) -> LatencyTracker:
+    if provider not in _latencies:
+        _latencies[provider] = LatencyTracker()
+    return _latencies[provider]
@@ -1,8 +1,57 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, ValidationError, HttpUrl
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
+import ipaddress
 import re
 import html
+import socket
+
+
+class UnsafeURLError(ValueError):
+    """A URL whose host is, or resolves to, an address that is not public"""
+
+
+def is_public_address(address: str) -> bool:
+    """Whether an IP address is globally routable, so not private, loopback,
+    link-local (cloud metadata lives at 169.254.169.254), reserved or
+    multicast"""
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_url_host(url: str):
+    """Reject URLs whose host is a non-public IP literal or localhost,
+    without resolving names"""
+    host = (urlparse(url).hostname or "").rstrip(".")
+    if not host or host == "localhost" or host.endswith(".localhost"):
+        raise UnsafeURLError(f"{url} does not point at a public host")
+    try:
+        public = is_public_address(host)
+    except ValueError:
+        return  # a name, checked when it is resolved
+    if not public:
+        raise UnsafeURLError(f"{url} points at a non-public address")
+
+
+def resolve_public_url(url: str) -> List[str]:
+    """
+    Resolve a URL's host and return its addresses, raising UnsafeURLError
+    unless every one of them is public. Blocks on DNS; call it off the
+    event loop.
+    """
+    check_url_host(url)
+    parsed = urlparse(url)
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or 443, proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e:
+        raise UnsafeURLError(f"{parsed.hostname} does not resolve: {e}")
+    addresses = sorted({info[4][0] for info in infos})
+    unsafe = [address for address in addresses if not is_public_address(address)]
+    if not addresses or unsafe:
+        raise UnsafeURLError(f"{parsed.hostname} resolves to non-public addresses {unsafe}")
+    return addresses
 
 
 class DataValidator:
@@ -22,7 +71,11 @@ class DataValidator:
         try:
             parsed = urlparse(url)
             if all([parsed.scheme, parsed.netloc]):
-                return url.lower()
+                # Paths and queries are case-sensitive
+                return urlunparse(parsed._replace(
+                    scheme=parsed.scheme.lower(),
+                    netloc=parsed.netloc.lower()
+                ))
         except Exception:
             return None
         return None
@@ -1,12 +1,16 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import time
 
 from app.core.config import settings
 from app.core.logging import setup_logging, logger
 from app.api.v1.router import api_router
 from app.core.exceptions import BaseAPIException
+from app.core.monitoring import get_metrics_registry
+from app.services.progress import completion_listener
+from app.services.usage import usage_recorder
 
 def create_application() -> FastAPI:
     """Create and configure FastAPI application"""
@@ -46,21 +50,34 @@ def create_application() -> FastAPI:
     async def api_exception_handler(request: Request, exc: BaseAPIException):
         return JSONResponse(
             status_code=exc.status_code,
-            content={"detail": exc.detail}
+            content={"detail": exc.detail},
+            headers=exc.headers
         )
 
     # Include API router
     app.include_router(api_router, prefix=settings.API_V1_STR)
 
+    # Prometheus metrics
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(
+            generate_latest(get_metrics_registry()),
+            media_type=CONTENT_TYPE_LATEST
+        )
+
     # Startup event
     @app.on_event("startup")
     async def startup_event():
         logger.info("Starting up Sales Research API")
+        usage_recorder.start()
+        await completion_listener.start()
 
     # Shutdown event
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Shutting down Sales Research API")
+        await usage_recorder.stop()
+        await completion_listener.stop()
 
     return app
 
@@ -1,19 +1,37 @@
+from typing import AsyncIterator
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.db_pool import instrumented_pool
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Celery workers and background threads use blocking sessions
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=instrumented_pool(QueuePool, "worker"),
+    **settings.DB_POOL_PROFILES["worker"]
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# API endpoints run on the event loop, so they use the async engine
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool, "api"),
+    **settings.DB_POOL_PROFILES["api"]
+)
+# Rows stay readable after commit without another round trip
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -1,17 +1,28 @@
-from sqlalchemy import Column, String, JSON, DateTime, Float, Integer
+from sqlalchemy import Column, String, JSON, DateTime, Float, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.models.database import Base
 
+CACHE_JSON = JSON().with_variant(JSONB(), "postgresql")
+
 class ResearchJob(Base):
     __tablename__ = "research_jobs"
 
     id = Column(String, primary_key=True)
     company_url = Column(String, index=True)
+    batch_id = Column(String, index=True, nullable=True)
+    company_id = Column(String, index=True, nullable=True)
+    # Job whose run completes this one, when it was coalesced onto another
+    leader_job_id = Column(String, index=True, nullable=True)
+    # Where the finished job is announced by webhook, if anywhere
+    callback_url = Column(String, nullable=True)
     status = Column(String)
     progress = Column(Float)
     result = Column(JSON, nullable=True)
+    result_metadata = Column(JSON, nullable=True)
     error = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key, so part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Cache control
@@ -22,9 +33,66 @@ class ResearchCache(Base):
     __tablename__ = "research_cache"
 
     company_url = Column(String, primary_key=True)
-    crawl_data = Column(JSON)
-    analyzed_data = Column(JSON)
-    enriched_data = Column(JSON)
+    # JSONB in Postgres, as created by the initial migration
+    crawl_data = Column(CACHE_JSON)
+    analyzed_data = Column(CACHE_JSON)
+    enriched_data = Column(CACHE_JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    cache_valid_until = Column(DateTime(timezone=True))
\ No newline at end of file
+    # Earliest of the per-stage validity windows below
+    cache_valid_until = Column(DateTime(timezone=True))
+    crawl_valid_until = Column(DateTime(timezone=True))
+    analyzed_valid_until = Column(DateTime(timezone=True))
+    enriched_valid_until = Column(DateTime(timezone=True))
+    # Past cache_valid_until the entry is served stale and refreshed in the
+    # background until this time
+    stale_until = Column(DateTime(timezone=True))
+    version = Column(Integer, default=1, nullable=False)
+
+class APIKeyUsage(Base):
+    __tablename__ = "api_key_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    api_key = Column(String, index=True)
+    endpoint = Column(String)
+    # Partition key, so part of the primary key
+    timestamp = Column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True
+    )
+    response_time = Column(Float, nullable=True)
+    status_code = Column(Integer, nullable=True)
+
+class ResearchCheckpoint(Base):
+    __tablename__ = "research_checkpoints"
+
+    job_id = Column(String, primary_key=True)
+    stage = Column(String, primary_key=True)
+    input_hash = Column(String)
+    output = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# One crawled page, stored once however many crawls contain it
+class CrawlBlob(Base):
+    __tablename__ = "crawl_blobs"
+
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the page
+    dictionary_id = Column(Integer, nullable=True)
+    data = Column(LargeBinary, nullable=False)  # zstd-compressed page
+    size = Column(Integer, nullable=False)  # uncompressed bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+# zstd dictionary trained on crawled pages; kept as long as blobs use it
+class CrawlDictionary(Base):
+    __tablename__ = "crawl_dictionaries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Domains that belong to another company, e.g. aliases and redirects
+class CompanyIdentity(Base):
+    __tablename__ = "company_identities"
+
+    domain = Column(String, primary_key=True)
+    company_id = Column(String, index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
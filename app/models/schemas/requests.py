@@ -3,6 +3,9 @@ from pydantic import BaseModel, HttpUrl, Field, validator
 from typing import List, Optional
 from enum import Enum
 
+from app.core.config import settings
+from app.core.validation import check_url_host
+
 class ResearchDepth(str, Enum):
     BASIC = "basic"
     DEEP = "deep"
@@ -37,6 +40,27 @@ class ResearchRequest(BaseModel):
         default=False,
         description="Force new research even if cached data exists"
     )
+    deadline_seconds: Optional[int] = Field(
+        default=None,
+        gt=0,
+        le=settings.JOB_MAX_DEADLINE,
+        description="Seconds until the result is needed; defaults by depth"
+    )
+    progressive: bool = Field(
+        default=False,
+        description="Serve a provisional result, upgraded as research progresses"
+    )
+    callback_url: Optional[HttpUrl] = Field(
+        default=None,
+        description="URL the finished job is POSTed to, signed with HMAC-SHA256"
+    )
+
+    @validator("callback_url")
+    def callback_url_is_public(cls, v):
+        # Names are resolved and checked by the endpoint and before each POST
+        if v is not None:
+            check_url_host(str(v))
+        return v
 
     class Config:
         json_schema_extra = {
@@ -45,6 +69,26 @@ class ResearchRequest(BaseModel):
                 "depth": "deep",
                 "focus_areas": ["tech_stack", "decision_makers"],
                 "output_format": "json",
-                "force_refresh": False
+                "force_refresh": False,
+                "deadline_seconds": 300,
+                "progressive": False,
+                "callback_url": "https://example.com/hooks/research"
+            }
+        }
+
+class BatchResearchRequest(BaseModel):
+    requests: List[ResearchRequest] = Field(
+        min_length=1,
+        max_length=settings.BATCH_MAX_REQUESTS,
+        description="Research requests to run as one batch"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "requests": [
+                    {"company_url": "https://example.com", "depth": "basic"},
+                    {"company_url": "https://example.org", "depth": "deep"}
+                ]
             }
         }
\ No newline at end of file
@@ -1,6 +1,6 @@
 # app/models/schemas/responses.py
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -24,9 +24,21 @@ class ResearchJobStatus(BaseModel):
 
 class CompanyResearchResponse(BaseModel):
     company_intel: Dict
-    metadata: Dict[str, any] = {
+    metadata: Dict[str, Any] = {
         "source": "sales_research_api",
         "generated_at": datetime.now(),
         "confidence_score": 0.0,
         "data_freshness": "real-time"
-    }
\ No newline at end of file
+    }
+
+class BatchResearchResponse(BaseModel):
+    batch_id: str
+    job_ids: List[str]
+
+class BatchResearchStatus(BaseModel):
+    batch_id: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    progress: float = 0.0
+    status_counts: Dict[str, int] = {}
\ No newline at end of file
@@ -1,35 +1,49 @@
+import asyncio
+import json
 import google.generativeai as genai
 import typing
 from typing import List, Dict, Optional
 
 from fastapi import HTTPException
 
+from app.core.batching import BatcherPool, combine_prompts
 from app.core.config import settings
+from app.core.deadline import Deadline
 from app.core.logging import logger
+from app.core.providers import GEMINI, call_provider, gemini_model_for
 from app.models.domain.company import CompanyIntel
 
 class AnalyzerService:
-    def __init__(self):
+    def __init__(self, batch: bool = False):
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-1.5-pro-latest")
+        self.model_name = "gemini-1.5-pro-latest"
+        self.model = genai.GenerativeModel(self.model_name)
+        self.fast_model = genai.GenerativeModel(settings.FAST_MODEL_NAME)
+        # Only worth it when many pipelines share this instance and its loop
+        self.batchers = BatcherPool() if batch else None
 
-    async def analyze_content(self, crawled_data: Dict[str, str]) -> CompanyIntel:
+    async def analyze_content(
+        self,
+        crawled_data: Dict[str, str],
+        deadline: Optional[Deadline] = None
+    ) -> CompanyIntel:
         """
         Analyze crawled website content using Gemini to extract structured information.
         """
         # Prepare prompt with our schema
         prompt = self._build_analysis_prompt(crawled_data)
+        model_name, model = gemini_model_for(
+            deadline, self.model_name, self.model, self.fast_model
+        )
         
         try:
-            result = await self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json",
-                    response_schema=CompanyIntel
+            if self.batchers:
+                batcher = self.batchers.get(
+                    f"analyze:{model_name}",
+                    lambda prompts: self._analyze_many(model_name, model, prompts)
                 )
-            )
-            
-            return result.json()
+                return await batcher.submit(prompt)
+            return await self._analyze_one(model_name, model, prompt)
 
         except Exception as e:
             logger.error(f"Gemini analysis failed: {str(e)}")
@@ -38,6 +52,58 @@ class AnalyzerService:
                 detail=f"Content analysis failed: {str(e)}"
             )
 
+    async def _analyze_one(self, model_name: str, model, prompt: str) -> Dict:
+        result = await call_provider(
+            GEMINI,
+            lambda: model.generate_content_async(
+                prompt,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=CompanyIntel
+                )
+            ),
+            model=model_name,
+            idempotent=True
+        )
+        
+        return json.loads(result.text)
+
+    async def _analyze_many(
+        self,
+        model_name: str,
+        model,
+        prompts: List[str]
+    ) -> List[Dict]:
+        """
+        Answer several analysis prompts with a single Gemini call, falling
+        back to one call per prompt if the batched answer is malformed
+        """
+        if len(prompts) == 1:
+            return [await self._analyze_one(model_name, model, prompts[0])]
+
+        result = await call_provider(
+            GEMINI,
+            lambda: model.generate_content_async(
+                combine_prompts(prompts),
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=List[CompanyIntel]
+                )
+            ),
+            model=model_name,
+            idempotent=True
+        )
+        try:
+            answers = json.loads(result.text)
+        except ValueError:
+            answers = None
+        if not isinstance(answers, list) or len(answers) != len(prompts):
+            logger.warning("Batched analysis returned malformed output, retrying one by one")
+            return list(await asyncio.gather(
+                *(self._analyze_one(model_name, model, prompt) for prompt in prompts)
+            ))
+        return answers
+
     def _build_analysis_prompt(self, crawled_data: Dict[str, str]) -> str:
         """
         Build a detailed prompt for Gemini to analyze website content.
@@ -0,0 +1,69 @@
+import time
+from datetime import datetime
+from typing import List
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import CACHE_WARM_REFRESHES
+from app.core.redis import get_redis
+from app.services.research_cache import ResearchCacheStore
+from app.services.scheduler import FairScheduler
+
+POPULARITY_KEY = "research:cache:popularity"
+DECAYED_AT_KEY = "research:cache:popularity:decayed_at"
+
+class CacheWarmer:
+    """
+    Keeps popular companies cached. Every cache lookup bumps the company's
+    popularity score, and scores decay with CACHE_POPULARITY_HALF_LIFE.
+    Each warming pass refreshes the hottest entries that are about to
+    expire, only while the batch lane has idle slots and within
+    CACHE_WARM_DAILY_BUDGET refreshes a day.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or get_redis()
+
+    def record_access(self, company_url: str):
+        self.redis.zincrby(POPULARITY_KEY, 1, company_url)
+
+    def decay(self):
+        """Scale every score down by the time elapsed since the last decay"""
+        now = time.time()
+        decayed_at = float(self.redis.get(DECAYED_AT_KEY) or now)
+        factor = 0.5 ** ((now - decayed_at) / settings.CACHE_POPULARITY_HALF_LIFE)
+        pipe = self.redis.pipeline()
+        pipe.zunionstore(POPULARITY_KEY, {POPULARITY_KEY: factor})
+        pipe.zremrangebyscore(POPULARITY_KEY, "-inf", settings.CACHE_POPULARITY_MIN_SCORE)
+        pipe.set(DECAYED_AT_KEY, now)
+        pipe.execute()
+
+    def warm(self, cache: ResearchCacheStore) -> List[str]:
+        """Refresh popular entries expiring within CACHE_WARM_LEAD; returns their URLs"""
+        self.decay()
+        budget_key = f"research:cache:warm:{datetime.utcnow():%Y-%m-%d}"
+        remaining = min(
+            FairScheduler(self.redis).idle_slots("batch"),
+            settings.CACHE_WARM_DAILY_BUDGET - int(self.redis.get(budget_key) or 0)
+        )
+
+        refreshed = []
+        expiring_by = time.time() + settings.CACHE_WARM_LEAD
+        for company_url in self.redis.zrevrange(POPULARITY_KEY, 0, settings.CACHE_WARM_TOP_N - 1):
+            if len(refreshed) >= remaining:
+                break
+            validity = cache.stage_validity(company_url)
+            # Uncached companies are left to the next request for them
+            if not validity or min(validity.values()) > expiring_by:
+                continue
+            if cache.request_refresh(company_url, ahead=settings.CACHE_WARM_LEAD):
+                refreshed.append(company_url)
+
+        if refreshed:
+            pipe = self.redis.pipeline()
+            pipe.incrby(budget_key, len(refreshed))
+            pipe.expire(budget_key, 2 * 86400)
+            pipe.execute()
+            CACHE_WARM_REFRESHES.inc(len(refreshed))
+            logger.info(f"Refreshing {len(refreshed)} popular cache entries ahead of expiry")
+        return refreshed
\ No newline at end of file
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.domain.database_models import ResearchCheckpoint
+
+class CheckpointStore:
+    """Persists stage outputs of a research job so retries can resume"""
+
+    def __init__(self, db: Session, job_id: str):
+        self.db = db
+        self.job_id = job_id
+
+    def load(self, stage: str, input_hash: str) -> Optional[Any]:
+        """
+        Return the saved output of stage if it was produced from the same
+        input within CHECKPOINT_TTL
+        """
+        checkpoint = self.db.query(ResearchCheckpoint).filter(
+            ResearchCheckpoint.job_id == self.job_id,
+            ResearchCheckpoint.stage == stage,
+            ResearchCheckpoint.input_hash == input_hash,
+            ResearchCheckpoint.created_at
+            > datetime.utcnow() - timedelta(seconds=settings.CHECKPOINT_TTL)
+        ).first()
+        return checkpoint.output if checkpoint else None
+
+    def save(self, stage: str, input_hash: str, output: Any):
+        """Record the output of a completed stage"""
+        self.db.merge(ResearchCheckpoint(
+            job_id=self.job_id,
+            stage=stage,
+            input_hash=input_hash,
+            output=output,
+            # Saving over an older checkpoint restarts its TTL
+            created_at=datetime.utcnow()
+        ))
+        self.db.commit()
+
+    def clear(self):
+        """Drop all checkpoints once the job no longer needs them"""
+        self.db.query(ResearchCheckpoint).filter(
+            ResearchCheckpoint.job_id == self.job_id
+        ).delete(synchronize_session=False)
+        self.db.commit()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+from app.services.domain_profiles import domain_of
+
+# Either take the lease (we become the leader) or, while the lease is held,
+# register as a follower of the current leader. Doing both in one script means
+# a follower can never attach after the leader has collected its followers.
+JOIN_SCRIPT = """
+local leader = redis.call('GET', KEYS[1])
+if leader then
+    redis.call('SADD', KEYS[2], ARGV[1])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    return leader
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return false
+"""
+
+# Drop the lease and hand back every follower, but only if we still own it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return {}
+end
+redis.call('DEL', KEYS[1])
+local followers = redis.call('SMEMBERS', KEYS[2])
+redis.call('DEL', KEYS[2])
+return followers
+"""
+
+HEARTBEAT_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+def canonical_company_url(company_url: str) -> str:
+    """
+    Normalize scheme, host and www prefix of a company URL, dropping the
+    path; see CompanyIdentityResolver for aliases and redirects
+    """
+    return f"https://{domain_of(company_url.strip())}"
+
+def coalescing_key(
+    company_url: str,
+    depth: str,
+    focus_areas: List[str],
+    output_format: str,
+    force_refresh: bool = False,
+    progressive: bool = False
+) -> str:
+    """Key identifying research requests that produce the same result"""
+    shape = json.dumps({
+        "company": canonical_company_url(company_url),
+        "depth": depth,
+        "focus_areas": sorted(focus_areas or []),
+        "output_format": output_format,
+        "force_refresh": force_refresh,
+        "progressive": progressive
+    }, sort_keys=True)
+    return hashlib.sha256(shape.encode("utf-8")).hexdigest()
+
+def lease_keys(key: str) -> List[str]:
+    """The lease and follower set keys of a coalescing key"""
+    return [f"research:inflight:{key}", f"research:followers:{key}"]
+
+class JobCoalescer:
+    """
+    Single-flight deduplication of research jobs across API and worker processes.
+
+    The first job for a key takes a Redis lease and runs the pipeline. Jobs
+    submitted while the lease is held attach as followers and are completed
+    with the leader's outcome instead of being enqueued themselves. Leases
+    are extended while the leader waits in the scheduler and while it runs;
+    followers also record their leader on their row, so they are completed
+    even if the follower set is lost.
+    """
+
+    def __init__(self, redis=None, lease_ttl: int = settings.SINGLE_FLIGHT_LEASE_TTL):
+        self.redis = redis or get_redis()
+        self.lease_ttl = lease_ttl
+        self._join = self.redis.register_script(JOIN_SCRIPT)
+        self._release = self.redis.register_script(RELEASE_SCRIPT)
+        self._heartbeat = self.redis.register_script(HEARTBEAT_SCRIPT)
+
+    def join(self, key: str, job_id: str) -> Optional[str]:
+        """
+        Attach job_id to the in-flight execution for key.
+        Returns the leader's job id, or None if job_id became the leader.
+        """
+        leader = self._join(
+            keys=lease_keys(key),
+            args=[job_id, self.lease_ttl]
+        )
+        return leader or None
+
+    def join_many(self, entries: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """join() for many (key, job_id) pairs in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for key, job_id in entries:
+            self._join(keys=lease_keys(key), args=[job_id, self.lease_ttl], client=pipe)
+        return [leader or None for leader in pipe.execute()]
+
+    def followers(self, key: str) -> List[str]:
+        """Job ids currently attached to the leader for key"""
+        return list(self.redis.smembers(lease_keys(key)[1]))
+
+    def heartbeat(self, key: str, job_id: str) -> bool:
+        """Extend the leader's lease while the pipeline is still making progress"""
+        return bool(self._heartbeat(
+            keys=lease_keys(key),
+            args=[job_id, self.lease_ttl]
+        ))
+
+    def heartbeat_many(self, entries: List[Tuple[str, str]]) -> int:
+        """heartbeat() for many (key, job_id) pairs in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for key, job_id in entries:
+            self._heartbeat(keys=lease_keys(key), args=[job_id, self.lease_ttl], client=pipe)
+        return sum(pipe.execute())
+
+    def release(self, key: str, job_id: str) -> List[str]:
+        """Release the lease held by job_id and return its followers"""
+        return list(self._release(keys=lease_keys(key), args=[job_id]))
+
+class AsyncJobCoalescer:
+    """
+    Joining side of single-flight, used by the submit endpoints: a request
+    either takes the lease or becomes a follower of the job holding it.
+    Heartbeats and release stay with the leader's worker, which uses
+    JobCoalescer on the same keys.
+    """
+
+    def __init__(self, redis=None, lease_ttl: int = settings.SINGLE_FLIGHT_LEASE_TTL):
+        self.redis = redis or get_async_redis()
+        self.lease_ttl = lease_ttl
+        self._join = self.redis.register_script(JOIN_SCRIPT)
+
+    async def join(self, key: str, job_id: str) -> Optional[str]:
+        leader = await self._join(keys=lease_keys(key), args=[job_id, self.lease_ttl])
+        return leader or None
+
+    async def join_many(self, entries: List[Tuple[str, str]]) -> List[Optional[str]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for key, job_id in entries:
+            await self._join(keys=lease_keys(key), args=[job_id, self.lease_ttl], client=pipe)
+        return [leader or None for leader in await pipe.execute()]
@@ -0,0 +1,128 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import zstandard as zstd
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import CRAWL_BLOB_BYTES
+from app.models.domain.database_models import CrawlBlob, CrawlDictionary
+
+# Key of the page URL -> content hash map in a crawl manifest
+MANIFEST = "blobs"
+
+# Dictionaries never change once trained, so every process keeps them
+_dictionaries: Dict[int, zstd.ZstdCompressionDict] = {}
+
+def is_manifest(crawl_data: Any) -> bool:
+    """Whether crawl_data is a manifest rather than the pages themselves"""
+    return isinstance(crawl_data, dict) and isinstance(crawl_data.get(MANIFEST), dict)
+
+def serialize_page(content: Any) -> bytes:
+    return json.dumps(content, sort_keys=True).encode()
+
+def page_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+class CrawlBlobStore:
+    """
+    Content-addressed, zstd-compressed storage for crawled pages.
+
+    A crawl is kept as a manifest mapping each page URL to the hash of its
+    content, so pages repeated across re-crawls, or across sites built on
+    the same template, are stored once. Pages are compressed with the
+    newest trained dictionary and each blob records the one it needs.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def put(self, pages: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+        """Store a crawl's pages and return its manifest (not committed)"""
+        dictionary_id, compressor = self._compressor()
+        manifest = {}
+        blobs = {}
+        for url, content in pages.items():
+            raw = serialize_page(content)
+            digest = page_hash(raw)
+            manifest[url] = digest
+            if digest not in blobs:
+                blobs[digest] = {
+                    "hash": digest,
+                    "dictionary_id": dictionary_id,
+                    "data": compressor.compress(raw),
+                    "size": len(raw)
+                }
+
+        if blobs:
+            statement = insert(CrawlBlob).values(list(blobs.values()))
+            statement = statement.on_conflict_do_nothing(index_elements=[CrawlBlob.hash])
+            inserted = self.db.execute(statement.returning(CrawlBlob.hash)).scalars().all()
+            CRAWL_BLOB_BYTES.labels(kind="raw").inc(
+                sum(len(serialize_page(content)) for content in pages.values())
+            )
+            CRAWL_BLOB_BYTES.labels(kind="stored").inc(
+                sum(len(blobs[digest]["data"]) for digest in inserted)
+            )
+        return {MANIFEST: manifest}
+
+    def get(self, manifest: Dict[str, Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """The pages of a manifest, or None if any of them is missing"""
+        hashes = set(manifest[MANIFEST].values())
+        rows = self.db.query(
+            CrawlBlob.hash, CrawlBlob.dictionary_id, CrawlBlob.data
+        ).filter(CrawlBlob.hash.in_(hashes)).all()
+        if len(rows) < len(hashes):
+            logger.warning("Crawl manifest references missing blobs")
+            return None
+
+        pages = {
+            digest: json.loads(self._decompress(dictionary_id, data))
+            for digest, dictionary_id, data in rows
+        }
+        return {url: pages[digest] for url, digest in manifest[MANIFEST].items()}
+
+    def train_dictionary(self) -> Optional[int]:
+        """
+        Train a new dictionary on the most recently stored pages and use it
+        for new blobs. Returns its id, or None if there are too few pages.
+        """
+        rows = self.db.query(CrawlBlob.dictionary_id, CrawlBlob.data).order_by(
+            CrawlBlob.created_at.desc()
+        ).limit(settings.CRAWL_DICTIONARY_SAMPLES).all()
+        if len(rows) < settings.CRAWL_DICTIONARY_MIN_SAMPLES:
+            return None
+
+        samples = [self._decompress(dictionary_id, data) for dictionary_id, data in rows]
+        trained = zstd.train_dictionary(settings.CRAWL_DICTIONARY_SIZE, samples)
+        dictionary = CrawlDictionary(data=trained.as_bytes())
+        self.db.add(dictionary)
+        self.db.commit()
+        logger.info(f"Trained crawl dictionary {dictionary.id} on {len(samples)} pages")
+        return dictionary.id
+
+    def _compressor(self) -> Tuple[Optional[int], zstd.ZstdCompressor]:
+        dictionary_id = self.db.query(func.max(CrawlDictionary.id)).scalar()
+        if dictionary_id is None:
+            return None, zstd.ZstdCompressor(level=settings.CRAWL_BLOB_LEVEL)
+        return dictionary_id, zstd.ZstdCompressor(
+            level=settings.CRAWL_BLOB_LEVEL,
+            dict_data=self._dictionary(dictionary_id)
+        )
+
+    def _decompress(self, dictionary_id: Optional[int], data: bytes) -> bytes:
+        if dictionary_id is None:
+            return zstd.ZstdDecompressor().decompress(data)
+        return zstd.ZstdDecompressor(dict_data=self._dictionary(dictionary_id)).decompress(data)
+
+    def _dictionary(self, dictionary_id: int) -> zstd.ZstdCompressionDict:
+        if dictionary_id not in _dictionaries:
+            data = self.db.query(CrawlDictionary.data).filter(
+                CrawlDictionary.id == dictionary_id
+            ).scalar()
+            _dictionaries[dictionary_id] = zstd.ZstdCompressionDict(data)
+        return _dictionaries[dictionary_id]
\ No newline at end of file
@@ -1,15 +1,63 @@
-from typing import Dict, List, Optional
+import asyncio
+import re
+import time
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
 from firecrawl import FirecrawlApp
 from fastapi import HTTPException
 from pydantic import HttpUrl
 
 from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.exceptions import CrawlerException
 from app.core.logging import logger
+from app.core.providers import FIRECRAWL, call_provider
+from app.core.resilience import is_transient_error
+from app.services.domain_profiles import DomainLatencyProfiles, domain_of
+
+# Separators between a page name and its tagline in <title>
+TITLE_SEPARATORS = re.compile(r"\s+[|\-\u2013\u2014:\u00b7]\s+")
+
+class _MetadataParser(HTMLParser):
+    """Collects <title> and <meta> name/property values from a page"""
+
+    def __init__(self):
+        super().__init__()
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            name = attrs.get("property") or attrs.get("name")
+            if name and attrs.get("content"):
+                self.meta.setdefault(name.lower(), attrs["content"].strip())
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+def company_name_from(url: str, metadata: Dict[str, str]) -> str:
+    """Best guess at a company name from page metadata, else from the domain"""
+    if metadata.get("site_name"):
+        return metadata["site_name"]
+    title = metadata.get("og_title") or metadata.get("title")
+    if title:
+        return TITLE_SEPARATORS.split(title)[0].strip()
+    return domain_of(url).split(".")[0].capitalize()
 
 class CrawlerService:
     def __init__(self):
         # Initialize FireCrawl with API key from settings
         self.client = FirecrawlApp(api_key=settings.FIRECRAWL_API_KEY)
+        self.profiles = DomainLatencyProfiles()
         
         # Define important pages to prioritize during crawling
         self.priority_paths = [
@@ -20,40 +68,87 @@ class CrawlerService:
             "/contact", "/news", "/blog"
         ]
 
-    async def crawl_website(self, url: HttpUrl) -> Dict[str, str]:
+    async def crawl_website(
+        self,
+        url: HttpUrl,
+        on_progress: Optional[Callable[..., None]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, str]:
         """
         Crawl website strategically focusing on important pages first.
         Returns a dictionary of page URLs and their content.
+        on_progress(fraction, message) is called as pages are fetched.
+        With a deadline, fewer pages are crawled when the budget is short.
+        Domains that recently kept timing out are not crawled at all.
         """
+        domain = domain_of(url)
+        if self.profiles.is_dead(domain):
+            raise CrawlerException(f"{domain} is not responding, skipping crawl")
+
         try:
+            page_limit = settings.MAX_PAGES_PER_DOMAIN
+            if deadline:
+                affordable = int(deadline.remaining() / settings.DEADLINE_SECONDS_PER_PAGE)
+                if affordable < page_limit:
+                    page_limit = max(settings.DEADLINE_MIN_PAGES, affordable)
+                    deadline.cut(f"Crawl limited to {page_limit} pages")
+
+            if deadline and deadline.expired():
+                # Queued past its deadline: a late brief beats no brief
+                deadline.cut("Deadline passed before crawling, crawled the homepage only")
+                return await self._homepage_only(domain, str(url))
+
             # First, crawl priority pages
             priority_results = {}
-            for path in self.priority_paths:
+            for index, path in enumerate(self.priority_paths):
+                if deadline and deadline.expired():
+                    skipped = len(self.priority_paths) - index
+                    deadline.cut(f"Skipped {skipped} priority pages")
+                    break
                 try:
                     target_url = f"{url.rstrip('/')}{path}"
-                    result = await self.client.scrape_url(
-                        target_url,
-                        params={
-                            'formats': ['markdown', 'html'],
-                            'timeout': settings.CRAWLER_TIMEOUT
-                        }
+                    timeout = self._timeout(domain, deadline)
+                    result = await call_provider(
+                        FIRECRAWL,
+                        lambda: self._scrape(domain, target_url, timeout),
+                        idempotent=True
                     )
                     if result.get('status') == 'success':
                         priority_results[target_url] = result['content']
                 except Exception as e:
                     logger.warning(f"Failed to crawl priority path {path}: {str(e)}")
+                    if self.profiles.is_dead(domain):
+                        raise CrawlerException(f"{domain} stopped responding")
+                if on_progress:
+                    # Priority pages make up the first half of the crawl
+                    on_progress(
+                        (index + 1) / len(self.priority_paths) / 2,
+                        f"Crawled {path}"
+                    )
 
             # Then do a general crawl for remaining pages
-            crawl_result = await self.client.crawl_url(
-                str(url),
-                params={
-                    'limit': settings.MAX_PAGES_PER_DOMAIN,
-                    'scrapeOptions': {
-                        'formats': ['markdown', 'html']
-                    },
-                    'exclude': list(priority_results.keys())  # Avoid re-crawling
-                }
-            )
+            # A crawl may use one credit per page; unused credits are refunded
+            if deadline and deadline.expired():
+                deadline.cut("Skipped general crawl")
+                crawl_result = {}
+            else:
+                crawl_result = await call_provider(
+                    FIRECRAWL,
+                    lambda: asyncio.to_thread(
+                        self.client.crawl_url,
+                        str(url),
+                        params={
+                            'limit': page_limit,
+                            'scrapeOptions': {
+                                'formats': ['markdown', 'html'],
+                                'timeout': self._timeout(domain, deadline)
+                            },
+                            'exclude': list(priority_results.keys())  # Avoid re-crawling
+                        }
+                    ),
+                    cost=page_limit,
+                    cost_of=lambda result: len(result.get('pages', {}))
+                )
 
             # Combine priority and general results
             all_results = {**priority_results, **crawl_result.get('pages', {})}
@@ -66,6 +161,8 @@ class CrawlerService:
 
             return all_results
 
+        except (CrawlerException, HTTPException):
+            raise
         except Exception as e:
             logger.error(f"Crawling failed for {url}: {str(e)}")
             raise HTTPException(
@@ -73,7 +170,95 @@ class CrawlerService:
                 detail=f"Failed to crawl website: {str(e)}"
             )
 
+    async def _homepage_only(self, domain: str, url: str) -> Dict[str, str]:
+        """Crawl result holding just the homepage, scraped with the domain's
+        own timeout rather than what is left of the job's budget"""
+        timeout = self._timeout(domain, None)
+        result = await call_provider(
+            FIRECRAWL,
+            lambda: self._scrape(domain, url, timeout),
+            idempotent=True
+        )
+        if result.get('status') != 'success':
+            raise HTTPException(
+                status_code=404,
+                detail="No content found on the specified website"
+            )
+        return {url: result['content']}
+
+    async def _scrape(self, domain: str, target_url: str, timeout: int) -> Dict:
+        """Scrape one page and add its latency to the domain's profile"""
+        start = time.monotonic()
+        try:
+            # The Firecrawl SDK blocks, so it runs off the event loop
+            result = await asyncio.to_thread(
+                self.client.scrape_url,
+                target_url,
+                params={
+                    'formats': ['markdown', 'html'],
+                    'timeout': timeout
+                }
+            )
+        except Exception as e:
+            # Timeouts and refused connections count against the domain
+            if is_transient_error(e):
+                self.profiles.record(domain, time.monotonic() - start, failed=True)
+            raise
+        self.profiles.record(domain, time.monotonic() - start)
+        return result
+
+    def _timeout(self, domain: str, deadline: Optional[Deadline]) -> int:
+        """
+        Scrape timeout from the domain's latency profile, capped by what is
+        left of the crawl budget
+        """
+        timeout = self.profiles.timeout_for(domain)
+        if deadline is None:
+            return timeout
+        return max(1, min(timeout, int(deadline.remaining())))
+
     async def extract_metadata(self, html_content: str) -> Dict[str, str]:
         """Extract key metadata from HTML content"""
-        # Implementation for metadata extraction
-        pass
\ No newline at end of file
+        parser = _MetadataParser()
+        try:
+            parser.feed(html_content)
+        except Exception as e:
+            logger.warning(f"Failed to parse page metadata: {str(e)}")
+
+        metadata = {
+            "title": parser.title.strip(),
+            "site_name": parser.meta.get("og:site_name", ""),
+            "og_title": parser.meta.get("og:title", ""),
+            "description": (
+                parser.meta.get("og:description") or parser.meta.get("description", "")
+            )
+        }
+        return {key: value for key, value in metadata.items() if value}
+
+    async def provisional_company_name(
+        self,
+        url: str,
+        crawled_data: Dict[str, str]
+    ) -> str:
+        """
+        Cheap guess at the company name from the homepage's OpenGraph site
+        name or title, falling back to the domain. Good enough to start
+        enrichment before analysis has settled the real name.
+        """
+        homepage = crawled_data.get(url) or crawled_data.get(f"{url.rstrip('/')}/")
+        if homepage is None and crawled_data:
+            # The shortest URL is the closest we have to the homepage
+            homepage = crawled_data[min(crawled_data, key=len)]
+
+        metadata = await self.extract_metadata(homepage) if homepage else {}
+        return company_name_from(url, metadata)
+
+    async def homepage_metadata(self, url: str, timeout: int) -> Dict[str, str]:
+        """Metadata of the homepage alone, for a first look at a company"""
+        domain = domain_of(url)
+        result = await call_provider(
+            FIRECRAWL,
+            lambda: self._scrape(domain, str(url), timeout),
+            idempotent=True
+        )
+        return await self.extract_metadata(result.get('html') or result.get('content', ''))
\ No newline at end of file
@@ -0,0 +1,107 @@
+import math
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# z-score of the 95th percentile, for the p95 estimate from mean and variance
+P95_Z = 1.645
+
+# Fold one scrape into a domain's profile. Latency updates an exponentially
+# weighted mean and variance; failures are counted and, once there are enough
+# in a row, the domain is marked dead for a while. Returns the failure streak.
+RECORD_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'ewma', 'var', 'samples', 'failures')
+local ewma = tonumber(state[1])
+local var = tonumber(state[2]) or 0
+local samples = tonumber(state[3]) or 0
+local failures = tonumber(state[4]) or 0
+local latency = tonumber(ARGV[1])
+local alpha = tonumber(ARGV[3])
+if ewma then
+    local diff = latency - ewma
+    ewma = ewma + alpha * diff
+    var = (1 - alpha) * (var + alpha * diff * diff)
+else
+    ewma = latency
+end
+if ARGV[2] == '1' then
+    failures = failures + 1
+    if failures >= tonumber(ARGV[4]) then
+        redis.call('SET', KEYS[2], failures, 'EX', ARGV[5])
+    end
+else
+    failures = 0
+    redis.call('DEL', KEYS[2])
+end
+redis.call('HSET', KEYS[1],
+    'ewma', tostring(ewma), 'var', tostring(var),
+    'samples', samples + 1, 'failures', failures)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return failures
+"""
+
+def domain_of(url: str) -> str:
+    """Host of a URL without the www prefix"""
+    host = (urlparse(str(url)).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+class DomainLatencyProfiles:
+    """
+    Rolling scrape latency per domain, shared by every worker through Redis.
+
+    Scrape timeouts are derived from each domain's estimated p95 latency
+    (EWMA plus 1.645 standard deviations) instead of one fixed timeout, and
+    domains that keep timing out or refusing connections are marked dead so
+    crawls of them are skipped until the mark expires.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or get_redis()
+        self._record = self.redis.register_script(RECORD_SCRIPT)
+
+    def record(self, domain: str, latency: float, failed: bool = False) -> bool:
+        """Add a scrape to the domain's profile; returns whether it is now dead"""
+        failures = self._record(
+            keys=[self._key(domain), self._dead_key(domain)],
+            args=[
+                latency,
+                1 if failed else 0,
+                settings.DOMAIN_LATENCY_ALPHA,
+                settings.DOMAIN_DEAD_AFTER_FAILURES,
+                settings.DOMAIN_DEAD_TTL,
+                settings.DOMAIN_PROFILE_TTL
+            ]
+        )
+        return int(failures) >= settings.DOMAIN_DEAD_AFTER_FAILURES
+
+    def is_dead(self, domain: str) -> bool:
+        return bool(self.redis.exists(self._dead_key(domain)))
+
+    def p95(self, domain: str) -> Optional[float]:
+        """Estimated p95 scrape latency, or None until enough samples exist"""
+        profile = self.profile(domain)
+        if not profile or profile["samples"] < settings.CRAWL_TIMEOUT_MIN_SAMPLES:
+            return None
+        return profile["ewma"] + P95_Z * math.sqrt(profile["var"])
+
+    def timeout_for(self, domain: str) -> int:
+        """Scrape timeout for a domain, between the floor and CRAWLER_TIMEOUT"""
+        p95 = self.p95(domain)
+        if p95 is None:
+            return settings.CRAWLER_TIMEOUT
+        timeout = math.ceil(p95 * settings.CRAWL_TIMEOUT_MULTIPLIER)
+        return max(settings.CRAWL_TIMEOUT_FLOOR, min(settings.CRAWLER_TIMEOUT, timeout))
+
+    def profile(self, domain: str) -> Optional[Dict[str, float]]:
+        state = self.redis.hgetall(self._key(domain))
+        if not state:
+            return None
+        return {name: float(value) for name, value in state.items()}
+
+    def _key(self, domain: str) -> str:
+        return f"research:domain:{domain}"
+
+    def _dead_key(self, domain: str) -> str:
+        return f"research:domain:dead:{domain}"
\ No newline at end of file
@@ -1,29 +1,72 @@
-from openai import OpenAI
-from typing import Dict, List
+from openai import AsyncOpenAI
+from typing import Callable, Dict, List, Optional, Sequence
 import json
+import re
+from fastapi import HTTPException
 
 from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.logging import logger
+from app.core.providers import PERPLEXITY, call_provider
 from app.models.domain.company import CompanyIntel
 
+# Legal-form suffixes ignored when comparing company names
+COMPANY_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "plc", "ag", "sa", "bv"
+}
+
+def same_company(first: str, second: str) -> bool:
+    """Whether two company names refer to the same company, ignoring case,
+    punctuation and legal-form suffixes"""
+    def normalize(name: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+", (name or "").lower())
+        while words and words[-1] in COMPANY_SUFFIXES:
+            words.pop()
+        return words
+    return bool(normalize(first)) and normalize(first) == normalize(second)
+
 class EnricherService:
     def __init__(self):
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             api_key=settings.PERPLEXITY_API_KEY,
             base_url="https://api.perplexity.ai"
         )
 
-    async def enrich_company_data(self, company_data: CompanyIntel) -> CompanyIntel:
+    async def enrich_company_data(
+        self,
+        company_data: CompanyIntel,
+        on_progress: Optional[Callable[..., None]] = None,
+        deadline: Optional[Deadline] = None,
+        prefetched: Optional[Dict] = None
+    ) -> CompanyIntel:
         """
         Enrich company data with additional information from the web.
+        on_progress(fraction, message) is called after each query.
+        With a deadline, queries that no longer fit the budget are skipped.
+
+        prefetched is the output of research_company() for a provisional
+        name. Its answers are reused when that name matches the analyzed
+        one; otherwise the queries are issued again for the analyzed name.
         """
         try:
             # Create targeted queries based on company data
             queries = self._generate_enrichment_queries(company_data)
+
+            answered = []
+            if prefetched:
+                if same_company(prefetched["company_name"], company_data["company_name"]):
+                    answered = prefetched["responses"]
+                else:
+                    logger.info(
+                        f"Provisional name {prefetched['company_name']!r} does not match "
+                        f"{company_data['company_name']!r}, re-issuing enrichment queries"
+                    )
             
             enriched_data = company_data.copy()
             
-            for query in queries:
-                response = await self._query_perplexity(query)
+            responses = await self._run_queries(queries, on_progress, deadline, answered)
+            for response in responses:
                 enriched_data = self._update_company_data(enriched_data, response)
             
             return enriched_data
@@ -35,15 +78,57 @@ class EnricherService:
                 detail=f"Data enrichment failed: {str(e)}"
             )
 
+    async def research_company(
+        self,
+        company_name: str,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Run the enrichment queries for a company name alone, so they can start
+        before analysis has finished. Pass the result to enrich_company_data
+        as prefetched.
+        """
+        queries = self._queries_for(company_name)
+        return {
+            "company_name": company_name,
+            "responses": await self._run_queries(queries, deadline=deadline)
+        }
+
+    async def _run_queries(
+        self,
+        queries: List[str],
+        on_progress: Optional[Callable[..., None]] = None,
+        deadline: Optional[Deadline] = None,
+        answered: Sequence[str] = ()
+    ) -> List[str]:
+        """Answer queries in order, starting after the ones already answered"""
+        responses = list(answered[:len(queries)])
+        for index in range(len(responses), len(queries)):
+            if deadline and deadline.remaining() < settings.DEADLINE_SECONDS_PER_QUERY:
+                deadline.cut(
+                    f"Skipped {len(queries) - index} of {len(queries)} enrichment queries"
+                )
+                break
+            responses.append(await self._query_perplexity(queries[index]))
+            if on_progress:
+                on_progress(
+                    (index + 1) / len(queries),
+                    f"Completed enrichment query {index + 1} of {len(queries)}"
+                )
+        return responses
+
     def _generate_enrichment_queries(self, company_data: CompanyIntel) -> List[str]:
         """
         Generate specific queries for additional research.
         """
+        return self._queries_for(company_data['company_name'])
+
+    def _queries_for(self, company_name: str) -> List[str]:
         return [
-            f"What are the latest news and developments about {company_data['company_name']}?",
-            f"What is {company_data['company_name']}'s market position and main competitors?",
-            f"What are {company_data['company_name']}'s recent funding rounds or financial updates?",
-            f"What are common customer reviews and feedback about {company_data['company_name']}?"
+            f"What are the latest news and developments about {company_name}?",
+            f"What is {company_name}'s market position and main competitors?",
+            f"What are {company_name}'s recent funding rounds or financial updates?",
+            f"What are common customer reviews and feedback about {company_name}?"
         ]
 
     async def _query_perplexity(self, query: str) -> Dict:
@@ -64,9 +149,13 @@ class EnricherService:
             }
         ]
 
-        response = await self.client.chat.completions.create(
-            model="llama-3.1-sonar-large-128k-online",
-            messages=messages,
+        response = await call_provider(
+            PERPLEXITY,
+            lambda: self.client.chat.completions.create(
+                model="llama-3.1-sonar-large-128k-online",
+                messages=messages,
+            ),
+            idempotent=True
         )
         
         return response.choices[0].message.content
@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.validation import UnsafeURLError, resolve_public_url
+from app.models.domain.database_models import CompanyIdentity as CompanyIdentityRow
+from app.services.domain_profiles import domain_of
+
+# domain -> (company id, expires at), shared by every resolver in the process
+_known: Dict[str, Tuple[str, float]] = {}
+_known_lock = threading.Lock()
+
+class CompanyIdentity(NamedTuple):
+    company_id: str
+    # The URL every job, cache entry and crawl for the company uses
+    canonical_url: str
+
+def identity_for(company_id: str) -> CompanyIdentity:
+    return CompanyIdentity(company_id, f"https://{company_id}")
+
+def redirect_target(company_url: str, client: Optional[httpx.Client] = None) -> Optional[str]:
+    """
+    Domain a company's homepage redirects to, or None if it stays on the
+    requested domain. Only an explicit redirect of the root fetch counts;
+    where crawled pages ended up does not, since unrelated companies can
+    share a host. Hops are followed by hand and never to non-public
+    addresses.
+    """
+    if client is None:
+        with httpx.Client(
+            timeout=settings.COMPANY_REDIRECT_TIMEOUT, follow_redirects=False
+        ) as client:
+            return redirect_target(company_url, client)
+
+    url = f"https://{domain_of(company_url)}/"
+    for _ in range(settings.COMPANY_REDIRECT_MAX_HOPS):
+        try:
+            resolve_public_url(url)
+            response = client.head(url)
+        except (UnsafeURLError, httpx.HTTPError) as e:
+            logger.warning(f"Could not check {url} for a redirect: {str(e)}")
+            return None
+        if not response.is_redirect:
+            break
+        url = str(response.url.join(response.headers["Location"]))
+
+    domain = domain_of(url)
+    return domain if domain and domain != domain_of(company_url) else None
+
+class CompanyIdentityResolver:
+    """
+    Maps company URLs to a stable company id so scheme, www, path and
+    trailing-slash variants, alias domains and redirected domains share one
+    cache entry and one in-flight job.
+
+    A company's id is its primary domain. Domains that belong to another
+    company are recorded in the company_identities table; lookups go
+    through a per-process map that entries expire from after
+    COMPANY_IDENTITY_CACHE_TTL, so aliases registered elsewhere are picked
+    up without a restart.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def resolve(self, company_url: str) -> CompanyIdentity:
+        return self.resolve_many([company_url])[0]
+
+    def resolve_many(self, company_urls: List[str]) -> List[CompanyIdentity]:
+        """Identities of many URLs with at most one database query"""
+        domains = [domain_of(url) for url in company_urls]
+        now = time.time()
+        with _known_lock:
+            entries = {domain: _known.get(domain) for domain in set(domains)}
+        known = {
+            domain: entry[0] for domain, entry in entries.items()
+            if entry and entry[1] > now
+        }
+
+        missing = set(domains) - set(known)
+        if missing:
+            rows = dict(self.db.query(
+                CompanyIdentityRow.domain, CompanyIdentityRow.company_id
+            ).filter(CompanyIdentityRow.domain.in_(missing)).all())
+            # Unmapped domains are companies of their own
+            found = {domain: rows.get(domain, domain) for domain in missing}
+            self._remember(found)
+            known.update(found)
+
+        return [identity_for(known[domain]) for domain in domains]
+
+    def register_alias(self, alias_url: str, company_url: str):
+        """
+        Record that alias_url's domain belongs to the company of company_url,
+        moving any domains that were aliases of the alias along with it
+        """
+        alias = domain_of(alias_url)
+        company_id = self.resolve(company_url).company_id
+        if alias == company_id:
+            return
+
+        statement = insert(CompanyIdentityRow).values(domain=alias, company_id=company_id)
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=[CompanyIdentityRow.domain],
+            set_={"company_id": company_id}
+        ))
+        moved = self.db.query(CompanyIdentityRow).filter(
+            CompanyIdentityRow.company_id == alias
+        ).update({"company_id": company_id}, synchronize_session=False)
+        self.db.commit()
+        logger.info(f"Registered {alias} as an alias of {company_id} ({moved} moved)")
+
+        with _known_lock:
+            # Forget every domain that pointed at the alias; it is re-read
+            for domain in [d for d, entry in _known.items() if entry[0] == alias]:
+                del _known[domain]
+        self._remember({alias: company_id})
+
+    def _remember(self, identities: Dict[str, str]):
+        expires_at = time.time() + settings.COMPANY_IDENTITY_CACHE_TTL
+        with _known_lock:
+            if len(_known) + len(identities) > settings.COMPANY_IDENTITY_CACHE_SIZE:
+                _known.clear()
+            for domain, company_id in identities.items():
+                _known[domain] = (company_id, expires_at)
\ No newline at end of file
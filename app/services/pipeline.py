@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, get_origin
+
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.logging import logger
+from app.models.domain.company import CompanyIntel
+from app.services.crawler import CrawlerService, company_name_from
+from app.services.analyzer import AnalyzerService
+from app.services.enricher import EnricherService, same_company
+from app.services.synthesizer import SynthesizerService
+
+# (status, progress) reported when each stage starts
+STAGES = [
+    ("crawling", 0.25),
+    ("analyzing", 0.50),
+    ("enriching", 0.75),
+    ("synthesizing", 0.90),
+]
+STAGE_PROGRESS = dict(STAGES)
+STAGE_END_PROGRESS = dict(zip(
+    STAGE_PROGRESS, [progress for _, progress in STAGES[1:]] + [1.0]
+))
+
+def hash_stage_input(stage_input: Any) -> str:
+    """Stable hash of a stage's input, used to validate checkpoints"""
+    payload = json.dumps(stage_input, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def provisional_intel(
+    company_url: str,
+    metadata: Dict[str, str],
+    known: Optional[Dict] = None
+) -> Dict:
+    """
+    Low-confidence CompanyIntel from homepage metadata, overlaid with facts
+    from earlier research of the company when there are any
+    """
+    intel = {
+        field: [] if get_origin(hint) is list else None
+        for field, hint in CompanyIntel.__annotations__.items()
+    }
+    intel.update({
+        "company_name": company_name_from(company_url, metadata),
+        "value_propositions": [metadata["description"]] if metadata.get("description") else [],
+        "confidence_score": settings.PROGRESSIVE_CONFIDENCE["preview"],
+        "last_updated": datetime.utcnow().isoformat(),
+        "data_sources": [company_url]
+    })
+    if known:
+        intel.update({field: value for field, value in known.items() if value})
+        intel["confidence_score"] = settings.PROGRESSIVE_CONFIDENCE["cached"]
+    return intel
+
+class ResearchPipeline:
+    """
+    Runs crawl -> analysis -> enrichment -> synthesis for a single company.
+
+    When a checkpoint store is given, each stage's output is saved as soon as
+    the stage completes and a later run with the same input resumes from the
+    last completed stage instead of starting over.
+
+    When a deadline is given, each stage runs within its share of the time
+    left and the services degrade their work to fit.
+
+    Enrichment only needs the company name, so while analysis runs its
+    queries are started speculatively for a provisional name taken from the
+    homepage. The answers are reused if analysis confirms the name.
+    """
+
+    def __init__(
+        self,
+        crawler: Optional[CrawlerService] = None,
+        analyzer: Optional[AnalyzerService] = None,
+        enricher: Optional[EnricherService] = None,
+        synthesizer: Optional[SynthesizerService] = None,
+        checkpoints=None
+    ):
+        self.crawler = crawler or CrawlerService()
+        self.analyzer = analyzer or AnalyzerService()
+        self.enricher = enricher or EnricherService()
+        self.synthesizer = synthesizer or SynthesizerService()
+        self.checkpoints = checkpoints
+
+    async def run(
+        self,
+        company_url: str,
+        output_format: Optional[str],
+        on_progress: Optional[Callable[..., None]] = None,
+        deadline: Optional[Deadline] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None,
+        reuse: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run every stage and return the stage outputs along with the final brief.
+        Without an output_format synthesis is skipped and only the research
+        stages run, e.g. to refresh the cache. Stage outputs given in reuse
+        (keyed like the returned outputs) are used instead of running their
+        stage.
+
+        on_progress(status, progress, message=None) is called when each stage
+        starts and again as services report progress within a stage.
+        on_result(stage, output) is called as each stage completes.
+        """
+        def reporter(status: str) -> Callable[..., None]:
+            # Map progress within a stage onto the span up to the next stage
+            start = STAGE_PROGRESS[status]
+            end = STAGE_END_PROGRESS[status]
+
+            def report(fraction: float = 0.0, message: Optional[str] = None):
+                if on_progress:
+                    on_progress(status, start + (end - start) * fraction, message)
+            return report
+
+        def budget(stage: str) -> Optional[Deadline]:
+            return deadline.for_stage(stage) if deadline else None
+
+        reuse = reuse or {}
+
+        async def run_stage(
+            stage: str,
+            output: str,
+            stage_input: Any,
+            run: Callable[[Any], Awaitable[Any]]
+        ) -> Any:
+            if output in reuse:
+                logger.info(f"Reusing cached output for stage {stage}")
+                return reuse[output]
+            return await self._stage(stage, stage_input, run)
+
+        report_crawl = reporter("crawling")
+        report_crawl()
+        crawled_data = await run_stage(
+            "crawling", "crawl_data", company_url,
+            lambda url: self.crawler.crawl_website(
+                url, on_progress=report_crawl, deadline=budget("crawling")
+            )
+        )
+        if on_result:
+            on_result("crawling", crawled_data)
+
+        # Only speculate when analysis actually runs, not when resuming
+        provisional_name: Optional[asyncio.Future] = None
+        speculative: Optional[asyncio.Future] = None
+
+        async def analyze(data: Dict[str, str]) -> Dict:
+            nonlocal provisional_name, speculative
+            provisional_name = asyncio.ensure_future(
+                self.crawler.provisional_company_name(company_url, data)
+            )
+            speculative = asyncio.ensure_future(
+                self._prefetch_enrichment(provisional_name, budget("enriching"))
+            )
+            return await self.analyzer.analyze_content(data, deadline=budget("analyzing"))
+
+        async def enrich(data: Dict) -> Dict:
+            prefetched = None
+            if speculative:
+                # The name is settled long before the answers arrive, so a
+                # mismatch is known early; don't wait for answers to discard
+                name = await self._provisional_name(provisional_name)
+                if name and same_company(name, data["company_name"]):
+                    prefetched = await speculative
+                else:
+                    speculative.cancel()
+            return await self.enricher.enrich_company_data(
+                data,
+                on_progress=report_enrich,
+                deadline=budget("enriching"),
+                prefetched=prefetched
+            )
+
+        try:
+            reporter("analyzing")()
+            analyzed_data = await run_stage(
+                "analyzing", "analyzed_data", crawled_data, analyze
+            )
+            if on_result:
+                on_result("analyzing", analyzed_data)
+
+            report_enrich = reporter("enriching")
+            report_enrich()
+            enriched_data = await run_stage(
+                "enriching", "enriched_data", analyzed_data, enrich
+            )
+            if on_result:
+                on_result("enriching", enriched_data)
+        finally:
+            for task in (speculative, provisional_name):
+                if task and not task.done():
+                    task.cancel()
+
+        outputs = {
+            "crawl_data": crawled_data,
+            "analyzed_data": analyzed_data,
+            "enriched_data": enriched_data
+        }
+        if output_format:
+            reporter("synthesizing")()
+            outputs["final_brief"] = await self.synthesize(
+                enriched_data, output_format, deadline=budget("synthesizing")
+            )
+        return outputs
+
+    async def preview(self, company_url: str, known: Optional[Dict] = None) -> Dict:
+        """
+        Quick provisional CompanyIntel for progressive jobs, built from the
+        homepage's metadata and any earlier research of the company
+        """
+        try:
+            metadata = await asyncio.wait_for(
+                self.crawler.homepage_metadata(
+                    company_url, settings.PROGRESSIVE_PREVIEW_TIMEOUT
+                ),
+                timeout=settings.PROGRESSIVE_PREVIEW_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Homepage preview failed for {company_url}: {str(e)}")
+            metadata = {}
+        return provisional_intel(company_url, metadata, known)
+
+    async def synthesize(
+        self,
+        enriched_data: Dict,
+        output_format: str,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Run only the synthesis stage, e.g. on top of cached enrichment"""
+        return await self._stage(
+            "synthesizing",
+            {"enriched_data": enriched_data, "output_format": output_format},
+            lambda stage_input: self.synthesizer.generate_sales_brief(
+                stage_input["enriched_data"],
+                stage_input["output_format"],
+                deadline=deadline
+            )
+        )
+
+    async def _provisional_name(self, provisional_name: asyncio.Future) -> Optional[str]:
+        """The provisional company name; None if it could not be guessed"""
+        try:
+            # Shielded so that cancelling the prefetch doesn't cancel the name
+            return await asyncio.shield(provisional_name)
+        except Exception as e:
+            logger.warning(f"Provisional company name failed: {str(e)}")
+            return None
+
+    async def _prefetch_enrichment(
+        self,
+        provisional_name: asyncio.Future,
+        deadline: Optional[Deadline]
+    ) -> Optional[Dict]:
+        """Enrichment for the provisional company name; None if it fails"""
+        name = await self._provisional_name(provisional_name)
+        if not name:
+            return None
+        try:
+            return await self.enricher.research_company(name, deadline=deadline)
+        except Exception as e:
+            logger.warning(f"Speculative enrichment failed: {str(e)}")
+            return None
+
+    async def _stage(
+        self,
+        stage: str,
+        stage_input: Any,
+        run: Callable[[Any], Awaitable[Any]]
+    ) -> Any:
+        """Run a stage, reusing its checkpoint when the input is unchanged"""
+        if self.checkpoints is None:
+            return await run(stage_input)
+
+        input_hash = hash_stage_input(stage_input)
+        output = self.checkpoints.load(stage, input_hash)
+        if output is not None:
+            logger.info(f"Resuming from checkpoint for stage {stage}")
+            return output
+
+        output = await run(stage_input)
+        self.checkpoints.save(stage, input_hash, output)
+        return output
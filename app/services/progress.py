@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import get_async_redis, get_redis
+
+# Statuses a job never leaves
+FINISHED_STATUSES = ("completed", "failed")
+
+def finished_channel(job_id: str) -> str:
+    """Pub/sub channel a job's terminal status is published on"""
+    return f"research:job:{job_id}:finished"
+
+class ProgressTracker:
+    """
+    Hot store for job status and progress.
+
+    Workers write every stage and sub-stage update here instead of to
+    Postgres; the research_jobs row is only written on terminal states and
+    on a coarse timer. Status reads check this store first.
+    """
+
+    def __init__(self, redis=None, ttl: int = settings.PROGRESS_TTL):
+        self.redis = redis or get_redis()
+        self.ttl = ttl
+
+    def update(self, job_ids: List[str], **fields):
+        """
+        Set status fields (status, progress, message, error...) on jobs.
+        Terminal statuses are also published to wake long-polling requests.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_update(pipe, job_ids, fields)
+        pipe.execute()
+
+    def get(self, job_id: str) -> Optional[Dict[str, str]]:
+        """Latest known state of a job, or None if it is not in the hot store"""
+        return self.redis.hgetall(self._key(job_id)) or None
+
+    def _queue_update(self, pipe, job_ids: List[str], fields: Dict[str, Any]):
+        fields = {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in fields.items()
+            if value is not None
+        }
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        for job_id in job_ids:
+            pipe.hset(self._key(job_id), mapping=fields)
+            pipe.expire(self._key(job_id), self.ttl)
+            if fields.get("status") in FINISHED_STATUSES:
+                pipe.publish(finished_channel(job_id), fields["status"])
+
+    def _key(self, job_id: str) -> str:
+        return f"research:job:{job_id}"
+
+class AsyncProgressTracker(ProgressTracker):
+    """
+    The API's view of the hot store: it records new jobs as pending and
+    answers status reads. Keys and encoding are ProgressTracker's, so
+    workers and the API read each other's writes.
+    """
+
+    def __init__(self, redis=None, ttl: int = settings.PROGRESS_TTL):
+        super().__init__(redis or get_async_redis(), ttl)
+
+    async def update(self, job_ids: List[str], **fields):
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_update(pipe, job_ids, fields)
+        await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, str]]:
+        return await self.redis.hgetall(self._key(job_id)) or None
+
+class CompletionListener:
+    """
+    Lets status requests wait for a job to finish instead of polling. Each
+    API process holds one pattern subscription to job completions, rather
+    than a Redis connection per waiting request, and wakes the waiters of
+    every job that finishes.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """
+        Subscribe and start listening on the running event loop. Without
+        Redis, requests fall back to returning the current status at once.
+        """
+        if self._task is None:
+            redis = self.redis or get_async_redis()
+            self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await self._pubsub.psubscribe(finished_channel("*"))
+            except RedisError as e:
+                logger.warning(f"Job completion listener not started: {str(e)}")
+                return
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+            await self._pubsub.aclose()
+
+    async def wait(
+        self,
+        job_id: str,
+        timeout: float,
+        finished: Callable[[], Awaitable[bool]]
+    ):
+        """
+        Return once job_id finishes or timeout seconds pass. finished() says
+        whether it already has; it is checked after registering the waiter,
+        so a job finishing in between is not missed. Returns at once while
+        the listener is not running.
+        """
+        if self._task is None:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(job_id, set()).add(future)
+        try:
+            if not await finished():
+                await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(job_id, set())
+            waiters.discard(future)
+            if not waiters:
+                self._waiters.pop(job_id, None)
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    job_id = message["channel"].split(":")[2]
+                    for future in self._waiters.get(job_id, ()):
+                        if not future.done():
+                            future.set_result(message["data"])
+            except RedisError as e:
+                # The subscription is restored once the client reconnects
+                logger.warning(f"Job completion listener lost Redis: {str(e)}")
+                await asyncio.sleep(1)
+
+completion_listener = CompletionListener()
\ No newline at end of file
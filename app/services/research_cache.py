@@ -0,0 +1,333 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import RESEARCH_CACHE_LOOKUPS
+from app.core.redis import get_redis
+from app.models.domain.database_models import ResearchCache
+from app.services.crawl_blobs import CrawlBlobStore, is_manifest
+from app.services.scheduler import REFRESH_TASK, FairScheduler
+
+# Cached fields: the expiry marker, JSON holding each stage's validity and
+# the entry's stale_until, and one payload per pipeline stage
+EXPIRY = "expiry"
+STAGE_FIELDS = ("crawl_data", "analyzed_data", "enriched_data")
+
+# Validity column of each stage, in pipeline order
+STAGE_VALIDITY = {
+    "crawl_data": "crawl_valid_until",
+    "analyzed_data": "analyzed_valid_until",
+    "enriched_data": "enriched_valid_until"
+}
+
+FRESH = "fresh"
+STALE = "stale"
+
+def stage_ttl(stage: str) -> int:
+    """Seconds a stage's cached output stays fresh"""
+    return settings.CACHE_STAGE_TTLS.get(stage, settings.CACHE_EXPIRATION)
+
+def _epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return 0.0
+    # Naive timestamps in the cache table are UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class LocalCache:
+    """Process-local LRU of serialized cache fields, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        # (company_url, field) -> (raw JSON, expires at, size)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float, int]]" = OrderedDict()
+        # Invalidations arrive on the pub/sub listener thread
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Tuple[str, str], raw: str, expires_at: float):
+        size = len(raw)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (raw, expires_at, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def evict(self, company_url: str):
+        """Drop every field cached for a company"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == company_url]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _drop(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.size -= entry[2]
+
+@lru_cache
+def get_local_cache() -> LocalCache:
+    """
+    This process's local cache, kept coherent by listening for invalidations
+    published by every other process
+    """
+    cache = LocalCache(settings.CACHE_LOCAL_MAX_BYTES)
+
+    def on_invalidate(message):
+        cache.evict(message["data"])
+
+    def on_error(error, pubsub, thread):
+        # Invalidations may have been missed while disconnected
+        logger.warning(f"Research cache invalidation listener failed: {str(error)}")
+        cache.clear()
+        time.sleep(1)
+
+    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{settings.CACHE_INVALIDATION_CHANNEL: on_invalidate})
+    pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=on_error)
+    return cache
+
+class ResearchCacheStore:
+    """
+    Read-through cache in front of the research_cache table: a per-process
+    LRU, then Redis, then Postgres.
+
+    Freshness is checked without loading any payload, and each stage's
+    payload is loaded on its own, so a job that only needs enriched_data
+    never transfers the crawl. Writes and invalidations are published so
+    every process drops its local copies.
+
+    Each stage's output has its own validity window. Entries are fresh
+    while every stage is and stale, but still served, until stale_until; a
+    stale read should trigger request_refresh(). Stage payloads remain
+    loadable while the stage itself is valid, so a rerun can reuse them.
+
+    Crawled pages live in the blob store; the row only holds their manifest.
+    """
+
+    def __init__(self, db: Session, redis=None, local: Optional[LocalCache] = None):
+        self.db = db
+        self.redis = redis or get_redis()
+        self.local = local or get_local_cache()
+        self.blobs = CrawlBlobStore(db)
+
+    def freshness(self, company_url: str) -> Optional[str]:
+        """FRESH, STALE or None for no servable entry, without loading payloads"""
+        expiry = self._expiry(company_url)
+        if expiry is None:
+            return None
+        now = time.time()
+        if min(expiry["stages"].values()) > now:
+            return FRESH
+        return STALE if expiry["stale_until"] > now else None
+
+    def stage_validity(self, company_url: str) -> Dict[str, float]:
+        """Epoch time each cached stage stays fresh until; empty if uncached"""
+        expiry = self._expiry(company_url)
+        return expiry["stages"] if expiry else {}
+
+    def load(self, company_url: str, stage: str) -> Optional[Any]:
+        """Payload of one stage of a cached entry, or None"""
+        raw = self._read(company_url, stage)
+        return self._resolve(json.loads(raw)) if raw is not None else None
+
+    def load_stale(self, company_url: str, stage: str) -> Optional[Any]:
+        """Payload of one stage even if the entry has expired (database only)"""
+        row = self.db.query(getattr(ResearchCache, stage)).filter(
+            ResearchCache.company_url == company_url
+        ).first()
+        return self._resolve(row[0]) if row else None
+
+    def store(
+        self,
+        company_url: str,
+        data: Dict[str, Any],
+        started_at: Optional[datetime] = None
+    ):
+        """
+        Upsert the stage outputs in data and invalidate cached copies. Stages
+        not in data keep their stored output and validity.
+
+        Each stage is valid for its TTL from started_at, when the run that
+        produced it began (now if not given), since that is how old its
+        inputs are. A write from a run that began before the one that stored
+        a stage (a slow refresh finishing after a newer job) is ignored. Each
+        write bumps the row's version.
+        """
+        if not data:
+            return
+        if "crawl_data" in data:
+            data = {**data, "crawl_data": self.blobs.put(data["crawl_data"])}
+        started_at = started_at or datetime.utcnow()
+        validity = {
+            STAGE_VALIDITY[stage]: started_at + timedelta(seconds=stage_ttl(stage))
+            for stage in data
+        }
+        stale_window = timedelta(seconds=settings.CACHE_STALE_TTL)
+        statement = insert(ResearchCache).values(
+            company_url=company_url,
+            **data,
+            **validity,
+            cache_valid_until=min(validity.values()),
+            stale_until=min(validity.values()) + stale_window,
+            version=1
+        )
+        excluded = statement.excluded
+        valid_until = func.least(*(
+            excluded[column] if column in validity else getattr(ResearchCache, column)
+            for column in STAGE_VALIDITY.values()
+        ))
+        statement = statement.on_conflict_do_update(
+            index_elements=[ResearchCache.company_url],
+            set_={
+                **{name: excluded[name] for name in (*data, *validity)},
+                "cache_valid_until": valid_until,
+                "stale_until": valid_until + stale_window,
+                "version": ResearchCache.version + 1,
+                "updated_at": func.now()
+            },
+            # Validity is start time plus the stage's TTL, so this orders
+            # writes by when their run began. A stage never stored before has
+            # NULL validity, which must not make the comparison NULL and
+            # silently skip the write
+            where=and_(*(
+                or_(
+                    getattr(ResearchCache, column).is_(None),
+                    getattr(ResearchCache, column) <= excluded[column]
+                )
+                for column in validity
+            ))
+        )
+        self.db.execute(statement)
+        self.db.commit()
+        self.invalidate(company_url)
+
+    def request_refresh(self, company_url: str, ahead: float = 0) -> bool:
+        """
+        Queue a refresh of a stale entry in the batch lane unless one is
+        already in flight for the company. With `ahead`, stages expiring within that
+        many seconds are refreshed too. Returns whether one was enqueued.
+        """
+        if not self.redis.set(
+            self._refresh_key(company_url), "1",
+            nx=True, ex=settings.CACHE_REFRESH_LOCK_TTL
+        ):
+            return False
+
+        # Refreshes have no requesting key, so they queue as the anonymous
+        # tenant and hold batch slots like any other job
+        FairScheduler(self.redis).submit(
+            "batch", None, self._refresh_key(company_url), [company_url, ahead],
+            task=REFRESH_TASK
+        )
+        return True
+
+    def refresh_done(self, company_url: str):
+        self.redis.delete(self._refresh_key(company_url))
+
+    def invalidate(self, company_url: str):
+        """Drop a company from Redis and from every process's local cache"""
+        self.redis.delete(self._key(company_url))
+        self.local.evict(company_url)
+        self.redis.publish(settings.CACHE_INVALIDATION_CHANNEL, company_url)
+
+    def _read(self, company_url: str, field: str) -> Optional[str]:
+        """Serialized field of a usable entry, from the nearest tier that has it"""
+        raw = self.local.get((company_url, field))
+        if raw is not None:
+            RESEARCH_CACHE_LOOKUPS.labels(tier="local").inc()
+            return raw
+
+        expiry, raw = self.redis.hmget(self._key(company_url), EXPIRY, field)
+        tier = "redis"
+        if raw is None:
+            expiry, raw = self._read_db(company_url, field)
+            if raw is None:
+                RESEARCH_CACHE_LOOKUPS.labels(tier="miss").inc()
+                return None
+            tier = "db"
+            pipe = self.redis.pipeline()
+            pipe.hset(self._key(company_url), mapping={EXPIRY: expiry, field: raw})
+            pipe.expireat(self._key(company_url), int(self._expires_at(expiry)) + 1)
+            pipe.execute()
+
+        expires_at = self._expires_at(expiry)
+        if expires_at <= time.time():
+            RESEARCH_CACHE_LOOKUPS.labels(tier="miss").inc()
+            return None
+        RESEARCH_CACHE_LOOKUPS.labels(tier=tier).inc()
+        self.local.put((company_url, field), raw, expires_at)
+        return raw
+
+    def _read_db(self, company_url: str, field: str) -> Tuple[Optional[str], Optional[str]]:
+        """(expiry, serialized field) of a usable row, loading only that column"""
+        validity = [getattr(ResearchCache, column) for column in STAGE_VALIDITY.values()]
+        columns = [ResearchCache.stale_until, *validity]
+        if field != EXPIRY:
+            columns.append(getattr(ResearchCache, field))
+        now = datetime.utcnow()
+        row = self.db.query(*columns).filter(
+            ResearchCache.company_url == company_url,
+            or_(ResearchCache.stale_until > now, *(column > now for column in validity))
+        ).first()
+        if row is None:
+            return None, None
+
+        expiry = json.dumps({
+            "stale_until": _epoch(row[0]),
+            "stages": {
+                stage: _epoch(value) for stage, value in zip(STAGE_VALIDITY, row[1:4])
+            }
+        })
+        if field == EXPIRY:
+            return expiry, expiry
+        return expiry, json.dumps(row[4], default=str)
+
+    def _resolve(self, payload: Any) -> Any:
+        """Load the pages of a crawl manifest; other payloads are returned as is"""
+        return self.blobs.get(payload) if is_manifest(payload) else payload
+
+    def _expiry(self, company_url: str) -> Optional[Dict]:
+        raw = self._read(company_url, EXPIRY)
+        return json.loads(raw) if raw is not None else None
+
+    @staticmethod
+    def _expires_at(expiry: str) -> float:
+        """When nothing in the entry can be used any more"""
+        parsed = json.loads(expiry)
+        return max(parsed["stale_until"], *parsed["stages"].values())
+
+    def _key(self, company_url: str) -> str:
+        return f"research:cache:{company_url}"
+
+    def _refresh_key(self, company_url: str) -> str:
+        return f"research:cache:refresh:{company_url}"
\ No newline at end of file
@@ -0,0 +1,158 @@
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import (
+    RETENTION_LAST_RUN,
+    RETENTION_PARTITIONS_DROPPED,
+    RETENTION_ROWS_PURGED,
+    TABLE_SIZE_BYTES
+)
+
+# Tables partitioned by month, and their partition key
+PARTITIONED_TABLES = {"research_jobs": "created_at", "api_key_usage": "timestamp"}
+
+# Cache rows are purged once nothing in them can be served or reused
+EXPIRED_CACHE_ROWS = (
+    "greatest(stale_until, crawl_valid_until, analyzed_valid_until, "
+    "enriched_valid_until) < :now"
+)
+
+# Crawl blobs are swept once no cache row's manifest references them. The
+# grace window keeps blobs written by a cache store that has not committed
+# its manifest yet.
+UNREFERENCED_BLOBS = (
+    "created_at < :grace AND hash NOT IN ("
+    "SELECT page.value FROM research_cache, "
+    "jsonb_each_text(research_cache.crawl_data -> 'blobs') AS page "
+    "WHERE page.value IS NOT NULL)"
+)
+
+MONTHLY_PARTITION = re.compile(r"_(\d{4})_(\d{2})$")
+
+def month_start(moment: datetime, offset: int = 0) -> datetime:
+    """First instant of the month `offset` months after moment's"""
+    year, month = divmod(moment.month - 1 + offset, 12)
+    return datetime(moment.year + year, month + 1, 1)
+
+class RetentionManager:
+    """
+    Keeps the job, usage and cache tables at a steady size.
+
+    research_jobs and api_key_usage are partitioned by month. Partitions are
+    created RETENTION_PARTITIONS_AHEAD months in advance and dropped (or
+    moved to RETENTION_ARCHIVE_SCHEMA) once all their rows are past the
+    table's retention. Old rows in the default partition and expired
+    research_cache rows are deleted in batches, at most
+    RETENTION_MAX_BATCHES per table per run, so a run never holds long locks.
+    Crawl blobs no cached manifest references are then swept the same way,
+    once they are older than RETENTION_BLOB_GRACE.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run(self) -> Dict[str, int]:
+        """Enforce retention on every table; returns rows purged per table"""
+        now = datetime.utcnow()
+        purged = {}
+        for table, key in PARTITIONED_TABLES.items():
+            cutoff = now - timedelta(days=settings.RETENTION_DAYS[table])
+            self.create_partitions(table, now)
+            self.drop_partitions(table, cutoff)
+            purged[table] = self.purge(
+                table, f"{table}_default", f"{key} < :cutoff", {"cutoff": cutoff}
+            )
+        purged["research_cache"] = self.purge(
+            "research_cache", "research_cache", EXPIRED_CACHE_ROWS, {"now": now}
+        )
+        # After the cache purge, so blobs of the purged rows go in this run
+        purged["crawl_blobs"] = self.purge(
+            "crawl_blobs", "crawl_blobs", UNREFERENCED_BLOBS,
+            {"grace": now - timedelta(seconds=settings.RETENTION_BLOB_GRACE)}
+        )
+        self.export_sizes()
+        RETENTION_LAST_RUN.set_to_current_time()
+        logger.info(f"Retention run purged {purged}")
+        return purged
+
+    def create_partitions(self, table: str, now: datetime):
+        for offset in range(settings.RETENTION_PARTITIONS_AHEAD + 1):
+            start, end = month_start(now, offset), month_start(now, offset + 1)
+            try:
+                self.db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} "
+                    f"PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}+00') TO ('{end:%Y-%m-%d}+00')"
+                ))
+                self.db.commit()
+            except Exception as e:
+                # e.g. rows for the month already landed in the default partition
+                self.db.rollback()
+                logger.error(f"Could not create {table} partition for {start:%Y-%m}: {str(e)}")
+
+    def drop_partitions(self, table: str, cutoff: datetime) -> List[str]:
+        """Drop or archive monthly partitions that end before cutoff"""
+        dropped = []
+        for name in self._partitions(table):
+            match = MONTHLY_PARTITION.search(name)
+            if not match:
+                continue
+            end = month_start(datetime(int(match.group(1)), int(match.group(2)), 1), 1)
+            if end > cutoff:
+                continue
+
+            self.db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if settings.RETENTION_ARCHIVE_SCHEMA:
+                self.db.execute(text(
+                    f"ALTER TABLE {name} SET SCHEMA {settings.RETENTION_ARCHIVE_SCHEMA}"
+                ))
+            else:
+                self.db.execute(text(f"DROP TABLE {name}"))
+            self.db.commit()
+            RETENTION_PARTITIONS_DROPPED.labels(table=table).inc()
+            dropped.append(name)
+        return dropped
+
+    def purge(self, table: str, target: str, condition: str, params: Dict[str, Any]) -> int:
+        """Delete rows of target matching condition in bounded batches"""
+        total = 0
+        for _ in range(settings.RETENTION_MAX_BATCHES):
+            deleted = self.db.execute(
+                text(
+                    f"DELETE FROM {target} WHERE ctid IN "
+                    f"(SELECT ctid FROM {target} WHERE {condition} LIMIT :batch_size)"
+                ),
+                {**params, "batch_size": settings.RETENTION_BATCH_SIZE}
+            ).rowcount
+            self.db.commit()
+            total += deleted
+            RETENTION_ROWS_PURGED.labels(table=table).inc(deleted)
+            if deleted < settings.RETENTION_BATCH_SIZE:
+                break
+        return total
+
+    def export_sizes(self):
+        """Total size of each table, partitions and indexes included"""
+        for table in (*PARTITIONED_TABLES, "research_cache", "crawl_blobs"):
+            size = self.db.execute(
+                text("SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree(:table)"),
+                {"table": table}
+            ).scalar()
+            TABLE_SIZE_BYTES.labels(table=table).set(size or 0)
+
+    def _partitions(self, table: str) -> List[str]:
+        return self.db.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table}
+        ).scalars().all()
\ No newline at end of file
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.monitoring import QUEUE_DEPTH
+from app.core.redis import get_async_redis, get_redis
+from app.models.schemas.requests import ResearchDepth
+
+ANONYMOUS_TENANT = "anonymous"
+
+# Worker tasks the scheduler can queue
+RESEARCH_TASK = "process_research"
+REFRESH_TASK = "refresh_research_cache"
+
+# Start-time fair queueing: a job's finish tag is its tenant's previous
+# finish tag (or the lane's virtual time, whichever is later) plus 1/weight,
+# so heavier tenants get proportionally more of the lane.
+SUBMIT_SCRIPT = """
+local vtime = tonumber(redis.call('GET', KEYS[3]) or '0')
+local last = tonumber(redis.call('HGET', KEYS[4], ARGV[2]) or '0')
+local finish = math.max(vtime, last) + 1 / tonumber(ARGV[3])
+redis.call('HSET', KEYS[4], ARGV[2], tostring(finish))
+redis.call('ZADD', KEYS[1], finish, ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[4])
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# Hand out free lane slots in finish-tag order, skipping tenants that are at
+# their concurrency ceiling. Slots expire so a lost worker cannot leak them.
+DISPATCH_SCRIPT = """
+local now = tonumber(ARGV[1])
+local slot_ttl = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', now)
+local free = tonumber(ARGV[2]) - redis.call('ZCARD', KEYS[4])
+local dispatched = {}
+if free <= 0 then
+    return dispatched
+end
+local vtime = tonumber(redis.call('GET', KEYS[3]) or '0')
+local candidates = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[4]) - 1, 'WITHSCORES')
+for i = 1, #candidates, 2 do
+    if free <= 0 then
+        break
+    end
+    local job_id = candidates[i]
+    local payload = redis.call('HGET', KEYS[2], job_id)
+    if not payload then
+        redis.call('ZREM', KEYS[1], job_id)
+    else
+        local job = cjson.decode(payload)
+        local tenant_key = ARGV[5] .. job.tenant
+        redis.call('ZREMRANGEBYSCORE', tenant_key, '-inf', now)
+        if redis.call('ZCARD', tenant_key) < tonumber(job.max_running) then
+            redis.call('ZADD', KEYS[4], now + slot_ttl, job_id)
+            redis.call('ZADD', tenant_key, now + slot_ttl, job_id)
+            redis.call('EXPIRE', tenant_key, slot_ttl)
+            redis.call('ZREM', KEYS[1], job_id)
+            redis.call('HDEL', KEYS[2], job_id)
+            vtime = math.max(vtime, tonumber(candidates[i + 1]))
+            table.insert(dispatched, payload)
+            free = free - 1
+        end
+    end
+end
+redis.call('SET', KEYS[3], tostring(vtime))
+return dispatched
+"""
+
+def tenant_for(api_key: Optional[str]) -> str:
+    """Stable, non-reversible identifier for an API key"""
+    if not api_key:
+        return ANONYMOUS_TENANT
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def lane_keys(lane: str) -> Dict[str, str]:
+    prefix = f"research:sched:{lane}"
+    return {
+        "queue": f"{prefix}:queue",
+        "payloads": f"{prefix}:payloads",
+        "vtime": f"{prefix}:vtime",
+        "finish_tags": f"{prefix}:finish",
+        "running": f"{prefix}:running",
+        "tenant_prefix": f"{prefix}:running:"
+    }
+
+def submission(
+    lane: str,
+    api_key: Optional[str],
+    job_id: str,
+    args: List[Any],
+    lease: Optional[str] = None,
+    task: str = RESEARCH_TASK
+) -> Dict[str, List[Any]]:
+    """Keys and arguments of SUBMIT_SCRIPT for one task call"""
+    keys = lane_keys(lane)
+    tenant = tenant_for(api_key)
+    weight = settings.SCHEDULER_KEY_WEIGHTS.get(api_key, settings.SCHEDULER_DEFAULT_WEIGHT)
+    max_running = settings.SCHEDULER_KEY_MAX_RUNNING.get(
+        api_key, settings.SCHEDULER_DEFAULT_MAX_RUNNING
+    )
+    payload = json.dumps({
+        "task": task,
+        "job_id": job_id,
+        "tenant": tenant,
+        "max_running": max_running,
+        "enqueued_at": time.time(),
+        "lease": lease,
+        "args": args
+    })
+    return {
+        "keys": [keys["queue"], keys["payloads"], keys["vtime"], keys["finish_tags"]],
+        "args": [job_id, tenant, weight, payload]
+    }
+
+def dispatch_call(lane: str) -> Dict[str, List[Any]]:
+    """Keys and arguments of DISPATCH_SCRIPT for a lane"""
+    keys = lane_keys(lane)
+    return {
+        "keys": [keys["queue"], keys["payloads"], keys["vtime"], keys["running"]],
+        "args": [
+            time.time(),
+            settings.SCHEDULER_LANES[lane],
+            settings.SCHEDULER_SLOT_TTL,
+            settings.SCHEDULER_SCAN_LIMIT,
+            keys["tenant_prefix"]
+        ]
+    }
+
+def send_to_celery(lane: str, payloads: List[str]) -> List[str]:
+    """Hand dispatched jobs to the lane's Celery queue; returns their ids"""
+    from app.worker import process_research, refresh_research_cache
+
+    tasks = {RESEARCH_TASK: process_research, REFRESH_TASK: refresh_research_cache}
+    job_ids = []
+    for payload in payloads:
+        job = json.loads(payload)
+        tasks[job.get("task", RESEARCH_TASK)].apply_async(
+            args=job["args"],
+            kwargs={"scheduling": {
+                "lane": lane,
+                "tenant": job["tenant"],
+                "job_id": job["job_id"],
+                "enqueued_at": job["enqueued_at"]
+            }},
+            queue=FairScheduler.queue_name(lane)
+        )
+        job_ids.append(job["job_id"])
+    return job_ids
+
+class FairScheduler:
+    """
+    Priority lanes with weighted fair queueing per API key.
+
+    Each lane is its own Celery queue with a fixed number of worker slots, so
+    bulk work in the batch lane never delays interactive jobs. Within a lane,
+    jobs wait in Redis and are released to Celery only when a slot is free,
+    in weighted fair order and subject to each key's concurrency ceiling.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or get_redis()
+        self._submit = self.redis.register_script(SUBMIT_SCRIPT)
+        self._dispatch = self.redis.register_script(DISPATCH_SCRIPT)
+
+    @staticmethod
+    def lane_for(depth: str) -> str:
+        """Quick research is interactive; deep research runs in the batch lane"""
+        return "batch" if depth == ResearchDepth.DEEP.value else "interactive"
+
+    @staticmethod
+    def queue_name(lane: str) -> str:
+        return f"research.{lane}"
+
+    def submit(
+        self,
+        lane: str,
+        api_key: Optional[str],
+        job_id: str,
+        args: List[Any],
+        lease: Optional[str] = None,
+        task: str = RESEARCH_TASK
+    ) -> List[str]:
+        """
+        Queue a call of task (process_research by default) and dispatch
+        whatever fits. lease is the job's single-flight key, kept alive while
+        the job waits.
+        """
+        self._submit(**submission(lane, api_key, job_id, args, lease, task))
+        return self.dispatch(lane)
+
+    def submit_many(
+        self,
+        lane: str,
+        api_key: Optional[str],
+        jobs: Dict[str, List[Any]],
+        leases: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Queue many process_research calls in one round trip"""
+        leases = leases or {}
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id, args in jobs.items():
+            self._submit(**submission(lane, api_key, job_id, args, leases.get(job_id)), client=pipe)
+        pipe.execute()
+        return self.dispatch(lane)
+
+    def dispatch(self, lane: str) -> List[str]:
+        """Send queued jobs to Celery while the lane has free slots"""
+        payloads = self._dispatch(**dispatch_call(lane))
+        job_ids = send_to_celery(lane, payloads)
+        QUEUE_DEPTH.labels(lane=lane).set(self.redis.zcard(lane_keys(lane)["queue"]))
+        return job_ids
+
+    def complete(self, lane: str, tenant: str, job_id: str) -> List[str]:
+        """Free the slot held by a finished job and fill it from the queue"""
+        keys = lane_keys(lane)
+        pipe = self.redis.pipeline()
+        pipe.zrem(keys["running"], job_id)
+        pipe.zrem(keys["tenant_prefix"] + tenant, job_id)
+        pipe.execute()
+        return self.dispatch(lane)
+
+    def queued(self, lane: str) -> Iterator[Dict[str, Any]]:
+        """Payloads of the jobs waiting in a lane"""
+        for _, payload in self.redis.hscan_iter(lane_keys(lane)["payloads"], count=1000):
+            yield json.loads(payload)
+
+    def idle_slots(self, lane: str) -> int:
+        """Free slots in a lane that no queued job is waiting for"""
+        keys = lane_keys(lane)
+        pipe = self.redis.pipeline()
+        pipe.zcount(keys["running"], time.time(), "+inf")
+        pipe.zcard(keys["queue"])
+        running, queued = pipe.execute()
+        return max(0, settings.SCHEDULER_LANES[lane] - running - queued)
+
+class AsyncFairScheduler:
+    """
+    FairScheduler.submit for the API's event loop: Redis calls go through
+    the async client and Celery publishes run in a threadpool.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or get_async_redis()
+        self._submit = self.redis.register_script(SUBMIT_SCRIPT)
+        self._dispatch = self.redis.register_script(DISPATCH_SCRIPT)
+
+    async def submit(
+        self,
+        lane: str,
+        api_key: Optional[str],
+        job_id: str,
+        args: List[Any],
+        lease: Optional[str] = None
+    ) -> List[str]:
+        await self._submit(**submission(lane, api_key, job_id, args, lease))
+        return await self.dispatch(lane)
+
+    async def submit_many(
+        self,
+        lane: str,
+        api_key: Optional[str],
+        jobs: Dict[str, List[Any]],
+        leases: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        leases = leases or {}
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id, args in jobs.items():
+            await self._submit(
+                **submission(lane, api_key, job_id, args, leases.get(job_id)), client=pipe
+            )
+        await pipe.execute()
+        return await self.dispatch(lane)
+
+    async def dispatch(self, lane: str) -> List[str]:
+        payloads = await self._dispatch(**dispatch_call(lane))
+        # Publishing to the broker is blocking I/O
+        job_ids = await run_in_threadpool(send_to_celery, lane, payloads)
+        QUEUE_DEPTH.labels(lane=lane).set(await self.redis.zcard(lane_keys(lane)["queue"]))
+        return job_ids
\ No newline at end of file
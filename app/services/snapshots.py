@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+
+def snapshot_key(job_id: str) -> str:
+    return f"research:job:{job_id}:snapshot"
+
+def parse_snapshot(snapshot: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    if "result" not in snapshot:
+        return None
+    return {
+        "version": int(snapshot["version"]),
+        "stage": snapshot["stage"],
+        "confidence_score": float(snapshot["confidence_score"]),
+        "result": json.loads(snapshot["result"]),
+        "updated_at": snapshot["updated_at"]
+    }
+
+class SnapshotStore:
+    """
+    Provisional results of progressive research jobs.
+
+    Each snapshot replaces the previous one and bumps the job's version, so
+    clients can poll the result endpoint and only re-render when the version
+    changes. Coalesced jobs share the leader's snapshots and version.
+    """
+
+    def __init__(self, redis=None, ttl: int = settings.PROGRESS_TTL):
+        self.redis = redis or get_redis()
+        self.ttl = ttl
+
+    def publish(
+        self,
+        job_ids: List[str],
+        stage: str,
+        result: Any,
+        confidence_score: float
+    ) -> int:
+        """Store a new snapshot for the jobs and return its version"""
+        version = self.redis.hincrby(self._key(job_ids[0]), "version", 1)
+        snapshot = {
+            "version": version,
+            "stage": stage,
+            "confidence_score": confidence_score,
+            "result": json.dumps(result, default=str),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hset(self._key(job_id), mapping=snapshot)
+            pipe.expire(self._key(job_id), self.ttl)
+        pipe.execute()
+        return version
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Latest snapshot of a job, or None if it has not published one"""
+        return parse_snapshot(self.redis.hgetall(snapshot_key(job_id)))
+
+    def _key(self, job_id: str) -> str:
+        return snapshot_key(job_id)
+
+class AsyncSnapshotStore:
+    """
+    Read-only access to provisional results for the result endpoint. Only
+    workers publish snapshots, through SnapshotStore.
+    """
+
+    def __init__(self, redis=None):
+        self.redis = redis or get_async_redis()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return parse_snapshot(await self.redis.hgetall(snapshot_key(job_id)))
\ No newline at end of file
@@ -1,30 +1,49 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+import asyncio
+import json
 import google.generativeai as genai
+from fastapi import HTTPException
 
+from app.core.batching import BatcherPool, combine_prompts
 from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.logging import logger
+from app.core.providers import GEMINI, call_provider, gemini_model_for
 from app.models.domain.company import CompanyIntel
 
 class SynthesizerService:
-    def __init__(self):
+    def __init__(self, batch: bool = False):
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-1.5-pro-latest")
+        self.model_name = "gemini-1.5-pro-latest"
+        self.model = genai.GenerativeModel(self.model_name)
+        self.fast_model = genai.GenerativeModel(settings.FAST_MODEL_NAME)
+        # Only worth it when many pipelines share this instance and its loop
+        self.batchers = BatcherPool() if batch else None
 
     async def generate_sales_brief(
         self, 
         company_data: CompanyIntel,
-        output_format: str = "json"
+        output_format: str = "json",
+        deadline: Optional[Deadline] = None
     ) -> Dict:
         """
         Generate a sales-focused brief from analyzed and enriched company data.
         """
         try:
             prompt = self._build_synthesis_prompt(company_data, output_format)
+            model_name, model = gemini_model_for(
+                deadline, self.model_name, self.model, self.fast_model
+            )
             
-            result = await self.model.generate_content(prompt)
-            
-            if output_format == "json":
-                return result.json()
-            return {"content": result.text}
+            if self.batchers:
+                batcher = self.batchers.get(
+                    f"synthesize:{model_name}:{output_format}",
+                    lambda prompts: self._generate_many(
+                        model_name, model, prompts, output_format
+                    )
+                )
+                return await batcher.submit(prompt)
+            return await self._generate_one(model_name, model, prompt, output_format)
 
         except Exception as e:
             logger.error(f"Brief generation failed: {str(e)}")
@@ -33,6 +52,63 @@ class SynthesizerService:
                 detail=f"Failed to generate sales brief: {str(e)}"
             )
 
+    async def _generate_one(
+        self,
+        model_name: str,
+        model,
+        prompt: str,
+        output_format: str
+    ) -> Dict:
+        result = await call_provider(
+            GEMINI,
+            lambda: model.generate_content_async(prompt),
+            model=model_name,
+            idempotent=True
+        )
+        
+        if output_format == "json":
+            return json.loads(result.text)
+        return {"content": result.text}
+
+    async def _generate_many(
+        self,
+        model_name: str,
+        model,
+        prompts: List[str],
+        output_format: str
+    ) -> List[Dict]:
+        """
+        Generate several briefs with a single Gemini call, falling back to one
+        call per prompt if the batched answer is malformed
+        """
+        if len(prompts) == 1:
+            return [await self._generate_one(model_name, model, prompts[0], output_format)]
+
+        result = await call_provider(
+            GEMINI,
+            lambda: model.generate_content_async(
+                combine_prompts(prompts),
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json"
+                )
+            ),
+            model=model_name,
+            idempotent=True
+        )
+        try:
+            answers = json.loads(result.text)
+        except ValueError:
+            answers = None
+        if not isinstance(answers, list) or len(answers) != len(prompts):
+            logger.warning("Batched synthesis returned malformed output, retrying one by one")
+            return list(await asyncio.gather(
+                *(self._generate_one(model_name, model, prompt, output_format)
+                  for prompt in prompts)
+            ))
+        if output_format == "json":
+            return answers
+        return [{"content": answer} for answer in answers]
+
     def _build_synthesis_prompt(
         self, 
         company_data: CompanyIntel,
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.database import SessionLocal
+from app.models.domain.database_models import APIKeyUsage
+
+class UsageRecorder:
+    """
+    Buffers API key usage in memory and writes it to api_key_usage in
+    batches every USAGE_FLUSH_INTERVAL seconds, off the request path. Usage
+    is for reporting only, so rows buffered when a process dies are lost.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = settings.USAGE_FLUSH_INTERVAL,
+        max_buffer: int = settings.USAGE_MAX_BUFFER
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        api_key: str,
+        endpoint: str,
+        status_code: Optional[int] = None,
+        response_time: Optional[float] = None
+    ):
+        if len(self._buffer) >= self.max_buffer:
+            logger.warning("Usage buffer full, dropping usage record")
+            return
+        self._buffer.append({
+            "api_key": api_key,
+            "endpoint": endpoint,
+            "timestamp": datetime.now(timezone.utc),
+            "status_code": status_code,
+            "response_time": response_time
+        })
+
+    def start(self):
+        """Start flushing periodically on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the periodic flush and write whatever is still buffered"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        rows, self._buffer = self._buffer, []
+        if rows:
+            # The database driver is blocking; keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._write, rows)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(APIKeyUsage), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to write {len(rows)} usage records: {str(e)}")
+        finally:
+            db.close()
+
+usage_recorder = UsageRecorder()
\ No newline at end of file
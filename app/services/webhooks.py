@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.monitoring import WEBHOOK_DELIVERIES
+from app.core.redis import get_redis
+from app.core.validation import UnsafeURLError, resolve_public_url
+
+# Client errors that are worth retrying; other 4xx responses are final
+RETRYABLE_STATUS = (408, 425, 429)
+
+def sign(body: bytes, timestamp: int, secret: Optional[str] = None) -> str:
+    """
+    Signature of a webhook body, sent as X-Webhook-Signature. Receivers
+    recompute the HMAC-SHA256 of "<timestamp>.<body>" with the shared
+    secret, and check X-Webhook-Timestamp is recent to reject replays.
+    """
+    key = (secret or settings.WEBHOOK_SECRET or settings.SECRET_KEY).encode()
+    message = str(timestamp).encode() + b"." + body
+    return "sha256=" + hmac.new(key, message, hashlib.sha256).hexdigest()
+
+class WebhookDispatcher:
+    """
+    Delivers job completion events to the callback URLs given on requests.
+
+    Events are queued in Redis per URL, and the first event of a quiet URL
+    schedules a delivery WEBHOOK_BATCH_WINDOW seconds later, so a batch
+    finishing together reaches its receiver in a few POSTs of
+    {"events": [...]} rather than one per job. Failed POSTs are retried
+    with exponential backoff up to WEBHOOK_MAX_ATTEMPTS times.
+
+    Callback URLs are resolved again before every POST and dropped if they
+    point at a non-public address, and redirects are never followed, so a
+    receiver cannot steer deliveries into the internal network.
+    """
+
+    def __init__(self, redis=None, client: Optional[httpx.Client] = None):
+        self.redis = redis or get_redis()
+        self.client = client or httpx.Client(
+            timeout=settings.WEBHOOK_TIMEOUT, follow_redirects=False
+        )
+
+    def enqueue(self, events: List[Tuple[str, Dict]]):
+        """Queue (callback_url, event) pairs for delivery"""
+        by_url: Dict[str, List[str]] = defaultdict(list)
+        for callback_url, event in events:
+            by_url[callback_url].append(json.dumps(event))
+
+        pipe = self.redis.pipeline(transaction=False)
+        for callback_url, payloads in by_url.items():
+            pipe.rpush(self._queue(callback_url), *payloads)
+            # Outlives the delivery task, so a lost task cannot stall the URL
+            pipe.set(
+                self._scheduled(callback_url), 1,
+                nx=True, ex=settings.WEBHOOK_BATCH_WINDOW + 60
+            )
+        results = pipe.execute()
+
+        for callback_url, scheduled in zip(by_url, results[1::2]):
+            if scheduled:
+                self._schedule([callback_url], settings.WEBHOOK_BATCH_WINDOW)
+
+    def deliver(self, callback_url: str, events: Optional[List[Dict]] = None, attempt: int = 0):
+        """
+        POST the events queued for callback_url in batches, or retry a batch
+        that failed before. Batches that fail again are rescheduled on their
+        own.
+        """
+        batches = [events] if events else self._drain(callback_url)
+        for batch in batches:
+            delivered = self.send(callback_url, batch)
+            if delivered:
+                WEBHOOK_DELIVERIES.labels(outcome="delivered").inc()
+            elif delivered is False and attempt + 1 < settings.WEBHOOK_MAX_ATTEMPTS:
+                WEBHOOK_DELIVERIES.labels(outcome="retried").inc()
+                self._schedule([callback_url, batch, attempt + 1], self.retry_delay(attempt))
+            else:
+                WEBHOOK_DELIVERIES.labels(outcome="dropped").inc()
+                logger.error(
+                    f"Dropping {len(batch)} webhook events for {callback_url} "
+                    f"on attempt {attempt + 1}"
+                )
+
+    def send(self, callback_url: str, events: List[Dict]) -> Optional[bool]:
+        """
+        POST one signed batch. True once delivered, False if worth retrying,
+        None if the receiver rejected it for good.
+        """
+        try:
+            # The name may have been re-pointed since the request was accepted
+            resolve_public_url(callback_url)
+        except UnsafeURLError as e:
+            logger.warning(f"Refusing webhook to {callback_url}: {str(e)}")
+            return None
+
+        body = json.dumps({"events": events}).encode()
+        timestamp = int(time.time())
+        try:
+            response = self.client.post(callback_url, content=body, headers={
+                "Content-Type": "application/json",
+                "X-Webhook-Timestamp": str(timestamp),
+                "X-Webhook-Signature": sign(body, timestamp)
+            })
+        except httpx.HTTPError as e:
+            logger.warning(f"Webhook to {callback_url} failed: {str(e)}")
+            return False
+
+        if response.is_success:
+            return True
+        if response.is_redirect:
+            logger.warning(f"Webhook to {callback_url} redirected, not following")
+            return None
+        logger.warning(f"Webhook to {callback_url} returned {response.status_code}")
+        if response.status_code < 500 and response.status_code not in RETRYABLE_STATUS:
+            return None
+        return False
+
+    def retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before the next attempt"""
+        return random.uniform(0, min(
+            settings.WEBHOOK_RETRY_MAX_DELAY,
+            settings.WEBHOOK_RETRY_BACKOFF * 2 ** attempt
+        ))
+
+    def _schedule(self, args: List, countdown: float):
+        from app.worker import deliver_webhooks
+        deliver_webhooks.apply_async(args=args, countdown=countdown)
+
+    def _drain(self, callback_url: str) -> List[List[Dict]]:
+        """Take every queued event of callback_url, in batches"""
+        # Events queued from here on schedule the next delivery
+        self.redis.delete(self._scheduled(callback_url))
+        batches = []
+        while True:
+            payloads = self.redis.lpop(self._queue(callback_url), settings.WEBHOOK_BATCH_SIZE)
+            if not payloads:
+                return batches
+            batches.append([json.loads(payload) for payload in payloads])
+
+    def _queue(self, callback_url: str) -> str:
+        return f"research:webhooks:{self._url_hash(callback_url)}"
+
+    def _scheduled(self, callback_url: str) -> str:
+        return f"research:webhooks:{self._url_hash(callback_url)}:scheduled"
+
+    def _url_hash(self, callback_url: str) -> str:
+        return hashlib.sha256(callback_url.encode()).hexdigest()[:32]
\ No newline at end of file
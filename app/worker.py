@@ -1,15 +1,29 @@
+import asyncio
+import time
+from datetime import datetime
 from celery import Celery
 from celery.result import AsyncResult
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from celery.signals import worker_init
+from prometheus_client import start_http_server
+from typing import Any, Dict, List, Optional
 
 from app.core.config import settings
-from app.services.crawler import CrawlerService
-from app.services.analyzer import AnalyzerService
-from app.services.enricher import EnricherService
-from app.services.synthesizer import SynthesizerService
+from app.core.deadline import Deadline
+from app.core.monitoring import QUEUE_WAIT, get_metrics_registry
+from app.services.pipeline import ResearchPipeline
+from app.services.cache_warmer import CacheWarmer
+from app.services.checkpoints import CheckpointStore
+from app.services.crawl_blobs import CrawlBlobStore
+from app.services.coalescer import JobCoalescer, coalescing_key
+from app.services.identity import CompanyIdentityResolver, redirect_target
+from app.services.scheduler import FairScheduler
+from app.services.progress import FINISHED_STATUSES, ProgressTracker
+from app.services.snapshots import SnapshotStore
+from app.services.retention import RetentionManager
+from app.services.research_cache import STAGE_FIELDS, STALE, ResearchCacheStore
+from app.services.webhooks import WebhookDispatcher
 from app.models.database import SessionLocal
-from app.models.domain.database_models import ResearchJob, ResearchCache
+from app.models.domain.database_models import ResearchJob
 
 celery = Celery(
     "sales_research",
@@ -17,102 +31,408 @@ celery = Celery(
     backend=settings.CELERY_RESULT_BACKEND
 )
 
-@celery.task(bind=True)
+# Only acknowledge a task once it has finished, so a job whose worker dies
+# is redelivered and resumes from its last checkpointed stage.
+celery.conf.update(
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    # Safety net for dispatches missed when a worker died before releasing
+    beat_schedule={
+        "dispatch-research-queues": {
+            "task": "app.worker.dispatch_research_queues",
+            "schedule": 5.0
+        },
+        "warm-research-cache": {
+            "task": "app.worker.warm_research_cache",
+            "schedule": settings.CACHE_WARM_INTERVAL
+        },
+        "train-crawl-dictionary": {
+            "task": "app.worker.train_crawl_dictionary",
+            "schedule": 86400.0
+        },
+        "extend-queued-leases": {
+            "task": "app.worker.extend_queued_leases",
+            "schedule": settings.SINGLE_FLIGHT_LEASE_TTL / 3
+        },
+        "enforce-retention": {
+            "task": "app.worker.enforce_retention",
+            "schedule": settings.RETENTION_INTERVAL
+        }
+    }
+)
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Expose worker metrics when a port is configured"""
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=get_metrics_registry())
+
+@celery.task(bind=True, max_retries=settings.JOB_MAX_RETRIES)
 def process_research(
     self,
     job_id: str,
     company_url: str,
     depth: str,
     focus_areas: List[str],
-    output_format: str
+    output_format: str,
+    force_refresh: bool = False,
+    deadline_at: Optional[float] = None,
+    progressive: bool = False,
+    scheduling: Optional[Dict] = None
 ) -> Dict:
     """
-    Process the research job in the background
+    Process the research job in the background. deadline_at is the epoch
+    time the result is due by; stages degrade to finish before it.
+    Progressive jobs publish a provisional result first and upgrade it as
+    stages complete.
     """
+    if scheduling and not self.request.retries:
+        QUEUE_WAIT.labels(lane=scheduling["lane"]).observe(
+            time.time() - scheduling["enqueued_at"]
+        )
+
+    retrying = False
+    tracker = ProgressTracker()
+    coalescer = JobCoalescer()
+    key = coalescing_key(
+        company_url, depth, focus_areas, output_format, force_refresh, progressive
+    )
+    snapshots = SnapshotStore() if progressive else None
+    # The lease now runs on this worker's heartbeats
+    coalescer.heartbeat(key, job_id)
+
+    # Get database session
+    db = SessionLocal()
+    job = db.query(ResearchJob).filter(ResearchJob.id == job_id).first()
+    checkpoints = CheckpointStore(db, job_id)
+    cache = ResearchCacheStore(db)
+    pipeline = ResearchPipeline(checkpoints=checkpoints)
+    deadline = Deadline(deadline_at) if deadline_at else None
+
     try:
-        # Initialize services
-        crawler = CrawlerService()
-        analyzer = AnalyzerService()
-        enricher = EnricherService()
-        synthesizer = SynthesizerService()
-        
-        # Get database session
-        db = SessionLocal()
-        
-        # Update job status
-        job = db.query(ResearchJob).filter(ResearchJob.id == job_id).first()
-        
-        # Check cache first
-        cached_data = _check_cache(db, company_url)
-        if cached_data and not force_refresh:
-            return _generate_from_cache(cached_data, output_format)
-
-        # Step 1: Crawl website
-        job.status = "crawling"
-        job.progress = 0.25
-        db.commit()
-        
-        crawled_data = crawler.crawl_website(company_url)
-        
-        # Step 2: Analyze content
-        job.status = "analyzing"
-        job.progress = 0.50
-        db.commit()
-        
-        analyzed_data = analyzer.analyze_content(crawled_data)
-        
-        # Step 3: Enrich data
-        job.status = "enriching"
-        job.progress = 0.75
-        db.commit()
-        
-        enriched_data = enricher.enrich_company_data(analyzed_data)
-        
-        # Step 4: Generate final brief
-        job.status = "synthesizing"
-        job.progress = 0.90
-        db.commit()
-        
-        final_brief = synthesizer.generate_sales_brief(
-            enriched_data,
-            output_format
+        # Check cache first; only the enrichment payload is ever loaded.
+        # Stale entries are served right away and refreshed in the background.
+        CacheWarmer().record_access(company_url)
+        freshness = None if force_refresh else cache.freshness(company_url)
+        cached_data = cache.load(company_url, "enriched_data") if freshness else None
+        if cached_data is not None:
+            if freshness == STALE:
+                cache.request_refresh(company_url)
+            result = _generate_from_cache(pipeline, cached_data, output_format, deadline)
+            follower_ids = _release_followers(db, coalescer, key, job_id)
+            version = _publish_final(snapshots, [job_id, *follower_ids], result)
+            _update_jobs(
+                db, job, follower_ids, tracker,
+                status="completed", progress=1.0, result=result,
+                result_metadata=_result_metadata(deadline, cache_used=True),
+                version=version
+            )
+            checkpoints.clear()
+            return result
+
+        if snapshots:
+            known = cache.load_stale(company_url, "enriched_data")
+            preview = asyncio.run(pipeline.preview(company_url, known))
+            snapshots.publish(
+                [job_id, *coalescer.followers(key)],
+                "preview", preview, preview["confidence_score"]
+            )
+
+        # Progress goes to the hot store; the row is only refreshed on a timer
+        last_flush = time.monotonic()
+
+        def on_progress(status: str, progress: float, message: Optional[str] = None):
+            nonlocal last_flush
+            coalescer.heartbeat(key, job_id)
+            job_ids = [job_id, *coalescer.followers(key)]
+            tracker.update(job_ids, status=status, progress=progress, message=message or "")
+            if time.monotonic() - last_flush >= settings.PROGRESS_DB_FLUSH_INTERVAL:
+                _update_jobs(db, job, job_ids[1:], status=status, progress=progress)
+                last_flush = time.monotonic()
+
+        def on_result(stage: str, output):
+            # Upgrade the provisional result with every intel-shaped output
+            if snapshots and stage in settings.PROGRESSIVE_CONFIDENCE:
+                snapshots.publish(
+                    [job_id, *coalescer.followers(key)], stage, output,
+                    output.get("confidence_score") or settings.PROGRESSIVE_CONFIDENCE[stage]
+                )
+
+        # Rerun only the stages whose cached output went stale
+        reused = {} if force_refresh else _reusable_stages(cache, company_url)
+        outputs = asyncio.run(pipeline.run(
+            company_url, output_format, on_progress, deadline, on_result, reused
+        ))
+        final_brief = outputs.pop("final_brief")
+
+        # Update cache. Checkpointed stages may come from an earlier attempt,
+        # so the outputs are dated from when the job was created.
+        cache.store(
+            company_url, _rerun_outputs(outputs, reused),
+            started_at=job.created_at if job else None
         )
-        
-        # Update cache
-        _update_cache(db, company_url, {
-            "crawl_data": crawled_data,
-            "analyzed_data": analyzed_data,
-            "enriched_data": enriched_data
-        })
-        
-        # Complete job
-        job.status = "completed"
-        job.progress = 1.0
-        job.result = final_brief
-        db.commit()
-        
+
+        # Complete job and every job that coalesced onto it
+        follower_ids = _release_followers(db, coalescer, key, job_id)
+        version = _publish_final(snapshots, [job_id, *follower_ids], final_brief)
+        _update_jobs(
+            db, job, follower_ids, tracker,
+            status="completed", progress=1.0, result=final_brief,
+            result_metadata=_result_metadata(deadline), version=version
+        )
+        checkpoints.clear()
+        # Checking for a redirect can take several HTTP hops, none of which
+        # the result waits on
+        register_company_alias.delay(company_url)
+
         return final_brief
 
     except Exception as e:
-        job.status = "failed"
-        job.error = str(e)
-        db.commit()
+        db.rollback()
+        if self.request.retries < self.max_retries:
+            # Keep the lease, lane slot and checkpoints; the retry resumes
+            # where we stopped
+            retrying = True
+            tracker.update([job_id, *coalescer.followers(key)], error=str(e))
+            raise self.retry(
+                exc=e,
+                countdown=settings.JOB_RETRY_BACKOFF * 2 ** self.request.retries
+            )
+        _update_jobs(
+            db, job, _release_followers(db, coalescer, key, job_id), tracker,
+            status="failed", error=str(e)
+        )
         raise
 
-def _check_cache(db, company_url: str) -> Optional[Dict]:
-    """Check if valid cached data exists"""
-    cache = db.query(ResearchCache).filter(
-        ResearchCache.company_url == company_url,
-        ResearchCache.cache_valid_until > datetime.utcnow()
-    ).first()
-    return cache
-
-def _update_cache(db, company_url: str, data: Dict):
-    """Update cache with new data"""
-    cache = ResearchCache(
-        company_url=company_url,
-        **data,
-        cache_valid_until=datetime.utcnow() + timedelta(days=1)
+    finally:
+        db.close()
+        if scheduling and not retrying:
+            FairScheduler().complete(scheduling["lane"], scheduling["tenant"], job_id)
+
+@celery.task
+def register_company_alias(company_url: str):
+    """Let later requests for a redirecting domain share the target's identity"""
+    target = redirect_target(company_url)
+    if not target:
+        return
+    db = SessionLocal()
+    try:
+        CompanyIdentityResolver(db).register_alias(company_url, f"https://{target}")
+    finally:
+        db.close()
+
+@celery.task
+def dispatch_research_queues():
+    """Fill free slots in every scheduler lane"""
+    scheduler = FairScheduler()
+    for lane in settings.SCHEDULER_LANES:
+        scheduler.dispatch(lane)
+
+@celery.task
+def extend_queued_leases():
+    """
+    Keep the single-flight leases of jobs waiting in the scheduler alive, so
+    jobs that queue for longer than the lease keep their followers
+    """
+    scheduler = FairScheduler()
+    coalescer = JobCoalescer()
+    for lane in settings.SCHEDULER_LANES:
+        leases = [
+            (job["lease"], job["job_id"])
+            for job in scheduler.queued(lane) if job.get("lease")
+        ]
+        for start in range(0, len(leases), settings.BATCH_ENQUEUE_SIZE):
+            coalescer.heartbeat_many(leases[start:start + settings.BATCH_ENQUEUE_SIZE])
+
+@celery.task
+def refresh_research_cache(
+    company_url: str,
+    ahead: float = 0,
+    scheduling: Optional[Dict] = None
+):
+    """
+    Re-run the stale stages of a company's cache entry, and those expiring
+    within `ahead` seconds. Runs in a batch lane slot; request_refresh
+    ensures one refresh per company at a time.
+    """
+    started_at = datetime.utcnow()
+    db = SessionLocal()
+    cache = ResearchCacheStore(db)
+    try:
+        reused = _reusable_stages(cache, company_url, fresh_for=ahead)
+        outputs = asyncio.run(
+            ResearchPipeline().run(company_url, None, reuse=reused)
+        )
+        cache.store(company_url, _rerun_outputs(outputs, reused), started_at)
+    finally:
+        cache.refresh_done(company_url)
+        db.close()
+        if scheduling:
+            FairScheduler().complete(
+                scheduling["lane"], scheduling["tenant"], scheduling["job_id"]
+            )
+
+@celery.task
+def warm_research_cache():
+    """Refresh popular cache entries before they expire"""
+    db = SessionLocal()
+    try:
+        CacheWarmer().warm(ResearchCacheStore(db))
+    finally:
+        db.close()
+
+@celery.task
+def train_crawl_dictionary():
+    """Retrain the compression dictionary for crawled pages"""
+    db = SessionLocal()
+    try:
+        CrawlBlobStore(db).train_dictionary()
+    finally:
+        db.close()
+
+@celery.task
+def enforce_retention():
+    """Create upcoming partitions and prune expired jobs, usage and cache rows"""
+    db = SessionLocal()
+    try:
+        RetentionManager(db).run()
+    finally:
+        db.close()
+
+@celery.task
+def deliver_webhooks(
+    callback_url: str,
+    events: Optional[List[Dict]] = None,
+    attempt: int = 0
+):
+    """
+    POST the completion events queued for a callback URL, or retry a batch
+    of them that failed before
+    """
+    WebhookDispatcher().deliver(callback_url, events, attempt)
+
+def _update_jobs(
+    db,
+    job: ResearchJob,
+    follower_ids: List[str],
+    tracker: Optional[ProgressTracker] = None,
+    **fields
+):
+    """
+    Apply the same state change to the leader job and its followers, and
+    mirror it to the progress store when one is given. Jobs that finish are
+    announced to their callback URLs.
+    """
+    for name, value in fields.items():
+        setattr(job, name, value)
+    if follower_ids:
+        db.query(ResearchJob).filter(
+            ResearchJob.id.in_(follower_ids)
+        ).update(fields, synchronize_session=False)
+    db.commit()
+
+    if tracker:
+        tracker.update(
+            [job.id, *follower_ids],
+            status=fields.get("status"),
+            progress=fields.get("progress"),
+            error=fields.get("error")
+        )
+
+    if fields.get("status") in FINISHED_STATUSES:
+        _queue_webhooks(db, job, follower_ids, fields)
+
+def _queue_webhooks(db, job: ResearchJob, follower_ids: List[str], fields: Dict):
+    """Queue a completion event for every finished job with a callback URL"""
+    callbacks = [(job.id, job.callback_url)] if job.callback_url else []
+    if follower_ids:
+        callbacks += db.query(ResearchJob.id, ResearchJob.callback_url).filter(
+            ResearchJob.id.in_(follower_ids),
+            ResearchJob.callback_url.isnot(None)
+        ).all()
+    if not callbacks:
+        return
+
+    # Results stay behind GET /research/{job_id}/result; events only announce
+    finished_at = datetime.utcnow().isoformat()
+    WebhookDispatcher().enqueue([
+        (callback_url, {
+            "job_id": job_id,
+            "status": fields["status"],
+            "error": fields.get("error"),
+            "finished_at": finished_at
+        })
+        for job_id, callback_url in callbacks
+    ])
+
+def _release_followers(db, coalescer: JobCoalescer, key: str, job_id: str) -> List[str]:
+    """
+    Release the lease and return the jobs to complete with this one: the
+    follower set in Redis, plus unfinished jobs whose row names this one as
+    their leader in case the set was lost
+    """
+    follower_ids = set(coalescer.release(key, job_id))
+    follower_ids.update(
+        follower_id for follower_id, in db.query(ResearchJob.id).filter(
+            ResearchJob.leader_job_id == job_id,
+            ResearchJob.status.notin_(FINISHED_STATUSES)
+        )
     )
-    db.add(cache)
-    db.commit()
\ No newline at end of file
+    return sorted(follower_ids)
+
+def _reusable_stages(
+    cache: ResearchCacheStore,
+    company_url: str,
+    fresh_for: float = 0
+) -> Dict[str, Any]:
+    """
+    Cached outputs that can stand in for their stage: the stages in pipeline
+    order that stay fresh for another `fresh_for` seconds, up to the first
+    one that does not, since every later stage is built on its output
+    """
+    validity = cache.stage_validity(company_url)
+    reused = {}
+    for stage in STAGE_FIELDS:
+        if validity.get(stage, 0) <= time.time() + fresh_for:
+            break
+        output = cache.load(company_url, stage)
+        if output is None:
+            break
+        reused[stage] = output
+    return reused
+
+def _rerun_outputs(outputs: Dict[str, Any], reused: Dict[str, Any]) -> Dict[str, Any]:
+    """Stage outputs that were produced by this run rather than reused"""
+    return {stage: output for stage, output in outputs.items() if stage not in reused}
+
+def _result_metadata(deadline: Optional[Deadline], cache_used: bool = False) -> Dict:
+    """How the result was produced, stored alongside it"""
+    return {
+        "cache_used": cache_used,
+        # What was cut to meet the deadline
+        "degradations": deadline.cuts if deadline else []
+    }
+
+def _publish_final(
+    snapshots: Optional[SnapshotStore],
+    job_ids: List[str],
+    result: Dict
+) -> int:
+    """Version of the final result; progressive jobs also get a last snapshot"""
+    if snapshots is None:
+        return 1
+    return snapshots.publish(job_ids, "completed", result, 1.0)
+
+def _generate_from_cache(
+    pipeline: ResearchPipeline,
+    enriched_data: Dict,
+    output_format: str,
+    deadline: Optional[Deadline] = None
+) -> Dict:
+    """Build the brief from cached enrichment, skipping crawl and analysis"""
+    return asyncio.run(pipeline.synthesize(
+        enriched_data,
+        output_format,
+        deadline.for_stage("synthesizing") if deadline else None
+    ))
\ No newline at end of file
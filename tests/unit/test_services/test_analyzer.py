@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from unittest.mock import patch, MagicMock
 from app.services.analyzer import AnalyzerService
@@ -14,8 +16,8 @@ async def test_analyze_content_success():
         "industry": "Technology"
     }
 
-    with patch("google.generativeai.GenerativeModel.generate_content") as mock_generate:
-        mock_generate.return_value = MagicMock(json=lambda: mock_response)
+    with patch("google.generativeai.GenerativeModel.generate_content_async") as mock_generate:
+        mock_generate.return_value = MagicMock(text=json.dumps(mock_response))
         result = await analyzer.analyze_content(test_data)
 
         assert result is not None
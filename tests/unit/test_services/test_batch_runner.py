@@ -0,0 +1,57 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.batch_runner import BatchRunner
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def make_runner(tmp_path, requests):
+    source = tmp_path / "requests.jsonl"
+    write_lines(source, [json.dumps(request) for request in requests])
+    pipeline = AsyncMock()
+    pipeline.run.return_value = {"final_brief": {"summary": "ok"}}
+    runner = BatchRunner(str(source), str(tmp_path / "results.jsonl"), pipeline=pipeline)
+    return runner, pipeline
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_results_written_before_the_crash(tmp_path):
+    runner, pipeline = make_runner(tmp_path, [
+        {"company_url": f"https://company{i}.com"} for i in range(3)
+    ])
+    output = tmp_path / "results.jsonl"
+    # Line 1 was written but the crash came before progress was saved, and
+    # the crash tore the record for line 2
+    write_lines(output, [json.dumps({"line": 0}), json.dumps({"line": 1})])
+    with open(output, "a", encoding="utf-8") as torn:
+        torn.write('{"line": 2, "sta')
+    (tmp_path / "results.jsonl.progress").write_text(json.dumps({"watermark": 1, "done": []}))
+
+    await runner.run()
+
+    assert pipeline.run.await_count == 1
+    assert [record["line"] for record in read_records(output)] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_requests_with_focus_areas_are_rejected(tmp_path):
+    runner, pipeline = make_runner(tmp_path, [
+        {"company_url": "https://example.com", "depth": "deep", "focus_areas": ["funding"]}
+    ])
+
+    counts = await runner.run()
+
+    record, = read_records(tmp_path / "results.jsonl")
+    assert counts == {"succeeded": 0, "failed": 1}
+    assert "focus_areas" in record["error"]
+    assert record["depth"] == "deep"
+    pipeline.run.assert_not_awaited()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.core.batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_a_batch():
+    batches = []
+
+    async def run_batch(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test", run_batch, window_ms=10, max_size=10)
+
+    results = await asyncio.gather(*(batcher.submit(n) for n in range(3)))
+
+    assert results == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting():
+    batches = []
+
+    async def run_batch(items):
+        batches.append(items)
+        return items
+
+    batcher = MicroBatcher("test", run_batch, window_ms=10000, max_size=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(n) for n in range(4))), timeout=1
+    )
+
+    assert results == [0, 1, 2, 3]
+    assert batches == [[0, 1], [2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_by_combined_prompt_size():
+    batches = []
+
+    async def run_batch(items):
+        batches.append(items)
+        return items
+
+    batcher = MicroBatcher("test", run_batch, window_ms=10, max_size=10, max_chars=10)
+    prompts = ["aaaa", "bbbb", "cccc", "d" * 12, "e"]
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(prompt) for prompt in prompts)), timeout=1
+    )
+
+    assert results == prompts
+    # An oversized prompt still goes out, on its own
+    assert batches == [["aaaa", "bbbb"], ["cccc"], ["d" * 12], ["e"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_reach_every_caller():
+    async def run_batch(items):
+        return items[:1]
+
+    batcher = MicroBatcher("test", run_batch, window_ms=1, max_size=10)
+
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_flush_tasks_are_referenced_until_done():
+    release = asyncio.Event()
+
+    async def run_batch(items):
+        await release.wait()
+        return items
+
+    batcher = MicroBatcher("test", run_batch, window_ms=10000, max_size=1)
+
+    submitted = asyncio.ensure_future(batcher.submit(1))
+    await asyncio.sleep(0)
+    assert len(batcher._running) == 1
+
+    release.set()
+    assert await submitted == 1
+    await asyncio.sleep(0)
+    assert not batcher._running
@@ -0,0 +1,53 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.cache_warmer import POPULARITY_KEY, CacheWarmer
+
+
+def test_decay_halves_scores_after_one_half_life():
+    redis = MagicMock()
+    redis.get.return_value = str(time.time() - settings.CACHE_POPULARITY_HALF_LIFE)
+
+    CacheWarmer(redis).decay()
+
+    weights = redis.pipeline.return_value.zunionstore.call_args[0][1]
+    assert weights[POPULARITY_KEY] == pytest.approx(0.5, rel=1e-3)
+
+
+def test_warm_refreshes_only_popular_entries_about_to_expire():
+    now = time.time()
+    redis = MagicMock()
+    redis.get.return_value = None
+    redis.zrevrange.return_value = ["https://soon.com", "https://later.com", "https://new.com"]
+    cache = MagicMock()
+    cache.stage_validity.side_effect = lambda url: {
+        "https://soon.com": {"crawl_data": now + 86400, "enriched_data": now + 60},
+        "https://later.com": {"crawl_data": now + 86400, "enriched_data": now + 86400},
+        "https://new.com": {}
+    }[url]
+    cache.request_refresh.return_value = True
+
+    with patch("app.services.cache_warmer.FairScheduler") as scheduler:
+        scheduler.return_value.idle_slots.return_value = 4
+        refreshed = CacheWarmer(redis).warm(cache)
+
+    assert refreshed == ["https://soon.com"]
+    cache.request_refresh.assert_called_once_with(
+        "https://soon.com", ahead=settings.CACHE_WARM_LEAD
+    )
+
+
+def test_warm_does_nothing_while_batch_lane_is_busy():
+    redis = MagicMock()
+    redis.get.return_value = None
+    redis.zrevrange.return_value = ["https://soon.com"]
+    cache = MagicMock()
+
+    with patch("app.services.cache_warmer.FairScheduler") as scheduler:
+        scheduler.return_value.idle_slots.return_value = 0
+        assert CacheWarmer(redis).warm(cache) == []
+
+    cache.request_refresh.assert_not_called()
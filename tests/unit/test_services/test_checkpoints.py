@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.domain.database_models import ResearchCheckpoint
+from app.services.checkpoints import CheckpointStore
+from app.services.pipeline import hash_stage_input
+
+
+@pytest.fixture
+def checkpoints(db):
+    store = CheckpointStore(db, "job-1")
+    yield store
+    store.clear()
+
+
+def test_checkpoint_is_returned_only_for_the_same_input(checkpoints):
+    checkpoints.save("crawling", hash_stage_input("https://acme.com"), {"page": "<p>Acme</p>"})
+
+    assert checkpoints.load("crawling", hash_stage_input("https://acme.com")) == {"page": "<p>Acme</p>"}
+    assert checkpoints.load("crawling", hash_stage_input("https://globex.com")) is None
+    # Other jobs do not see it
+    assert CheckpointStore(checkpoints.db, "job-2").load(
+        "crawling", hash_stage_input("https://acme.com")
+    ) is None
+
+
+def test_expired_checkpoint_is_discarded(checkpoints, db):
+    input_hash = hash_stage_input("https://acme.com")
+    checkpoints.save("crawling", input_hash, {"page": "<p>Acme</p>"})
+    db.query(ResearchCheckpoint).update({"created_at": datetime.utcnow() - timedelta(days=2)})
+    db.commit()
+
+    assert checkpoints.load("crawling", input_hash) is None
+
+    # Saving again restarts the TTL
+    checkpoints.save("crawling", input_hash, {"page": "<p>Acme</p>"})
+    assert checkpoints.load("crawling", input_hash) == {"page": "<p>Acme</p>"}
+
@@ -0,0 +1,95 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.coalescer import (
+    AsyncJobCoalescer,
+    JobCoalescer,
+    canonical_company_url,
+    coalescing_key
+)
+from app.services.scheduler import AsyncFairScheduler, FairScheduler
+
+
+def test_canonical_company_url_normalizes_host():
+    assert canonical_company_url("http://www.Example.com/") == "https://example.com"
+    assert canonical_company_url("https://example.com") == "https://example.com"
+
+
+def test_coalescing_key_ignores_focus_area_order():
+    first = coalescing_key("https://example.com", "basic", ["funding", "products"], "json")
+    second = coalescing_key("https://www.example.com/", "basic", ["products", "funding"], "json")
+
+    assert first == second
+
+
+def test_coalescing_key_depends_on_request_shape():
+    basic = coalescing_key("https://example.com", "basic", [], "json")
+    deep = coalescing_key("https://example.com", "deep", [], "json")
+
+    assert basic != deep
+
+
+def test_queued_leader_keeps_its_lease_and_followers_past_the_ttl():
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.worker import extend_queued_leases
+
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    coalescer = JobCoalescer(redis, lease_ttl=1)
+    scheduler = FairScheduler(redis)
+    key = coalescing_key("https://example.com", "deep", [], "json")
+
+    assert coalescer.join(key, "leader") is None
+    with patch.object(FairScheduler, "dispatch"):
+        # Every batch slot is busy, so the leader stays queued
+        scheduler.submit("batch", None, "leader", ["leader"], lease=key)
+    assert coalescer.join(key, "follower") == "leader"
+
+    with patch("app.worker.FairScheduler", return_value=scheduler), \
+            patch("app.worker.JobCoalescer", return_value=coalescer):
+        for _ in range(3):
+            time.sleep(0.5)
+            extend_queued_leases()
+
+    # Past the lease TTL, new requests still attach to the queued leader
+    assert coalescer.join(key, "late") == "leader"
+    assert sorted(coalescer.release(key, "leader")) == ["follower", "late"]
+
+
+def test_followers_recorded_on_their_rows_survive_a_lost_follower_set():
+    from app.worker import _release_followers
+
+    coalescer = MagicMock()
+    coalescer.release.return_value = ["in-redis"]
+    db = MagicMock()
+    db.query.return_value.filter.return_value = [("in-redis",), ("only-in-db",)]
+
+    assert _release_followers(db, coalescer, "key", "leader") == ["in-redis", "only-in-db"]
+
+
+@pytest.mark.asyncio
+async def test_api_side_coalescing_and_scheduling_do_not_block_the_loop():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    coalescer = AsyncJobCoalescer(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    scheduler = AsyncFairScheduler(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    key = coalescing_key("https://example.com", "basic", [], "json")
+    sent = []
+
+    def send_to_celery(lane, payloads):
+        sent.append((threading.current_thread(), len(payloads)))
+        return ["leader"]
+
+    assert await coalescer.join(key, "leader") is None
+    with patch("app.services.scheduler.send_to_celery", side_effect=send_to_celery):
+        assert await scheduler.submit("interactive", None, "leader", ["leader"], lease=key) == ["leader"]
+    assert await coalescer.join_many([(key, "a"), (key, "b")]) == ["leader", "leader"]
+
+    # Celery is published to off the event loop's thread
+    assert sent and sent[0][0] is not threading.current_thread() and sent[0][1] == 1
+    # Workers see the same lease and followers through the sync client
+    worker_side = JobCoalescer(fakeredis.FakeRedis(server=server, decode_responses=True))
+    assert sorted(worker_side.release(key, "leader")) == ["a", "b"]
+
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.core.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    InMemoryConcurrencyBackend,
+    RedisConcurrencyBackend,
+    is_overload_error
+)
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def test_is_overload_error():
+    assert is_overload_error(asyncio.TimeoutError())
+    assert is_overload_error(RateLimitError("slow down"))
+    assert is_overload_error(Exception("HTTP 429 Too Many Requests"))
+    assert not is_overload_error(ValueError("bad request"))
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_healthy():
+    limiter = AdaptiveConcurrencyLimiter("test", InMemoryConcurrencyBackend(), initial_limit=2, max_limit=10)
+
+    for _ in range(20):
+        async with limiter.slot():
+            pass
+
+    assert limiter.limit > 2
+    assert limiter.limit <= 10
+
+
+@pytest.mark.asyncio
+async def test_limit_halves_on_throttling():
+    limiter = AdaptiveConcurrencyLimiter("test", InMemoryConcurrencyBackend(), initial_limit=8, max_limit=10)
+
+    with pytest.raises(RateLimitError):
+        async with limiter.slot():
+            raise RateLimitError()
+
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_calls_beyond_limit_wait():
+    limiter = AdaptiveConcurrencyLimiter("test", InMemoryConcurrencyBackend(), initial_limit=2, max_limit=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_limit_is_shared_between_worker_processes():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    # One limiter per worker process, sharing state through Redis
+    first, second = (
+        AdaptiveConcurrencyLimiter("shared", RedisConcurrencyBackend(redis), initial_limit=4)
+        for _ in range(2)
+    )
+
+    with pytest.raises(RateLimitError):
+        async with first.slot():
+            raise RateLimitError()
+
+    held = [await second.acquire(), await second.acquire()]
+    granted, limit, in_flight = second.backend.try_acquire("shared", "extra", second.policy)
+    assert (granted, limit, in_flight) == (False, 2.0, 2)
+
+    for lease_id in held:
+        second.release(lease_id, 0.1)
+    assert second.in_flight == 0
@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+import zstandard as zstd
+from sqlalchemy.dialects import postgresql
+
+from app.services import crawl_blobs
+from app.services.crawl_blobs import MANIFEST, CrawlBlobStore, is_manifest
+
+PAGES = {
+    "https://acme.com/": "<nav>Home About Pricing</nav><h1>Acme rockets</h1>",
+    "https://acme.com/about": "<nav>Home About Pricing</nav><h1>About Acme</h1>",
+    "https://acme.com/index.html": "<nav>Home About Pricing</nav><h1>Acme rockets</h1>"
+}
+
+
+def stored_blobs(db):
+    """Rows written by the last put(), read back from the insert statement"""
+    params = db.execute.call_args[0][0].compile(dialect=postgresql.dialect()).params
+    count = len([name for name in params if name.startswith("hash_m")])
+    return [
+        (params[f"hash_m{index}"], params[f"dictionary_id_m{index}"], params[f"data_m{index}"])
+        for index in range(count)
+    ]
+
+
+def test_identical_pages_are_stored_once():
+    db = MagicMock()
+    db.query.return_value.scalar.return_value = None
+
+    manifest = CrawlBlobStore(db).put(PAGES)
+
+    assert is_manifest(manifest)
+    hashes = manifest[MANIFEST]
+    assert hashes["https://acme.com/"] == hashes["https://acme.com/index.html"]
+    assert len(stored_blobs(db)) == 2
+
+
+def test_pages_round_trip_through_trained_dictionary():
+    samples = [f"<nav>Home About Pricing</nav><p>Page {index}</p>".encode() for index in range(200)]
+    crawl_blobs._dictionaries[42] = zstd.train_dictionary(1024, samples)
+    db = MagicMock()
+    db.query.return_value.scalar.return_value = 42
+
+    store = CrawlBlobStore(db)
+    manifest = store.put(PAGES)
+    db.query.return_value.filter.return_value.all.return_value = stored_blobs(db)
+
+    assert all(dictionary_id == 42 for _, dictionary_id, _ in stored_blobs(db))
+    assert store.get(manifest) == PAGES
+
+
+def test_missing_blob_invalidates_manifest():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = []
+
+    assert CrawlBlobStore(db).get({MANIFEST: {"https://acme.com/": "0" * 64}}) is None
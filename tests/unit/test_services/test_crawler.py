@@ -1,7 +1,13 @@
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
 from app.services.crawler import CrawlerService
+from app.core import concurrency
+from app.core.config import settings
+from app.core.deadline import Deadline
 from app.core.exceptions import CrawlerException
+from app.core.quota import get_quota_manager
 
 
 @pytest.mark.asyncio
@@ -32,4 +38,29 @@ async def test_crawl_website_failure():
         mock_scrape.side_effect = Exception("Crawling failed")
 
         with pytest.raises(CrawlerException):
-            await crawler.crawl_website(test_url)
\ No newline at end of file
+            await crawler.crawl_website(test_url)
+
+@pytest.mark.asyncio
+async def test_expired_deadline_still_crawls_the_homepage():
+    crawler = CrawlerService()
+    crawler.profiles = MagicMock()
+    crawler.profiles.is_dead.return_value = False
+    crawler.profiles.timeout_for.return_value = 12
+    crawler.client = MagicMock()
+    crawler.client.scrape_url.return_value = {"status": "success", "content": "Acme home"}
+    # Queued for longer than the whole budget
+    deadline = Deadline(time.time() - 60)
+
+    with patch.object(settings, "QUOTA_BACKEND", "memory"), \
+            patch.object(settings, "PROVIDER_CONCURRENCY_BACKEND", "memory"):
+        get_quota_manager.cache_clear()
+        concurrency._limiters.clear()
+        result = await crawler.crawl_website("https://acme.com", deadline=deadline)
+    get_quota_manager.cache_clear()
+    concurrency._limiters.clear()
+
+    assert result == {"https://acme.com": "Acme home"}
+    crawler.client.scrape_url.assert_called_once()
+    assert crawler.client.scrape_url.call_args.kwargs["params"]["timeout"] == 12
+    crawler.client.crawl_url.assert_not_called()
+    assert deadline.cuts
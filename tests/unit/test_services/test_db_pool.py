@@ -0,0 +1,58 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.db_pool import instrumented_pool
+
+
+def sample(name, pool):
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0.0
+
+
+def make_engine(pool):
+    return create_engine(
+        "sqlite://",
+        poolclass=instrumented_pool(QueuePool, pool),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+
+
+def test_exports_checkouts_in_use_and_overflow():
+    engine = make_engine("test_usage")
+
+    first = engine.connect()
+    first.execute(text("SELECT 1"))
+    second = engine.connect()
+
+    assert sample("db_pool_connections_in_use", "test_usage") == 2
+    assert sample("db_pool_overflow_connections", "test_usage") == 1
+    assert sample("db_pool_connections_opened_total", "test_usage") == 2
+    assert sample("db_pool_checkout_seconds_count", "test_usage") == 2
+
+    second.close()
+    first.close()
+    assert sample("db_pool_connections_in_use", "test_usage") == 0
+
+
+def test_counts_checkout_timeouts():
+    engine = make_engine("test_timeouts")
+    held = [engine.connect(), engine.connect()]
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    assert sample("db_pool_timeouts_total", "test_timeouts") == 1
+    for connection in held:
+        connection.close()
+
+
+def test_survives_pool_recreation():
+    engine = make_engine("test_recreate")
+    engine.dispose()
+
+    with engine.connect():
+        assert sample("db_pool_connections_in_use", "test_recreate") == 1
@@ -0,0 +1,33 @@
+import time
+
+from app.core.config import settings
+from app.core.deadline import Deadline, deadline_seconds
+
+
+def test_deadline_defaults_by_depth():
+    assert deadline_seconds("basic") == settings.JOB_DEADLINES["basic"]
+    assert deadline_seconds("deep", 45) == 45
+    assert deadline_seconds("deep", 10 ** 6) == settings.JOB_MAX_DEADLINE
+
+
+def test_stage_budgets_share_the_time_left():
+    deadline = Deadline.after(100)
+
+    crawl = deadline.for_stage("crawling")
+    synthesis = deadline.for_stage("synthesizing")
+
+    # The first stage gets its share, the last stage everything that is left
+    assert 39 < crawl.remaining() <= 40
+    assert 99 < synthesis.remaining() <= 100
+
+
+def test_cuts_are_recorded_on_the_job():
+    deadline = Deadline(time.time() - 1)
+    stage = deadline.for_stage("enriching")
+
+    assert stage.expired()
+    stage.cut("Skipped 4 of 4 enrichment queries")
+
+    assert deadline.cuts == [
+        {"stage": "enriching", "detail": "Skipped 4 of 4 enrichment queries"}
+    ]
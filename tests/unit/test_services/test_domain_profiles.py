@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock
+
+from app.core.config import settings
+from app.services.domain_profiles import DomainLatencyProfiles, domain_of
+
+
+def profiles_with(state):
+    redis = MagicMock()
+    redis.hgetall.return_value = state
+    return DomainLatencyProfiles(redis=redis)
+
+
+def test_domain_of_strips_www():
+    assert domain_of("https://www.Example.com/about") == "example.com"
+
+
+def test_timeout_defaults_until_enough_samples():
+    profiles = profiles_with({"ewma": "2.0", "var": "0.0", "samples": "1", "failures": "0"})
+
+    assert profiles.timeout_for("example.com") == settings.CRAWLER_TIMEOUT
+
+
+def test_timeout_follows_latency_within_bounds():
+    fast = profiles_with({"ewma": "0.5", "var": "0.0", "samples": "50", "failures": "0"})
+    slow = profiles_with({"ewma": "40.0", "var": "16.0", "samples": "50", "failures": "0"})
+    very_slow = profiles_with({"ewma": "900.0", "var": "0.0", "samples": "50", "failures": "0"})
+
+    assert fast.timeout_for("fast.com") == settings.CRAWL_TIMEOUT_FLOOR
+    # p95 ~ 40 + 1.645 * 4, times the multiplier
+    assert slow.timeout_for("slow.com") == 70
+    assert very_slow.timeout_for("very-slow.com") == settings.CRAWLER_TIMEOUT
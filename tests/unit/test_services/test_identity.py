@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from app.core.validation import DataValidator
+from app.services import identity
+from app.services.identity import CompanyIdentityResolver, redirect_target
+
+
+@pytest.fixture(autouse=True)
+def clear_known_identities():
+    identity._known.clear()
+    yield
+    identity._known.clear()
+
+
+def test_url_variants_and_aliases_resolve_to_one_company():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [("acme.io", "acme.com")]
+    resolver = CompanyIdentityResolver(db)
+
+    identities = resolver.resolve_many([
+        "https://acme.com", "http://www.Acme.com/about", "https://acme.io/", "https://globex.com"
+    ])
+
+    assert [i.company_id for i in identities] == ["acme.com", "acme.com", "acme.com", "globex.com"]
+    assert identities[0].canonical_url == "https://acme.com"
+
+    # Known domains are answered from memory
+    db.query.reset_mock()
+    assert resolver.resolve("https://www.acme.io").company_id == "acme.com"
+    db.query.assert_not_called()
+
+
+def client_with(locations):
+    """Client whose responses redirect each host to locations[host]"""
+    def handler(request):
+        location = locations.get(request.url.host)
+        if location:
+            return httpx.Response(301, headers={"Location": location})
+        return httpx.Response(200)
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_redirect_target_follows_homepage_redirects():
+    client = client_with({"acme.com": "https://www.acme.io/", "www.acme.io": "/en/"})
+
+    with patch("app.services.identity.resolve_public_url"):
+        assert redirect_target("https://acme.com", client) == "acme.io"
+        assert redirect_target("https://acme.io", client) is None
+
+
+def test_companies_sharing_a_host_are_not_merged():
+    # Both crawls landed on pages of the site builder hosting them, but
+    # neither homepage redirects, so neither becomes an alias
+    client = client_with({})
+    db = MagicMock()
+
+    with patch("app.services.identity.resolve_public_url"):
+        for company_url in ("https://acme.com", "https://globex.com"):
+            target = redirect_target(company_url, client)
+            if target:
+                CompanyIdentityResolver(db).register_alias(company_url, f"https://{target}")
+
+    db.execute.assert_not_called()
+
+
+def test_redirects_to_internal_addresses_are_ignored():
+    client = client_with({"acme.com": "http://169.254.169.254/latest/"})
+
+    with patch("app.core.validation.socket") as resolver:
+        resolver.getaddrinfo.return_value = [(None, None, None, "", ("93.184.215.14", 443))]
+        assert redirect_target("https://acme.com", client) is None
+
+
+def test_redirect_target_closes_the_client_it_opens():
+    client = client_with({"acme.com": "https://acme.io/"})
+
+    with patch("app.services.identity.httpx.Client", return_value=client):
+        with patch("app.services.identity.resolve_public_url"):
+            assert redirect_target("https://acme.com") == "acme.io"
+
+    assert client.is_closed
+
+
+def test_aliases_are_registered_outside_the_research_job():
+    from app.worker import register_company_alias
+
+    with patch("app.worker.SessionLocal") as session:
+        with patch("app.worker.CompanyIdentityResolver") as resolver:
+            with patch("app.worker.redirect_target", return_value="acme.io"):
+                register_company_alias("https://acme.com")
+
+    resolver.return_value.register_alias.assert_called_once_with(
+        "https://acme.com", "https://acme.io"
+    )
+    session.return_value.close.assert_called_once()
+
+
+def test_validate_url_keeps_path_case():
+    assert DataValidator.validate_url("HTTPS://Acme.COM/Team/CEO") == "https://acme.com/Team/CEO"
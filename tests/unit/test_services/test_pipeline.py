@@ -0,0 +1,208 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.enricher import EnricherService, same_company
+from app.services.pipeline import ResearchPipeline, provisional_intel
+
+
+class FakeCrawler:
+    async def crawl_website(self, url, on_progress=None, deadline=None):
+        return {url: "<title>Acme | Rockets for everyone</title>"}
+
+    async def provisional_company_name(self, url, crawled_data):
+        return "Acme"
+
+
+class FakeAnalyzer:
+    def __init__(self, company_name):
+        self.company_name = company_name
+
+    async def analyze_content(self, crawled_data, deadline=None):
+        return {"company_name": self.company_name}
+
+
+class FakeEnricher(EnricherService):
+    def __init__(self):
+        self.queries = []
+
+    async def _query_perplexity(self, query):
+        self.queries.append(query)
+        return query
+
+    def _update_company_data(self, company_data, enrichment_response):
+        company_data.setdefault("answers", []).append(enrichment_response)
+        return company_data
+
+
+class FakeSynthesizer:
+    async def generate_sales_brief(self, company_data, output_format="json", deadline=None):
+        return company_data
+
+
+class MemoryCheckpoints:
+    """CheckpointStore kept in a dict"""
+
+    def __init__(self):
+        self.saved = {}
+
+    def load(self, stage, input_hash):
+        return self.saved.get((stage, input_hash))
+
+    def save(self, stage, input_hash, output):
+        self.saved[(stage, input_hash)] = output
+
+
+def test_same_company_ignores_legal_suffixes():
+    assert same_company("Acme", "ACME, Inc.")
+    assert not same_company("Acme", "Acme Rockets")
+    assert not same_company("", "")
+
+
+@pytest.mark.asyncio
+async def test_speculative_enrichment_is_reused_when_name_matches():
+    enricher = FakeEnricher()
+    pipeline = ResearchPipeline(
+        FakeCrawler(), FakeAnalyzer("Acme Inc"), enricher, FakeSynthesizer()
+    )
+
+    outputs = await pipeline.run("https://acme.com", "json")
+
+    assert len(enricher.queries) == 4
+    assert all("Acme" in query for query in outputs["enriched_data"]["answers"])
+
+
+@pytest.mark.asyncio
+async def test_speculative_enrichment_is_reissued_when_name_differs():
+    enricher = FakeEnricher()
+    pipeline = ResearchPipeline(
+        FakeCrawler(), FakeAnalyzer("Globex"), enricher, FakeSynthesizer()
+    )
+
+    outputs = await pipeline.run("https://acme.com", "json")
+
+    assert len(enricher.queries) == 8
+    assert all("Globex" in query for query in outputs["enriched_data"]["answers"])
+
+
+def test_provisional_intel_from_homepage_metadata():
+    intel = provisional_intel(
+        "https://acme.com",
+        {"title": "Acme | Rockets for everyone", "description": "Rockets"}
+    )
+
+    assert intel["company_name"] == "Acme"
+    assert intel["value_propositions"] == ["Rockets"]
+    assert intel["key_products"] == []
+    assert intel["confidence_score"] == settings.PROGRESSIVE_CONFIDENCE["preview"]
+
+
+def test_provisional_intel_prefers_known_facts():
+    intel = provisional_intel(
+        "https://acme.com", {}, known={"company_name": "Acme Corp", "industry": "Aerospace"}
+    )
+
+    assert intel["company_name"] == "Acme Corp"
+    assert intel["industry"] == "Aerospace"
+    assert intel["confidence_score"] == settings.PROGRESSIVE_CONFIDENCE["cached"]
+
+
+@pytest.mark.asyncio
+async def test_reused_stages_are_not_rerun():
+    class FailingCrawler(FakeCrawler):
+        async def crawl_website(self, url, on_progress=None, deadline=None):
+            raise AssertionError("crawl should have been reused")
+
+    enricher = FakeEnricher()
+    pipeline = ResearchPipeline(
+        FailingCrawler(), FakeAnalyzer("Acme"), enricher, FakeSynthesizer()
+    )
+
+    outputs = await pipeline.run(
+        "https://acme.com", None,
+        reuse={"crawl_data": {}, "analyzed_data": {"company_name": "Acme"}}
+    )
+
+    assert "final_brief" not in outputs
+    assert len(enricher.queries) == 4
+
+
+@pytest.mark.asyncio
+async def test_mismatched_speculation_is_cancelled_without_waiting():
+    class SlowEnricher(FakeEnricher):
+        started = []
+        cancelled = []
+
+        async def _query_perplexity(self, query):
+            if "Acme" in query:
+                self.started.append(query)
+                try:
+                    await asyncio.sleep(30)
+                except asyncio.CancelledError:
+                    self.cancelled.append(query)
+                    raise
+            return await super()._query_perplexity(query)
+
+    enricher = SlowEnricher()
+    pipeline = ResearchPipeline(
+        FakeCrawler(), FakeAnalyzer("Globex"), enricher, FakeSynthesizer()
+    )
+
+    outputs = await asyncio.wait_for(pipeline.run("https://acme.com", "json"), 5)
+
+    assert all("Globex" in query for query in outputs["enriched_data"]["answers"])
+    assert enricher.started and len(enricher.cancelled) == len(enricher.started)
+
+
+@pytest.mark.asyncio
+async def test_retried_job_resumes_without_calling_providers_again():
+    class FailingEnricher(FakeEnricher):
+        async def _query_perplexity(self, query):
+            raise RuntimeError("provider down")
+
+    class UnusedCrawler(FakeCrawler):
+        async def crawl_website(self, url, on_progress=None, deadline=None):
+            raise AssertionError("crawl should have resumed from its checkpoint")
+
+    class UnusedAnalyzer(FakeAnalyzer):
+        async def analyze_content(self, crawled_data, deadline=None):
+            raise AssertionError("analysis should have resumed from its checkpoint")
+
+    checkpoints = MemoryCheckpoints()
+    with pytest.raises(HTTPException):
+        await ResearchPipeline(
+            FakeCrawler(), FakeAnalyzer("Acme"), FailingEnricher(), FakeSynthesizer(),
+            checkpoints=checkpoints
+        ).run("https://acme.com", "json")
+    assert [stage for stage, _ in checkpoints.saved] == ["crawling", "analyzing"]
+
+    enricher = FakeEnricher()
+    outputs = await ResearchPipeline(
+        UnusedCrawler(), UnusedAnalyzer("Acme"), enricher, FakeSynthesizer(),
+        checkpoints=checkpoints
+    ).run("https://acme.com", "json")
+
+    assert outputs["final_brief"]["company_name"] == "Acme"
+    assert len(enricher.queries) == 4
+
+
+@pytest.mark.asyncio
+async def test_stage_reruns_when_its_input_changed():
+    checkpoints = MemoryCheckpoints()
+    pipeline = ResearchPipeline(
+        FakeCrawler(), FakeAnalyzer("Acme"), FakeEnricher(), FakeSynthesizer(),
+        checkpoints=checkpoints
+    )
+    runs = []
+
+    async def run(stage_input):
+        runs.append(stage_input)
+        return {"company_name": stage_input["title"]}
+
+    assert await pipeline._stage("analyzing", {"title": "Acme"}, run) == {"company_name": "Acme"}
+    assert await pipeline._stage("analyzing", {"title": "Acme"}, run) == {"company_name": "Acme"}
+    assert await pipeline._stage("analyzing", {"title": "Globex"}, run) == {"company_name": "Globex"}
+    assert runs == [{"title": "Acme"}, {"title": "Globex"}]
+
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.services.progress import AsyncProgressTracker, ProgressTracker, finished_channel
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def test_update_writes_every_job_and_expires_it():
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    tracker = ProgressTracker(redis)
+    created_at = datetime(2026, 10, 19, 12, 0)
+
+    tracker.update(
+        ["leader", "follower"],
+        status="crawling", progress=0.1, message=None, created_at=created_at
+    )
+
+    for job_id in ("leader", "follower"):
+        state = tracker.get(job_id)
+        assert state["status"] == "crawling"
+        assert float(state["progress"]) == 0.1
+        assert state["created_at"] == created_at.isoformat()
+        assert "message" not in state and "updated_at" in state
+        assert 0 < redis.ttl(f"research:job:{job_id}") <= settings.PROGRESS_TTL
+    assert tracker.get("unknown") is None
+
+
+def test_later_updates_keep_earlier_fields_and_announce_completion():
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    tracker = ProgressTracker(redis)
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(finished_channel("job-1"))
+
+    tracker.update(["job-1"], status="analyzing", progress=0.4, created_at=datetime.utcnow())
+    tracker.update(["job-1"], progress=0.5, message="Extracting company profile")
+    assert pubsub.get_message(timeout=0.1) is None
+
+    tracker.update(["job-1"], status="completed", progress=1.0)
+
+    state = tracker.get("job-1")
+    assert (state["status"], state["message"]) == ("completed", "Extracting company profile")
+    assert "created_at" in state
+    assert pubsub.get_message(timeout=0.1)["data"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_api_reads_what_workers_write():
+    server = fakeredis.FakeServer()
+    worker_side = ProgressTracker(fakeredis.FakeRedis(server=server, decode_responses=True))
+    api_side = AsyncProgressTracker(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+
+    worker_side.update(["job-1"], status="enriching", progress=0.7)
+    assert (await api_side.get("job-1"))["status"] == "enriching"
+
+    await api_side.update(["job-1"], status="pending", progress=0.0)
+    assert worker_side.get("job-1")["status"] == "pending"
+    assert await api_side.get("unknown") is None
@@ -0,0 +1,83 @@
+import json
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core import concurrency
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.providers import gemini_model_for
+from app.core.quota import get_quota_manager
+from app.services.analyzer import AnalyzerService
+from app.services.crawler import CrawlerService
+
+
+@pytest.fixture(autouse=True)
+def local_backends():
+    with patch.object(settings, "QUOTA_BACKEND", "memory"), \
+            patch.object(settings, "PROVIDER_CONCURRENCY_BACKEND", "memory"), \
+            patch.object(settings, "HEDGE_ENABLED", False):
+        get_quota_manager.cache_clear()
+        concurrency._limiters.clear()
+        yield
+    get_quota_manager.cache_clear()
+    concurrency._limiters.clear()
+
+
+class BlockingFirecrawl:
+    """Shaped like FirecrawlApp: plain methods that block until answered"""
+
+    def __init__(self):
+        self.threads = []
+
+    def scrape_url(self, url, params=None):
+        self.threads.append(threading.current_thread())
+        return {"status": "success", "html": "<title>Acme | Rockets</title>"}
+
+
+class GeminiModel:
+    """Shaped like GenerativeModel: a blocking call and its async twin"""
+
+    def generate_content(self, prompt, **kwargs):
+        raise AssertionError("blocking Gemini call made on the event loop")
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return SimpleNamespace(text=json.dumps({"company_name": "Acme"}))
+
+
+@pytest.mark.asyncio
+async def test_blocking_sdk_calls_run_off_the_event_loop():
+    crawler = CrawlerService()
+    crawler.client = BlockingFirecrawl()
+    crawler.profiles = MagicMock()
+
+    metadata = await crawler.homepage_metadata("https://acme.com", timeout=5)
+
+    assert metadata["title"] == "Acme | Rockets"
+    assert crawler.client.threads and crawler.client.threads[0] is not threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_gemini_calls_use_the_async_client():
+    analyzer = AnalyzerService()
+
+    result = await analyzer._analyze_one("gemini-test", GeminiModel(), "Analyze Acme")
+
+    assert result == {"company_name": "Acme"}
+
+
+def test_short_stage_budget_switches_to_the_fast_model():
+    ample = Deadline.after(settings.DEADLINE_FAST_MODEL_BELOW + 60)
+    short = Deadline(ample.expires_at - 60, "analyzing", ample.cuts)
+
+    assert gemini_model_for(ample, "pro", "pro-model", "fast-model") == ("pro", "pro-model")
+    assert gemini_model_for(short, "pro", "pro-model", "fast-model") == (
+        settings.FAST_MODEL_NAME, "fast-model"
+    )
+    assert ample.cuts == [
+        {"stage": "analyzing", "detail": f"Used {settings.FAST_MODEL_NAME} instead of pro"}
+    ]
+    assert gemini_model_for(None, "pro", "pro-model", "fast-model") == ("pro", "pro-model")
+
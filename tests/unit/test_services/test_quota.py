@@ -0,0 +1,44 @@
+import pytest
+
+from app.core.exceptions import QuotaExceededException
+from app.core.quota import InMemoryQuotaBackend, QuotaManager
+
+QUOTAS = {
+    "gemini": {"capacity": 5, "refill": 0.001},
+    "gemini:pro": {"capacity": 2, "refill": 0.001}
+}
+
+
+@pytest.mark.asyncio
+async def test_model_bucket_limits_calls():
+    quota = QuotaManager(backend=InMemoryQuotaBackend(), quotas=QUOTAS, max_wait=0.1)
+
+    await quota.acquire("gemini", "pro")
+    await quota.acquire("gemini", "pro")
+
+    with pytest.raises(QuotaExceededException):
+        await quota.acquire("gemini", "pro")
+
+    # The provider bucket still has room for other models
+    await quota.acquire("gemini", "flash")
+
+
+@pytest.mark.asyncio
+async def test_refund_returns_quota():
+    quota = QuotaManager(backend=InMemoryQuotaBackend(), quotas=QUOTAS, max_wait=0.1)
+
+    reservation = await quota.acquire("gemini", cost=5)
+    reservation.settle(actual_cost=3)
+
+    await quota.acquire("gemini", cost=2)
+    with pytest.raises(QuotaExceededException):
+        await quota.acquire("gemini")
+
+
+@pytest.mark.asyncio
+async def test_unconfigured_provider_is_unlimited():
+    quota = QuotaManager(backend=InMemoryQuotaBackend(), quotas=QUOTAS)
+
+    reservation = await quota.acquire("perplexity", cost=1000)
+
+    assert reservation.buckets == []
@@ -0,0 +1,43 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend
+
+
+@pytest.mark.asyncio
+async def test_gcra_allows_a_burst_up_to_the_limit():
+    limiter = RateLimiter(backend=InMemoryRateLimitBackend(), limit=3, period=60)
+
+    results = [await limiter.check("tenant") for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(20, abs=0.5)
+    assert results[3].headers()["Retry-After"] == "20"
+
+    # Other keys have their own allowance
+    assert (await limiter.check("other")).allowed
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_state_when_redis_is_down():
+    backend = AsyncMock()
+    backend.check.side_effect = RedisConnectionError("down")
+    limiter = RateLimiter(backend=backend, limit=1, period=60)
+
+    assert (await limiter.check("tenant")).allowed
+    assert not (await limiter.check("tenant")).allowed
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_shares_state_without_blocking():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    first = RateLimiter(backend=RedisRateLimitBackend(redis), limit=2, period=60)
+    second = RateLimiter(backend=RedisRateLimitBackend(redis), limit=2, period=60)
+
+    assert (await first.check("tenant")).allowed
+    assert (await second.check("tenant")).allowed
+    assert not (await first.check("tenant")).allowed
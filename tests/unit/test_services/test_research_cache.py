@@ -0,0 +1,140 @@
+import json
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.domain.database_models import ResearchCache
+from app.services.research_cache import (
+    FRESH,
+    STALE,
+    LocalCache,
+    ResearchCacheStore,
+    stage_ttl
+)
+from app.services.scheduler import REFRESH_TASK, FairScheduler
+
+
+def test_local_cache_evicts_least_recently_used_by_size():
+    cache = LocalCache(max_bytes=10)
+    expires_at = time.time() + 60
+
+    cache.put(("a.com", "enriched_data"), "12345", expires_at)
+    cache.put(("b.com", "enriched_data"), "12345", expires_at)
+    cache.get(("a.com", "enriched_data"))
+    cache.put(("c.com", "enriched_data"), "12345", expires_at)
+
+    assert cache.get(("a.com", "enriched_data")) == "12345"
+    assert cache.get(("b.com", "enriched_data")) is None
+    assert cache.size == 10
+
+
+def test_local_cache_drops_expired_and_invalidated_entries():
+    cache = LocalCache(max_bytes=100)
+
+    cache.put(("a.com", "expiry"), "1", time.time() - 1)
+    cache.put(("b.com", "expiry"), "1", time.time() + 60)
+    cache.put(("b.com", "enriched_data"), "{}", time.time() + 60)
+    cache.evict("b.com")
+
+    assert cache.get(("a.com", "expiry")) is None
+    assert cache.get(("b.com", "enriched_data")) is None
+    assert cache.size == 0
+
+
+def test_store_reports_stale_entries_until_they_expire():
+    redis = MagicMock()
+    store = ResearchCacheStore(MagicMock(), redis=redis, local=LocalCache(max_bytes=100))
+    now = time.time()
+
+    def cached(enriched_until, stale_until):
+        store.local.clear()
+        expiry = json.dumps({
+            "stale_until": stale_until,
+            "stages": {
+                "crawl_data": now + 600,
+                "analyzed_data": now + 600,
+                "enriched_data": enriched_until
+            }
+        })
+        redis.hmget.return_value = (expiry, expiry)
+
+    cached(now + 60, now + 120)
+    assert store.freshness("a.com") == FRESH
+
+    cached(now - 60, now + 120)
+    assert store.freshness("a.com") == STALE
+
+    # The crawl is still reusable once the entry can no longer be served
+    cached(now - 120, now - 60)
+    assert store.freshness("a.com") is None
+    assert store.stage_validity("a.com")["crawl_data"] == now + 600
+
+
+def test_store_writes_stages_that_were_never_stored():
+    db = MagicMock()
+    store = ResearchCacheStore(db, redis=MagicMock(), local=LocalCache(max_bytes=100))
+
+    store.store("a.com", {"enriched_data": {"company_name": "Acme"}})
+
+    statement = db.execute.call_args[0][0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    where = sql.split(" WHERE ")[-1]
+    assert "research_cache.enriched_valid_until IS NULL OR" in where
+
+
+def test_store_dates_validity_from_the_run_start():
+    db = MagicMock()
+    store = ResearchCacheStore(db, redis=MagicMock(), local=LocalCache(max_bytes=100))
+    started_at = datetime.utcnow() - timedelta(hours=1)
+
+    store.store("a.com", {"enriched_data": {"company_name": "Acme"}}, started_at)
+
+    params = db.execute.call_args[0][0].compile(dialect=postgresql.dialect()).params
+    assert params["enriched_valid_until"] == started_at + timedelta(
+        seconds=stage_ttl("enriched_data")
+    )
+
+
+def test_stale_refresh_finishing_last_keeps_the_newer_write(db):
+    store = ResearchCacheStore(db, redis=MagicMock(), local=LocalCache(max_bytes=100))
+    refresh_started = datetime.utcnow() - timedelta(minutes=10)
+    job_started = datetime.utcnow() - timedelta(minutes=5)
+
+    try:
+        store.store("https://acme.com", {"enriched_data": {"company_name": "New"}}, job_started)
+        store.store("https://acme.com", {"enriched_data": {"company_name": "Old"}}, refresh_started)
+
+        row = db.query(ResearchCache).filter(
+            ResearchCache.company_url == "https://acme.com"
+        ).one()
+        assert row.enriched_data == {"company_name": "New"}
+        assert row.version == 1
+    finally:
+        db.query(ResearchCache).delete()
+        db.commit()
+
+
+def test_refresh_is_queued_through_the_batch_lane():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    store = ResearchCacheStore(MagicMock(), redis=redis, local=LocalCache(max_bytes=100))
+    sent = []
+
+    def send_to_celery(lane, payloads):
+        sent.extend((lane, json.loads(payload)) for payload in payloads)
+        return []
+
+    with patch("app.services.scheduler.send_to_celery", side_effect=send_to_celery):
+        assert store.request_refresh("https://acme.com", ahead=60)
+        assert not store.request_refresh("https://acme.com", ahead=60)
+
+    [(lane, job)] = sent
+    assert lane == "batch"
+    assert job["task"] == REFRESH_TASK
+    assert job["args"] == ["https://acme.com", 60]
+    # The refresh holds a batch slot, so the warmer sees the lane as busier
+    assert FairScheduler(redis).idle_slots("batch") == settings.SCHEDULER_LANES["batch"] - 1
@@ -1,6 +1,61 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
 from fastapi.testclient import TestClient
+from app.api.v1.endpoints import research
+from app.core.config import settings
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimiter
 from app.main import app
+from app.models.database import get_db
+from app.services.coalescer import AsyncJobCoalescer
+from app.services.identity import domain_of, identity_for
+from app.services.progress import AsyncProgressTracker
+from app.services.scheduler import AsyncFairScheduler, tenant_for
+
+HEADERS = {settings.API_KEY_NAME: settings.API_KEY}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """
+    Client for the research routes on fake Redis and a mocked session.
+    Jobs handed to Celery are collected in api.sent as (lane, payload).
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(research, "coalescer", AsyncJobCoalescer(redis))
+    monkeypatch.setattr(research, "scheduler", AsyncFairScheduler(redis))
+    monkeypatch.setattr(research, "tracker", AsyncProgressTracker(redis))
+    monkeypatch.setattr(research, "_resolve_identities", AsyncMock(
+        side_effect=lambda db, urls: [identity_for(domain_of(url)) for url in urls]
+    ))
+
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+
+    async def get_test_db():
+        yield db
+
+    client = TestClient(app)
+    client.db = db
+    client.redis = redis
+    client.sent = []
+
+    def send_to_celery(lane, payloads):
+        client.sent.extend((lane, json.loads(payload)) for payload in payloads)
+        return []
+
+    limiter = RateLimiter(backend=InMemoryRateLimitBackend(), limit=1000, period=60)
+    app.dependency_overrides[get_db] = get_test_db
+    with patch("app.api.dependencies.get_rate_limiter", return_value=limiter):
+        with patch("app.services.scheduler.send_to_celery", side_effect=send_to_celery):
+            yield client
+    app.dependency_overrides.clear()
 
 
 def test_initiate_research(client: TestClient, api_key_headers: Dict[str, str]):
@@ -41,4 +96,110 @@ def test_get_research_status(client: TestClient, api_key_headers: Dict[str, str]
 
     assert status_response.status_code == 200
     assert "status" in status_response.json()
-    assert "progress" in status_response.json()
\ No newline at end of file
+    assert "progress" in status_response.json()
+
+
+def test_research_routes_require_a_key_within_its_rate_limit():
+    limiter = RateLimiter(backend=InMemoryRateLimitBackend(), limit=1, period=60)
+    asyncio.run(limiter.check(tenant_for(settings.API_KEY)))
+    client = TestClient(app)
+
+    with patch("app.api.dependencies.get_rate_limiter", return_value=limiter):
+        assert client.get("/api/v1/research/research/job-1").status_code == 403
+        for path in ("/research", "/research/batch"):
+            response = client.post(f"/api/v1/research{path}", headers=HEADERS, json={})
+            assert response.status_code == 429
+        response = client.get("/api/v1/research/research/job-1", headers=HEADERS)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+
+
+def test_jobs_are_scheduled_under_the_verified_key(api):
+    limiter = RateLimiter(backend=InMemoryRateLimitBackend(), limit=1, period=60)
+
+    with patch("app.api.dependencies.get_rate_limiter", return_value=limiter):
+        response = api.post(
+            "/api/v1/research/research",
+            headers=HEADERS,
+            json={"company_url": "https://acme.com"}
+        )
+        # The router and the endpoint share one verification, so the single
+        # allowed request was only counted once
+        assert response.status_code == 200
+        assert api.post(
+            "/api/v1/research/research",
+            headers=HEADERS,
+            json={"company_url": "https://acme.com"}
+        ).status_code == 429
+
+    [(lane, job)] = api.sent
+    assert (lane, job["job_id"]) == ("interactive", response.json()["job_id"])
+    assert job["tenant"] == tenant_for(settings.API_KEY)
+
+
+
+def test_batch_size_is_limited(api):
+    for count in (0, settings.BATCH_MAX_REQUESTS + 1):
+        response = api.post(
+            "/api/v1/research/research/batch",
+            headers=HEADERS,
+            json={"requests": [{"company_url": "https://acme.com"}] * count}
+        )
+        assert response.status_code == 422
+    assert not api.db.execute.called
+
+
+def test_batch_creates_a_job_per_item_in_the_batch_lane(api):
+    response = api.post(
+        "/api/v1/research/research/batch",
+        headers=HEADERS,
+        json={"requests": [
+            {"company_url": "https://acme.com", "depth": "basic"},
+            {"company_url": "https://www.globex.com/about", "depth": "deep"}
+        ]}
+    )
+
+    assert response.status_code == 200
+    batch = response.json()
+    _, rows = api.db.execute.call_args_list[0][0]
+    assert [row["id"] for row in rows] == batch["job_ids"]
+    assert {row["batch_id"] for row in rows} == {batch["batch_id"]}
+    assert [row["company_id"] for row in rows] == ["acme.com", "globex.com"]
+
+    # Bulk work never takes interactive slots, whatever its depth
+    assert [(lane, job["job_id"]) for lane, job in api.sent] == [
+        ("batch", job_id) for job_id in batch["job_ids"]
+    ]
+    assert [job["args"][1] for _, job in api.sent] == ["https://acme.com", "https://globex.com"]
+
+
+def test_duplicate_urls_in_a_batch_share_one_job(api):
+    response = api.post(
+        "/api/v1/research/research/batch",
+        headers=HEADERS,
+        json={"requests": [
+            {"company_url": "https://acme.com"},
+            {"company_url": "http://www.acme.com/"}
+        ]}
+    )
+
+    leader, follower = response.json()["job_ids"]
+    assert [job["job_id"] for _, job in api.sent] == [leader]
+    _, followers = api.db.execute.call_args_list[1][0]
+    assert [(row["id"], row["leader_job_id"]) for row in followers] == [(follower, leader)]
+
+
+def test_status_is_served_from_the_progress_store(api):
+    created_at = datetime(2026, 10, 19, 12, 0)
+    asyncio.run(AsyncProgressTracker(api.redis).update(
+        ["job-1"], status="analyzing", progress=0.4, message="Reading pages", created_at=created_at
+    ))
+
+    response = api.get("/api/v1/research/research/job-1", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "analyzing"
+    assert response.json()["progress"] == 0.4
+    # No database round trip for a job the workers are reporting on
+    api.db.execute.assert_not_called()
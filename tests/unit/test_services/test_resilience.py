@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ProviderUnavailableException
+from app.core.resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    hedge,
+    is_transient_error,
+    retry_with_backoff
+)
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+def test_is_transient_error():
+    assert is_transient_error(ServiceUnavailable())
+    assert is_transient_error(ConnectionError())
+    assert not is_transient_error(ValueError("bad request"))
+    assert not is_transient_error(ProviderUnavailableException("gemini"))
+
+
+def test_circuit_opens_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0)
+
+    breaker.record_failure(ServiceUnavailable())
+    breaker.record_failure(ServiceUnavailable())
+    assert breaker.state == OPEN
+
+    # Recovery timeout passed: one probe goes through, a second is refused
+    breaker.before_call()
+    with pytest.raises(ProviderUnavailableException):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_retry_stops_on_permanent_errors():
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await retry_with_backoff("test", call, max_retries=3)
+
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_returns_first_success():
+    delays = [1.0, 0.0]
+
+    async def call():
+        await asyncio.sleep(delays.pop(0))
+        return "done"
+
+    result = await asyncio.wait_for(hedge("test", call, delay=0.01), timeout=0.5)
+
+    assert result == "done"
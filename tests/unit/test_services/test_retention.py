@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.config import settings
+from app.models.domain.database_models import CrawlBlob, ResearchCache
+from app.services.crawl_blobs import CrawlBlobStore
+from app.services.retention import UNREFERENCED_BLOBS, RetentionManager, month_start
+
+
+def test_month_start_rolls_over_years():
+    assert month_start(datetime(2026, 11, 20), 2) == datetime(2027, 1, 1)
+    assert month_start(datetime(2026, 1, 5)) == datetime(2026, 1, 1)
+
+
+def test_only_partitions_past_retention_are_dropped():
+    db = MagicMock()
+    db.execute.return_value.scalars.return_value.all.return_value = [
+        "research_jobs_2026_06", "research_jobs_2026_07", "research_jobs_default"
+    ]
+
+    dropped = RetentionManager(db).drop_partitions("research_jobs", datetime(2026, 7, 15))
+
+    assert dropped == ["research_jobs_2026_06"]
+
+
+def test_purge_deletes_in_bounded_batches():
+    db = MagicMock()
+    batch = settings.RETENTION_BATCH_SIZE
+    db.execute.return_value.rowcount = batch
+
+    with patch.object(settings, "RETENTION_MAX_BATCHES", 3):
+        purged = RetentionManager(db).purge(
+            "research_cache", "research_cache", "stale_until < :now", {"now": None}
+        )
+
+    assert purged == 3 * batch
+    assert db.commit.call_count == 3
+
+
+def test_unreferenced_blobs_are_swept_after_the_cache_purge():
+    manager = RetentionManager(MagicMock())
+    now = datetime(2026, 7, 15)
+    manager.purge = MagicMock(return_value=0)
+    manager.create_partitions = MagicMock()
+    manager.drop_partitions = MagicMock()
+    manager.export_sizes = MagicMock()
+
+    with patch("app.services.retention.datetime") as clock:
+        clock.utcnow.return_value = now
+        purged = manager.run()
+
+    targets = [call.args[1] for call in manager.purge.call_args_list]
+    assert targets.index("crawl_blobs") > targets.index("research_cache")
+    _, _, condition, params = manager.purge.call_args_list[-1].args
+    assert condition == UNREFERENCED_BLOBS
+    assert params == {"grace": now - timedelta(seconds=settings.RETENTION_BLOB_GRACE)}
+    assert "crawl_blobs" in purged
+
+
+def test_blob_sweep_matches_the_crawl_data_column_type():
+    # Postgres has no json_each_text(jsonb), so the sweep must follow the column
+    column_type = ResearchCache.__table__.c.crawl_data.type.dialect_impl(postgresql.dialect())
+
+    assert isinstance(column_type, JSONB)
+    assert "jsonb_each_text(research_cache.crawl_data -> 'blobs')" in UNREFERENCED_BLOBS
+
+
+def test_blob_sweep_keeps_only_referenced_blobs(db):
+    blobs = CrawlBlobStore(db)
+    manifest = blobs.put({"https://acme.com/": "<p>Acme</p>"})
+    blobs.put({"https://gone.com/": "<p>Gone</p>"})
+    db.execute(insert(ResearchCache).values(company_url="https://acme.com", crawl_data=manifest))
+    db.execute(update(CrawlBlob).values(created_at=func.now() - timedelta(days=2)))
+    db.commit()
+
+    try:
+        RetentionManager(db).purge(
+            "crawl_blobs", "crawl_blobs", UNREFERENCED_BLOBS,
+            {"grace": datetime.utcnow() - timedelta(days=1)}
+        )
+        remaining = {digest for digest, in db.query(CrawlBlob.hash)}
+        assert remaining == set(manifest["blobs"].values())
+    finally:
+        db.query(ResearchCache).delete()
+        db.query(CrawlBlob).delete()
+        db.commit()
@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.scheduler import REFRESH_TASK, FairScheduler, tenant_for
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def sent():
+    """(lane, job_id) of every job handed to Celery"""
+    sent = []
+
+    def send_to_celery(lane, payloads):
+        job_ids = [json.loads(payload)["job_id"] for payload in payloads]
+        sent.extend((lane, job_id) for job_id in job_ids)
+        return job_ids
+
+    with patch("app.services.scheduler.send_to_celery", side_effect=send_to_celery):
+        yield sent
+
+
+@pytest.fixture
+def scheduler():
+    return FairScheduler(fakeredis.FakeRedis(decode_responses=True))
+
+
+@pytest.fixture
+def lanes(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_LANES", {"interactive": 2, "batch": 1})
+    monkeypatch.setattr(settings, "SCHEDULER_DEFAULT_MAX_RUNNING", 2)
+
+
+def test_jobs_dispatch_only_into_free_slots(scheduler, sent, lanes):
+    for job_id in ("a", "b", "c"):
+        scheduler.submit("interactive", "key", job_id, [job_id])
+
+    assert sent == [("interactive", "a"), ("interactive", "b")]
+    assert [job["job_id"] for job in scheduler.queued("interactive")] == ["c"]
+
+
+def test_tenants_share_a_lane_fairly(scheduler, sent, lanes):
+    scheduler.submit_many("interactive", "bulk", {f"b{i}": [] for i in range(1, 7)})
+    scheduler.submit_many("interactive", "small", {"s1": [], "s2": []})
+    sent.clear()
+
+    for job_id in ("b1", "b2", "b3"):
+        scheduler.complete("interactive", tenant_for("bulk"), job_id)
+
+    # The other tenant's jobs are interleaved with the earlier bulk backlog
+    assert [job_id for _, job_id in sent] == ["b3", "s1", "b4"]
+
+
+def test_tenants_are_capped_at_their_concurrency_ceiling(scheduler, sent, lanes, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_KEY_MAX_RUNNING", {"capped": 1})
+
+    scheduler.submit_many("interactive", "capped", {"c1": [], "c2": []})
+    scheduler.submit("interactive", "other", "o1", [])
+
+    # c2 waits even though the lane has room; o1 takes the second slot
+    assert sent == [("interactive", "c1"), ("interactive", "o1")]
+    assert [job["job_id"] for job in scheduler.queued("interactive")] == ["c2"]
+
+
+def test_complete_backfills_the_freed_slot(scheduler, sent, lanes):
+    scheduler.submit_many("interactive", "key", {"a": [], "b": [], "c": []})
+    sent.clear()
+
+    assert scheduler.complete("interactive", tenant_for("key"), "a") == ["c"]
+    assert sent == [("interactive", "c")]
+    assert scheduler.idle_slots("interactive") == 0
+
+
+def test_lanes_have_separate_slots(scheduler, sent, lanes):
+    scheduler.submit("batch", "key", "deep-1", [])
+    scheduler.submit("batch", "key", "deep-2", [])
+    scheduler.submit("interactive", "other", "quick", [])
+
+    # A full batch lane does not delay interactive work
+    assert sent == [("batch", "deep-1"), ("interactive", "quick")]
+    assert scheduler.idle_slots("batch") == 0
+    assert scheduler.idle_slots("interactive") == 1
+
+
+def test_payloads_name_the_task_to_run(scheduler, lanes):
+    with patch("app.services.scheduler.send_to_celery", return_value=[]) as send:
+        scheduler.submit("batch", None, "refresh", ["https://acme.com", 0], task=REFRESH_TASK)
+
+    lane, payloads = send.call_args[0]
+    job = json.loads(payloads[0])
+    assert (lane, job["task"], job["tenant"]) == ("batch", REFRESH_TASK, tenant_for(None))
@@ -0,0 +1,153 @@
+import hashlib
+import hmac
+import json
+import socket
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.validation import UnsafeURLError, resolve_public_url
+from app.models.schemas.requests import ResearchRequest
+from app.services.webhooks import WebhookDispatcher, sign
+
+URL = "https://client.example.com/hooks"
+
+ADDRESSES = {
+    "client.example.com": "93.184.215.14",
+    "other.example.com": "93.184.215.15",
+    "internal.example.com": "10.0.0.5",
+    "metadata.example.com": "169.254.169.254"
+}
+
+
+@pytest.fixture(autouse=True)
+def dns():
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(None, None, None, "", (ADDRESSES.get(host, host), port))]
+
+    with patch("app.core.validation.socket") as resolver:
+        resolver.getaddrinfo.side_effect = getaddrinfo
+        resolver.gaierror = socket.gaierror
+        yield
+
+
+def dispatcher_with(handler, redis=None):
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    return WebhookDispatcher(redis or MagicMock(), client)
+
+
+def test_signature_covers_timestamp_and_body():
+    signature = sign(b'{"events": []}', 1700000000, secret="s3cret")
+
+    expected = hmac.new(b"s3cret", b'1700000000.{"events": []}', hashlib.sha256).hexdigest()
+    assert signature == f"sha256={expected}"
+    assert sign(b'{"events": []}', 1700000001, secret="s3cret") != signature
+
+
+def test_enqueue_schedules_one_delivery_per_quiet_url():
+    redis = MagicMock()
+    # rpush/set results per URL: only the first URL had nothing scheduled
+    redis.pipeline.return_value.execute.return_value = [2, True, 1, None]
+    dispatcher = WebhookDispatcher(redis, MagicMock())
+
+    with patch.object(WebhookDispatcher, "_schedule") as schedule:
+        dispatcher.enqueue([
+            (URL, {"job_id": "a"}),
+            (URL, {"job_id": "b"}),
+            ("https://other.example.com", {"job_id": "c"})
+        ])
+
+    schedule.assert_called_once_with([URL], settings.WEBHOOK_BATCH_WINDOW)
+
+
+def test_deliver_posts_queued_events_signed_and_batched():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(204)
+
+    redis = MagicMock()
+    redis.lpop.side_effect = [
+        [json.dumps({"job_id": "a"}), json.dumps({"job_id": "b"})],
+        None
+    ]
+
+    dispatcher_with(handler, redis).deliver(URL)
+
+    assert len(requests) == 1
+    body = json.loads(requests[0].content)
+    assert [event["job_id"] for event in body["events"]] == ["a", "b"]
+    timestamp = int(requests[0].headers["X-Webhook-Timestamp"])
+    assert requests[0].headers["X-Webhook-Signature"] == sign(requests[0].content, timestamp)
+
+
+def test_server_errors_are_retried_with_the_same_batch():
+    dispatcher = dispatcher_with(lambda request: httpx.Response(503))
+    events = [{"job_id": "a"}]
+
+    with patch.object(WebhookDispatcher, "_schedule") as schedule:
+        dispatcher.deliver(URL, events, attempt=1)
+
+    args, countdown = schedule.call_args[0]
+    assert args == [URL, events, 2]
+    assert 0 <= countdown <= settings.WEBHOOK_RETRY_BACKOFF * 2
+
+
+def test_rejected_and_exhausted_batches_are_dropped():
+    with patch.object(WebhookDispatcher, "_schedule") as schedule:
+        dispatcher_with(lambda request: httpx.Response(410)).deliver(URL, [{"job_id": "a"}])
+        dispatcher_with(lambda request: httpx.Response(500)).deliver(
+            URL, [{"job_id": "b"}], attempt=settings.WEBHOOK_MAX_ATTEMPTS - 1
+        )
+
+    schedule.assert_not_called()
+
+
+def test_callback_urls_must_be_public():
+    for url in ("http://169.254.169.254/latest/meta-data", "http://localhost:8000/hook",
+                "http://[::ffff:127.0.0.1]/hook", "http://10.1.2.3/hook"):
+        with pytest.raises(ValidationError):
+            ResearchRequest(company_url="https://acme.com", callback_url=url)
+        with pytest.raises(UnsafeURLError):
+            resolve_public_url(url)
+
+    for url in ("https://internal.example.com/hook", "https://metadata.example.com/hook"):
+        with pytest.raises(UnsafeURLError):
+            resolve_public_url(url)
+
+    assert resolve_public_url(URL) == ["93.184.215.14"]
+
+
+def test_deliveries_to_internal_addresses_are_dropped():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(204)
+
+    with patch.object(WebhookDispatcher, "_schedule") as schedule:
+        dispatcher_with(handler).deliver(
+            "https://metadata.example.com/hooks", [{"job_id": "a"}]
+        )
+
+    assert requests == []
+    schedule.assert_not_called()
+
+
+def test_redirects_are_not_followed():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(307, headers={"Location": "http://169.254.169.254/"})
+
+    with patch.object(WebhookDispatcher, "_schedule") as schedule:
+        delivered = dispatcher_with(handler).send(URL, [{"job_id": "a"}])
+
+    assert delivered is None
+    assert [str(request.url) for request in requests] == [URL]
+    schedule.assert_not_called()